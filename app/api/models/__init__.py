@@ -0,0 +1,6 @@
+"""Response models for the API routes. FastAPI validates and serializes declared
+response models straight to JSON bytes in pydantic-core, skipping jsonable_encoder."""
+from .meals import HealthAnalysis, MealAnalysis, MealBatchResult, MealImageURL, Meal, MealHistoryPage, Message
+from .totals import NutrientTotals, DayTotals, Dashboard, Rollup, Trends, Streak, Streaks
+from .profile import RDA, UserSettings
+from .transfer import ImportRowError, ImportResult
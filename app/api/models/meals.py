@@ -0,0 +1,57 @@
+from pydantic import BaseModel, ConfigDict
+from typing import List, Optional
+
+class HealthAnalysis(BaseModel):
+    is_healthy: Optional[bool] = None
+    message: str = ''
+
+class MealAnalysis(BaseModel):
+    """A meal's nutrition and health analysis, as returned when it is logged."""
+    # The model may add fields of its own; they are passed through
+    model_config = ConfigDict(extra='allow')
+
+    name: str
+    calories: float = 0
+    total_fat: float = 0
+    carbohydrates: float = 0
+    protein: float = 0
+    fiber: float = 0
+    sugars: float = 0
+    sodium: float = 0
+    serving_size: str = ''
+    health_analysis: Optional[HealthAnalysis] = None
+    source: Optional[str] = None  # local, cache or llm
+    image_url: Optional[str] = None
+    image_pending: Optional[bool] = None  # the image is being searched for; poll /meal_image/
+
+class MealBatchResult(BaseModel):
+    meals: List[MealAnalysis]
+    count: int
+
+class MealImageURL(BaseModel):
+    name: str
+    image_url: Optional[str] = None
+
+class Meal(BaseModel):
+    """A logged meal; validated straight from result rows (see db_utils.MEAL_COLUMNS)."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+    timestamp: int
+    calories: Optional[float] = None
+    total_fat: Optional[float] = None
+    carbohydrates: Optional[float] = None
+    protein: Optional[float] = None
+    fiber: Optional[float] = None
+    sugars: Optional[float] = None
+    serving_size: Optional[str] = None
+    sodium: Optional[float] = None
+    local_date: Optional[str] = None
+
+class MealHistoryPage(BaseModel):
+    meals: List[Meal]
+    next_cursor: Optional[str] = None
+
+class Message(BaseModel):
+    message: str
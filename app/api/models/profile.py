@@ -0,0 +1,15 @@
+from pydantic import BaseModel, ConfigDict
+
+class RDA(BaseModel):
+    # The LLM may return more targets than these
+    model_config = ConfigDict(extra='allow')
+
+    calories: float
+    protein: float
+    fat: float
+    fiber: float
+    carbohydrates: float
+    source: str  # local or llm
+
+class UserSettings(BaseModel):
+    time_zone: str
@@ -0,0 +1,57 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from .meals import Meal
+
+class NutrientTotals(BaseModel):
+    calories: float = 0
+    total_fat: float = 0
+    carbohydrates: float = 0
+    protein: float = 0
+    fiber: float = 0
+    sugars: float = 0
+    sodium: float = 0
+
+class DayTotals(NutrientTotals):
+    date: str
+
+class Dashboard(BaseModel):
+    date: str
+    totals: NutrientTotals
+    meals: List[Meal]
+    history: List[DayTotals]
+
+class Rollup(BaseModel):
+    """Per-period columns: average per logged day, percent of RDA and macro energy ratios."""
+    period: List[str]
+    logged_days: List[int]
+    calories: List[Optional[float]]
+    total_fat: List[Optional[float]]
+    carbohydrates: List[Optional[float]]
+    protein: List[Optional[float]]
+    fiber: List[Optional[float]]
+    sugars: List[Optional[float]]
+    sodium: List[Optional[float]]
+    pct_rda: Dict[str, List[Optional[float]]]
+    macros: Dict[str, List[Optional[float]]]
+
+class Trends(BaseModel):
+    start: str
+    end: str
+    resolution_days: int
+    rda: Dict[str, float]
+    daily: Dict[str, List[Any]]  # 'date' plus one series per statistic (see trends_service)
+    weekly: Rollup
+    monthly: Rollup
+    summary: Rollup
+
+class Streak(BaseModel):
+    current: int
+    longest: int
+    last_met: Optional[str] = None
+    threshold: Optional[float] = None
+
+class Streaks(BaseModel):
+    date: str
+    last_logged_day: Optional[str] = None
+    thresholds_met: List[str]
+    streaks: Dict[str, Streak]
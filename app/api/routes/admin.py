@@ -0,0 +1,41 @@
+from fastapi import APIRouter, Header, HTTPException
+from typing import Optional
+from app.services import llm_router, meal_cache
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+def check_admin_token(token: Optional[str]):
+    """Require X-Admin-Token when HEALTHCHECK_ADMIN_TOKEN is set."""
+    expected = os.getenv("HEALTHCHECK_ADMIN_TOKEN")
+    if expected and token != expected:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.get("/admin/meal_cache/stats")
+async def get_meal_cache_stats(x_admin_token: Optional[str] = Header(None)):
+    check_admin_token(x_admin_token)
+    return meal_cache.get_stats()
+
+@router.get("/admin/llm_routing")
+async def get_llm_routing(x_admin_token: Optional[str] = Header(None)):
+    """Rolling latency, error rate and availability of each routed LLM backend."""
+    check_admin_token(x_admin_token)
+    return {"order": llm_router.ranked_models(), "models": llm_router.get_stats()}
+
+@router.delete("/admin/meal_cache")
+async def invalidate_meal_cache(
+    query: Optional[str] = None,
+    model: Optional[str] = None,
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Invalidate cached meal analyses for one query and/or model, or all of them."""
+    check_admin_token(x_admin_token)
+    try:
+        removed = await meal_cache.invalidate(query, model)
+        return {"message": "Meal analysis cache invalidated", "removed": removed}
+    except Exception as e:
+        logger.error(f"Error invalidating meal cache: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import RedirectResponse
-from app.services import llm_service, db_utils
-from app.services.image_service import search_meal_image
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+from app.api.models import (
+    Dashboard, DayTotals, Meal, MealAnalysis, MealBatchResult, MealHistoryPage, MealImageURL, Message,
+    NutrientTotals, Streaks, Trends
+)
+from app.core.singleflight import SingleFlight
+from app.services import llm_service, db_utils, meal_cache, image_service, nutrition_index, response_cache, trends_service
 from datetime import date
-from typing import Optional
+from typing import List, Optional
+import asyncio
+import copy
 import datetime
+import functools
 import time
 import logging
 import json
@@ -14,74 +22,109 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Meals analyzed per LLM prompt in a batch, and how many of those prompts may run at once
+BATCH_PROMPT_SIZE = 10
+BATCH_CONCURRENCY = 4
+
+# Identical meals analyzed concurrently share one LLM call, keyed on (model, normalized query)
+_analyses = SingleFlight("llm.meal_analysis")
+
+MEAL_JSON_FORMAT = """{
+    "name": "meal name",
+    "calories": value,
+    "total_fat": value,
+    "carbohydrates": value,
+    "protein": value,
+    "fiber": value,
+    "sugars": value,
+    "sodium": value,
+    "serving_size": "serving size",
+    "health_analysis": {
+        "is_healthy": true or false,
+        "message": "Your encouraging message here"
+    }
+}"""
+
+FIELD_MAPPING = {
+    'total fat': 'total_fat',
+    'total_fat': 'total_fat',
+    'carbs': 'carbohydrates',
+    'carbohydrates': 'carbohydrates',
+    'serving size': 'serving_size'
+}
+
+class MealBatch(BaseModel):
+    user_id: str
+    meals: List[str] = Field(..., min_length=1, max_length=100)
+
 def normalize_meal_data(data: dict) -> dict:
     """Normalize field names and ensure all required fields are present"""
-    field_mapping = {
-        'total fat': 'total_fat',
-        'total_fat': 'total_fat',
-        'carbs': 'carbohydrates',
-        'carbohydrates': 'carbohydrates',
-        'serving size': 'serving_size'
-    }
-    
     normalized = {}
     
     # Copy all fields, normalizing known fields
     for key, value in data.items():
-        normalized_key = field_mapping.get(key.lower(), key)
+        normalized_key = FIELD_MAPPING.get(key.lower(), key)
         normalized[normalized_key] = value
     
+    # Ensure health_analysis is properly structured
+    if not isinstance(normalized.get('health_analysis'), dict):
+        normalized['health_analysis'] = {
+            'is_healthy': None,
+            'message': 'Keep tracking your meals! Every meal logged is a step toward better health awareness.'
+        }
+    else:
+        # Copied, so the caller's (possibly cached) analysis is left as it was
+        normalized['health_analysis'] = dict(normalized['health_analysis'])
+        message = normalized['health_analysis'].get('message')
+        normalized['health_analysis']['message'] = '' if message is None else str(message)
+
     # Ensure all required fields are present
     required_fields = ['name', 'calories', 'total_fat', 'carbohydrates', 'protein', 
-                      'fiber', 'sugars', 'sodium', 'serving_size', 'health_analysis']
+                      'fiber', 'sugars', 'sodium', 'serving_size']
     
     for field in required_fields:
         if field not in normalized:
             normalized[field] = 0 if field in ['calories', 'total_fat', 'carbohydrates', 
                                              'protein', 'fiber', 'sugars', 'sodium'] else ''
-    
-    # Ensure health_analysis is properly structured
-    if 'health_analysis' not in normalized:
-        normalized['health_analysis'] = {
-            'is_healthy': None,
-            'message': 'Keep tracking your meals! Every meal logged is a step toward better health awareness.'
-        }
+
+    # The model sometimes answers with a bare number ("serving_size": 1)
+    for field in ['name', 'serving_size']:
+        if normalized[field] is None:
+            normalized[field] = ''
+        elif not isinstance(normalized[field], str):
+            normalized[field] = str(normalized[field])
     
     return normalized
 
+def validate_meal(meal_data: dict) -> dict:
+    """A combined analysis as the MealAnalysis the routes respond with; raises ValueError if it doesn't fit.
+
+    Call before logging or caching it, so a bad LLM answer fails the request instead
+    of being stored (and then failing every retry).
+    """
+    try:
+        return MealAnalysis.model_validate(meal_data).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        raise ValueError(f"Unusable meal analysis: {e}") from e
+
 @router.get("/")
 async def root():
     return RedirectResponse(url="/static/index.html")
 
-@router.get("/calorie_count/{query:path}")
-async def calorie_count(query: str, user_id: str):
+# Analyses only carry image_url/image_pending when set, so unset fields are left out
+@router.get("/calorie_count/{query:path}", response_model=MealAnalysis, response_model_exclude_unset=True)
+async def calorie_count(
+    query: str,
+    user_id: str,
+    background_tasks: BackgroundTasks,
+    wait_for_image: bool = False
+):
     try:
         # Get nutrition data and health analysis in one call
         meal_data = await get_meal_analysis(query)
         
-        # Search for an image of the meal
-        image_url = search_meal_image(meal_data["name"])
-        if image_url:
-            meal_data["image_url"] = image_url
-        
-        # Normalize the data
-        meal_data = normalize_meal_data(meal_data)
-        
-        # Convert the response to the correct format if it contains multiple items
-        if isinstance(meal_data.get('calories'), dict):
-            # Sum up the values for each nutrient
-            total_meal = {
-                'name': query,
-                'calories': sum(meal_data.get('calories', {}).values()),
-                'total_fat': sum(meal_data.get('total_fat', {}).values()),
-                'carbohydrates': sum(meal_data.get('carbohydrates', {}).values()),
-                'protein': sum(meal_data.get('protein', {}).values()),
-                'fiber': sum(meal_data.get('fiber', {}).values()),
-                'sugars': sum(meal_data.get('sugars', {}).values()),
-                'sodium': sum(meal_data.get('sodium', {}).values()),
-                'serving_size': 'combined serving'
-            }
-            meal_data = normalize_meal_data(total_meal)
+        await attach_meal_image(meal_data, background_tasks, wait_for_image)
+        meal_data = validate_meal(combine_meal_items(query, meal_data))
         
         # Store the transaction in the database
         await db_utils.add_transaction(user_id, meal_data)
@@ -91,11 +134,149 @@ async def calorie_count(query: str, user_id: str):
         logger.error(f"Error processing meal info: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-async def get_meal_analysis(query: str) -> dict:
-    """Get nutrition data and health analysis using LLM in a single call"""
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@router.get("/calorie_count_stream/{query:path}")
+async def calorie_count_stream(query: str, user_id: str):
+    """Streaming calorie_count, as server-sent events.
+
+    Emits a `field` event per nutrition field as the model produces it, then
+    `health_analysis`, then `meal` once the transaction is stored, and finally
+    `done`. Failures are reported as an `error` event. As with calorie_count,
+    `meal` carries a cached image_url, or image_pending while the image is
+    searched for after the response (poll /meal_image/).
+
+    Identical meals analyzed concurrently share one LLM call with the JSON route;
+    a request that joins another's call replays the fields once the analysis is done.
+    """
+    background_tasks = BackgroundTasks()
+
+    async def events():
+        try:
+            model = settings.models['llm']['default']
+            meal_data = await get_known_analysis(query, model)
+            streamed = False
+            if meal_data is None:
+                key = (model, meal_cache.normalize_query(query))
+                fields = asyncio.Queue()
+                # Only fed when this request's call is the one that runs
+                analysis = asyncio.ensure_future(_analyses.do(key, stream_meal_analysis, query, model, fields))
+                try:
+                    while True:
+                        next_field = asyncio.ensure_future(fields.get())
+                        await asyncio.wait({analysis, next_field}, return_when=asyncio.FIRST_COMPLETED)
+                        if not next_field.done():
+                            next_field.cancel()
+                            break
+                        field, value = next_field.result()
+                        streamed = True
+                        yield sse_event("field", {"field": field, "value": value})
+                finally:
+                    # The call itself is shared and carries on for any other waiters
+                    analysis.cancel()
+                while not fields.empty():
+                    field, value = fields.get_nowait()
+                    yield sse_event("field", {"field": field, "value": value})
+                meal_data = copy.deepcopy(analysis.result())
+                meal_data['source'] = 'llm'
+            if streamed:
+                yield sse_event("field", {"field": "source", "value": "llm"})
+            else:
+                for key, value in meal_data.items():
+                    if key != 'health_analysis':
+                        yield sse_event("field", {"field": key, "value": value})
+
+            yield sse_event("health_analysis", meal_data.get('health_analysis'))
+
+            meal_data = validate_meal(combine_meal_items(query, meal_data))
+            await db_utils.add_transaction(user_id, meal_data)
+            await attach_meal_image(meal_data, background_tasks)
+            yield sse_event("meal", meal_data)
+            yield sse_event("done", {})
+        except HTTPException as e:
+            logger.error(f"Error streaming meal info: {e.detail}")
+            yield sse_event("error", {"detail": e.detail})
+        except Exception as e:
+            logger.error(f"Error streaming meal info: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=background_tasks
+    )
+
+@router.post("/meals/batch", response_model=MealBatchResult, response_model_exclude_unset=True)
+async def log_meal_batch(batch: MealBatch, background_tasks: BackgroundTasks):
+    """Analyze and log several meals at once: one LLM prompt per chunk of meals, one insert."""
     try:
-        # Create a combined prompt for both nutrition data and health analysis
-        prompt = f"""Analyze the following meal: {query}
+        analyses = await get_meal_analyses(batch.meals)
+
+        meals = []
+        for query, meal_data in zip(batch.meals, analyses):
+            await attach_meal_image(meal_data, background_tasks)
+            meals.append(validate_meal(combine_meal_items(query, meal_data)))
+
+        await db_utils.add_transactions(batch.user_id, meals)
+        return {"meals": meals, "count": len(meals)}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error processing meal batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def attach_meal_image(meal_data: dict, background_tasks: BackgroundTasks, wait_for_image: bool = False):
+    """Add a cached image URL to meal_data, or schedule the search to run after the response."""
+    # Use a cached image if we have one; otherwise search after the response is sent
+    # and let the client pick it up from /meal_image/ (unless it asked to wait)
+    hit, image_url = await image_service.get_cached_image(meal_data["name"])
+    if not hit and wait_for_image:
+        image_url = await image_service.search_meal_image(meal_data["name"])
+    elif not hit:
+        background_tasks.add_task(image_service.resolve_meal_image_in_background, meal_data["name"])
+        meal_data["image_pending"] = True
+    if image_url:
+        meal_data["image_url"] = image_url
+
+def combine_meal_items(query: str, meal_data: dict) -> dict:
+    """Normalize an analysis, summing per-item values when the LLM broke the meal into parts."""
+    meal_data = normalize_meal_data(meal_data)
+    
+    # Convert the response to the correct format if it contains multiple items
+    if isinstance(meal_data.get('calories'), dict):
+        # Sum up the values for each nutrient (some may come back as a single total)
+        def total(value):
+            return sum(value.values()) if isinstance(value, dict) else value
+
+        total_meal = {
+            'name': query,
+            'calories': total(meal_data.get('calories')),
+            'total_fat': total(meal_data.get('total_fat')),
+            'carbohydrates': total(meal_data.get('carbohydrates')),
+            'protein': total(meal_data.get('protein')),
+            'fiber': total(meal_data.get('fiber')),
+            'sugars': total(meal_data.get('sugars')),
+            'sodium': total(meal_data.get('sodium')),
+            'serving_size': 'combined serving',
+        }
+        # Set on the analysis as a whole, not per item
+        for key in ('source', 'health_analysis', 'image_url', 'image_pending'):
+            if key in meal_data:
+                total_meal[key] = meal_data[key]
+        meal_data = normalize_meal_data(total_meal)
+    return meal_data
+
+@router.get("/meal_image/{meal_name:path}", response_model=MealImageURL)
+async def get_meal_image(meal_name: str):
+    """Image URL for a meal, joining any search already running in the background."""
+    image_url = await image_service.search_meal_image(meal_name)
+    return {"name": meal_name, "image_url": image_url}
+
+def build_meal_prompt(query: str) -> str:
+    # Create a combined prompt for both nutrition data and health analysis
+    return f"""Analyze the following meal: {query}
 
 1. First, provide the nutritional values for each category:
 {settings.nutrition}
@@ -105,41 +286,155 @@ If healthy, provide a unique encouraging message about making good choices.
 If unhealthy, provide a gentle reminder about health but stay encouraging.
 
 Return a single JSON object that includes both the nutritional data and health analysis, with these EXACT field names:
-{{
-    "name": "meal name",
-    "calories": value,
-    "total_fat": value,
-    "carbohydrates": value,
-    "protein": value,
-    "fiber": value,
-    "sugars": value,
-    "sodium": value,
-    "serving_size": "serving size",
-    "health_analysis": {{
-        "is_healthy": true or false,
-        "message": "Your encouraging message here"
-    }}
-}}
+{MEAL_JSON_FORMAT}
 
 Important: Use underscores in field names (total_fat, not total fat). Respond ONLY with the JSON object."""
 
-        llm_response = await llm_service.send_to_llm(prompt)
-        meal_data = await llm_service.format_response(llm_response)
-        
-        # Normalize the data
-        meal_data = normalize_meal_data(meal_data)
-        
-        # Ensure health_analysis.is_healthy is boolean
-        if isinstance(meal_data.get('health_analysis', {}).get('is_healthy'), str):
-            meal_data['health_analysis']['is_healthy'] = meal_data['health_analysis']['is_healthy'].lower() == 'true'
-        
+def build_batch_prompt(queries: List[str]) -> str:
+    meals = "\n".join(f"{i + 1}. {query}" for i, query in enumerate(queries))
+    return f"""Analyze each of the following {len(queries)} meals separately:
+{meals}
+
+1. For each meal, provide the nutritional values for each category:
+{settings.nutrition}
+
+2. Then, analyze if each meal is healthy or unhealthy based on its nutritional content.
+If healthy, provide a unique encouraging message about making good choices.
+If unhealthy, provide a gentle reminder about health but stay encouraging.
+
+Return a JSON array with exactly {len(queries)} objects, one per meal in the order listed, each with these EXACT field names:
+{MEAL_JSON_FORMAT}
+
+Important: Use underscores in field names (total_fat, not total fat). Respond ONLY with the JSON array."""
+
+def clean_meal_analysis(meal_data: dict) -> dict:
+    # Normalize the data
+    meal_data = normalize_meal_data(meal_data)
+    
+    # Ensure health_analysis.is_healthy is boolean
+    if isinstance(meal_data.get('health_analysis', {}).get('is_healthy'), str):
+        meal_data['health_analysis']['is_healthy'] = meal_data['health_analysis']['is_healthy'].lower() == 'true'
+    return meal_data
+
+async def get_meal_analyses(queries: List[str]) -> List[dict]:
+    """Analyses for several meals, in order. Cache misses share one LLM prompt per BATCH_PROMPT_SIZE meals."""
+    model = settings.models['llm']['default']
+    results = [await get_known_analysis(query, model) for query in queries]
+    misses = [i for i, result in enumerate(results) if result is None]
+
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def analyze_chunk(indexes: List[int]):
+        async with semaphore:
+            chunk = [queries[i] for i in indexes]
+            if len(chunk) == 1:
+                return [await get_meal_analysis(chunk[0])]
+            analyses = await llm_service.format_response(
+                await llm_service.send_to_llm(build_batch_prompt(chunk))
+            )
+            if isinstance(analyses, dict):
+                analyses = analyses.get('meals', [analyses])
+            if not isinstance(analyses, list) or len(analyses) != len(chunk):
+                # The model merged or dropped items; analyze them one at a time instead
+                logger.warning(f"Batch analysis did not return {len(chunk)} items, falling back to single prompts")
+                return await asyncio.gather(*[get_meal_analysis(query) for query in chunk])
+            analyses = [clean_meal_analysis(analysis) for analysis in analyses]
+            for query, analysis in zip(chunk, analyses):
+                validate_meal(combine_meal_items(query, analysis))
+            for query, analysis in zip(chunk, analyses):
+                await meal_cache.store_analysis(query, model, analysis)
+                analysis['source'] = 'llm'
+            return analyses
+
+    chunks = [misses[i:i + BATCH_PROMPT_SIZE] for i in range(0, len(misses), BATCH_PROMPT_SIZE)]
+    for indexes, analyses in zip(chunks, await asyncio.gather(*[analyze_chunk(c) for c in chunks])):
+        for i, analysis in zip(indexes, analyses):
+            results[i] = analysis
+    return results
+
+async def get_known_analysis(query: str, model: str) -> Optional[dict]:
+    """Analysis from the local nutrition table or the meal cache, without calling the LLM.
+
+    The result's `source` is "local" or "cache"; None means the LLM has to be asked.
+    """
+    meal_data = nutrition_index.lookup(query)
+    if meal_data is not None:
+        meal_data['source'] = 'local'
+        return meal_data
+    meal_data = await meal_cache.get_cached_analysis(query, model)
+    if meal_data is not None:
+        meal_data['source'] = 'cache'
+    return meal_data
+
+async def stream_meal_analysis(query: str, model: str, fields: asyncio.Queue) -> dict:
+    """analyze_with_llm over a streamed completion, putting each (field, value) on `fields` as it arrives."""
+    parser = llm_service.PartialJSONObject()
+    text = ''
+    async for chunk in llm_service.stream_llm(build_meal_prompt(query)):
+        text += chunk
+        for key, value in parser.feed(chunk):
+            if key != 'health_analysis':
+                fields.put_nowait((FIELD_MAPPING.get(key.lower(), key), value))
+    meal_data = clean_meal_analysis(await llm_service.format_response(text))
+    validate_meal(combine_meal_items(query, meal_data))
+    await meal_cache.store_analysis(query, model, meal_data)
+    return meal_data
+
+async def analyze_with_llm(query: str, model: str) -> dict:
+    llm_response = await llm_service.send_to_llm(build_meal_prompt(query))
+    meal_data = clean_meal_analysis(await llm_service.format_response(llm_response))
+    validate_meal(combine_meal_items(query, meal_data))
+    await meal_cache.store_analysis(query, model, meal_data)
+    return meal_data
+
+async def get_meal_analysis(query: str) -> dict:
+    """Get nutrition data and health analysis, using the LLM in a single call for unknown meals"""
+    try:
+        model = settings.models['llm']['default']
+        known = await get_known_analysis(query, model)
+        if known is not None:
+            return known
+
+        key = (model, meal_cache.normalize_query(query))
+        # Callers mutate the result (image, combined totals), so each gets its own copy
+        meal_data = copy.deepcopy(await _analyses.do(key, analyze_with_llm, query, model))
+        meal_data['source'] = 'llm'
         return meal_data
     except Exception as e:
         logger.error(f"Error analyzing meal: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/daily_totals/")
-async def get_daily_totals(user_id: str, target_date: Optional[str] = None):
+@functools.cache
+def _adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+async def cached_json(request: Request, user_id: str, key: tuple, compute, model) -> Response:
+    """Serve a per-user read response from the response cache, or 304 if the client's copy is current.
+
+    `key` must include every resolved parameter the body depends on (including
+    "today"); `compute` is only awaited on a miss, and its result is serialized
+    as `model`, the route's response model.
+    """
+    version = await db_utils.get_data_version(user_id)
+    etag = response_cache.make_etag(user_id, key, version)
+    # The browser may keep the body but must revalidate it; a 304 costs one primary-key read
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if response_cache.etag_matches(request.headers.get("if-none-match"), etag):
+        response_cache.responses.inc("not_modified")
+        return Response(status_code=304, headers=headers)
+
+    body = response_cache.get(etag)
+    if body is None:
+        response_cache.responses.inc("miss")
+        adapter = _adapter(model)
+        body = adapter.dump_json(adapter.validate_python(await compute()))
+        response_cache.put(etag, body)
+    else:
+        response_cache.responses.inc("hit")
+    return Response(body, media_type="application/json", headers=headers)
+
+@router.get("/daily_totals/", response_model=NutrientTotals)
+async def get_daily_totals(request: Request, user_id: str, target_date: Optional[str] = None):
     try:
         # Convert string date to date object if provided
         date_obj = None
@@ -148,47 +443,154 @@ async def get_daily_totals(user_id: str, target_date: Optional[str] = None):
                 date_obj = date.fromisoformat(target_date)
             except ValueError:
                 raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
-        
-        totals = db_utils.get_daily_totals(user_id, date_obj)
-        if totals is None:
-            return {"message": "No data found for the specified date"}
-        return totals
+        date_obj = date_obj or await db_utils.user_today(user_id)
+
+        return await cached_json(
+            request, user_id, ("daily_totals", date_obj.isoformat()),
+            lambda: db_utils.get_daily_totals(user_id, date_obj), NutrientTotals
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/daily_meals/")
-async def get_daily_meals_endpoint(user_id: str, date: Optional[str] = None):
+@router.get("/daily_meals/", response_model=List[Meal])
+async def get_daily_meals_endpoint(request: Request, user_id: str, date: Optional[str] = None):
     try:
         if date:
-            target_date = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+            try:
+                target_date = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
         else:
-            target_date = datetime.datetime.now().date()
-        
-        start_of_day = datetime.datetime.combine(target_date, datetime.time.min)
-        end_of_day = datetime.datetime.combine(target_date, datetime.time.max)
-        
-        start_timestamp = int(start_of_day.timestamp())
-        end_timestamp = int(end_of_day.timestamp())
-        
-        return await db_utils.get_daily_meals(user_id, start_timestamp, end_timestamp)
+            target_date = await db_utils.user_today(user_id)
+
+        return await cached_json(
+            request, user_id, ("daily_meals", target_date.isoformat()),
+            lambda: db_utils.get_daily_meals(user_id, target_date), List[Meal]
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting daily meals: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/historical_totals/")
-async def get_historical_totals(user_id: str, days: int = 14):
+@router.get("/dashboard/", response_model=Dashboard)
+async def get_dashboard(
+    request: Request,
+    user_id: str,
+    target_date: Optional[str] = None,
+    days: int = Query(7, ge=1, le=90)
+):
+    """A day's totals and meals plus the preceding `days` of daily totals, for the page in one request."""
+    try:
+        date_obj = date.fromisoformat(target_date) if target_date else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    date_obj = date_obj or await db_utils.user_today(user_id)
+
+    try:
+        return await cached_json(
+            request, user_id, ("dashboard", date_obj.isoformat(), days),
+            lambda: db_utils.get_dashboard(user_id, date_obj, days), Dashboard
+        )
+    except Exception as e:
+        logger.error(f"Error getting dashboard: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/meal_history/", response_model=MealHistoryPage)
+async def get_meal_history_endpoint(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    """Page through a user's meals, newest first. Pass next_cursor back to get the next page."""
+    try:
+        meals, next_cursor = await db_utils.get_meal_history(user_id, limit, cursor)
+        return {"meals": meals, "next_cursor": next_cursor}
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except Exception as e:
+        logger.error(f"Error getting meal history: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/historical_totals/", response_model=List[DayTotals])
+async def get_historical_totals(request: Request, user_id: str, days: int = 14):
     """Get historical daily totals for the last N days."""
     try:
         if days > 90:  # Limit to 90 days of history
             raise HTTPException(status_code=400, detail="Cannot request more than 90 days of history")
         
-        totals = db_utils.get_historical_totals(user_id, days)
-        return totals
+        today = await db_utils.user_today(user_id)
+        return await cached_json(
+            request, user_id, ("historical_totals", days, today.isoformat()),
+            lambda: db_utils.get_historical_totals(user_id, days, today), List[DayTotals]
+        )
     except Exception as e:
         logger.error(f"Error getting historical totals: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.delete("/meal/{meal_id}")
+@router.get("/trends/", response_model=Trends)
+async def get_trends(
+    request: Request,
+    user_id: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    days: int = Query(90, ge=1, le=trends_service.MAX_DAYS),
+    max_points: int = Query(trends_service.DEFAULT_MAX_POINTS, ge=10, le=1000),
+    rda_calories: Optional[float] = Query(None, gt=0),
+    rda_protein: Optional[float] = Query(None, gt=0),
+    rda_carbohydrates: Optional[float] = Query(None, gt=0),
+    rda_fat: Optional[float] = Query(None, gt=0),
+    rda_fiber: Optional[float] = Query(None, gt=0),
+    rda_sodium: Optional[float] = Query(None, gt=0)
+):
+    """Rolling averages, weekly/monthly rollups, percent of RDA and macro ratios for a date range.
+
+    The range is start..end, or the `days` days ending at end (default today). Daily
+    series longer than max_points are averaged into buckets; rda_* override the
+    reference targets.
+    """
+    try:
+        end_date = date.fromisoformat(end) if end else await db_utils.user_today(user_id)
+        start_date = date.fromisoformat(start) if start else end_date - datetime.timedelta(days=days - 1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if (end_date - start_date).days >= trends_service.MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Cannot request more than {trends_service.MAX_DAYS} days")
+
+    rda = {
+        'calories': rda_calories,
+        'protein': rda_protein,
+        'carbohydrates': rda_carbohydrates,
+        'total_fat': rda_fat,
+        'fiber': rda_fiber,
+        'sodium': rda_sodium,
+    }
+    rda = {field: target for field, target in rda.items() if target is not None}
+    try:
+        return await cached_json(
+            request, user_id, ("trends", start_date.isoformat(), end_date.isoformat(), max_points, sorted(rda.items())),
+            lambda: trends_service.get_trends(user_id, start_date, end_date, rda, max_points), Trends
+        )
+    except Exception as e:
+        logger.error(f"Error getting trends: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/streaks/", response_model=Streaks)
+async def get_streaks(request: Request, user_id: str):
+    """Current and longest streaks of logging meals and of staying under each threshold (streaks in config.yaml)."""
+    try:
+        today = await db_utils.user_today(user_id)
+        return await cached_json(
+            request, user_id, ("streaks", today.isoformat()),
+            lambda: db_utils.get_streaks(user_id, today), Streaks
+        )
+    except Exception as e:
+        logger.error(f"Error getting streaks: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.delete("/meal/{meal_id}", response_model=Message)
 async def delete_meal_endpoint(meal_id: int, user_id: str):
     try:
         await db_utils.delete_meal(meal_id, user_id)
@@ -196,14 +598,14 @@ async def delete_meal_endpoint(meal_id: int, user_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/meal/{meal_text}")
+@router.get("/meal/{meal_text}", response_model=MealAnalysis, response_model_exclude_unset=True)
 async def get_meal_info(
     meal_text: str,
     user_id: Optional[str] = Query(None)
-) -> dict:
+):
     try:
         # Get nutrition data
-        nutrition_data = await get_meal_analysis(meal_text)
+        nutrition_data = validate_meal(combine_meal_items(meal_text, await get_meal_analysis(meal_text)))
         
         # Save to database if user_id provided
         if user_id:
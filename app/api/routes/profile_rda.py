@@ -1,14 +1,22 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import Dict, Literal, Optional
+from app.api.models import RDA, UserSettings
+from app.core.config import settings
 from app.services.llm_service import send_to_llm, format_response
-from datetime import datetime
+from app.services import db_utils, rda_service
+from datetime import date, datetime
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# "local" computes targets with rda_service; "llm" asks the model as before
+DEFAULT_MODE = settings.rda.get('mode', 'local')
+# Use the LLM when the local engine cannot handle a profile (e.g. an unknown activity level)
+LLM_FALLBACK = settings.rda.get('llm_fallback', True)
+
 class ProfileData(BaseModel):
     age: int
     heightCm: float
@@ -34,8 +42,26 @@ Replace the example numbers with calculated values based on the profile."""
         logger.error(f"Error creating RDA prompt: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/calculate-rda")
-async def calculate_rda(profile: ProfileData) -> Dict:
+def calculate_local_rda(profile: ProfileData) -> Dict:
+    rda = rda_service.calculate_rda(
+        profile.age, profile.heightCm, profile.weightKg, profile.targetWeightKg,
+        profile.targetDate, profile.activityLevel, profile.gender, date.today()
+    )
+    return {**rda, "source": "local"}
+
+@router.post("/calculate-rda", response_model=RDA)
+async def calculate_rda(profile: ProfileData, mode: Optional[Literal["local", "llm"]] = Query(None)):
+    """Daily targets for a profile, computed locally unless mode=llm (or the local engine cannot)."""
+    if (mode or DEFAULT_MODE) == "local":
+        try:
+            return calculate_local_rda(profile)
+        except ValueError as e:
+            if not LLM_FALLBACK:
+                raise HTTPException(status_code=400, detail=str(e))
+            logger.warning(f"Local RDA calculation failed, asking the LLM: {e}")
+    return await calculate_llm_rda(profile)
+
+async def calculate_llm_rda(profile: ProfileData) -> Dict:
     try:
         # Create a concise prompt that works with the existing LLM service
         prompt = await create_rda_prompt(profile)
@@ -55,8 +81,23 @@ async def calculate_rda(profile: ProfileData) -> Dict:
             if field not in formatted_response:
                 raise ValueError(f"Missing required field: {field}")
                 
+        formatted_response["source"] = "llm"
         return formatted_response
 
     except Exception as e:
         logger.error(f"Error in calculate_rda: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/settings/", response_model=UserSettings)
+async def get_settings(user_id: str):
+    """A user's settings; time_zone is the default until they set one."""
+    tz = await db_utils.get_time_zone(user_id)
+    return {"time_zone": tz.key}
+
+@router.put("/settings/", response_model=UserSettings)
+async def update_settings(user_id: str, data: UserSettings):
+    """Set a user's IANA time zone; meals logged from now on are dated in it."""
+    try:
+        return {"time_zone": await db_utils.set_time_zone(user_id, data.time_zone)}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from app.api.models import ImportResult
+from app.services import transfer_service
+from typing import Literal, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+@router.get("/export/")
+async def export_transactions(user_id: str, format: Literal["ndjson", "csv"] = "ndjson"):
+    """Stream a user's whole meal history, oldest first."""
+    return StreamingResponse(
+        transfer_service.export_transactions(user_id, format),
+        media_type=transfer_service.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="meals.{format}"'}
+    )
+
+@router.post("/import/", response_model=ImportResult)
+async def import_transactions(
+    request: Request,
+    user_id: str,
+    format: Optional[Literal["ndjson", "csv"]] = None,
+    dry_run: bool = Query(False, description="validate the body without writing anything")
+):
+    """Bulk-load meals from an NDJSON or CSV body (e.g. an export), without LLM calls.
+
+    The format defaults from Content-Type. Invalid rows are skipped and reported.
+    """
+    if format is None:
+        format = "csv" if request.headers.get("content-type", "").startswith("text/csv") else "ndjson"
+    try:
+        return await transfer_service.import_transactions(user_id, request.stream(), format, dry_run)
+    except Exception as e:
+        logger.error(f"Error importing transactions: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,242 @@
+"""Static asset build and serving.
+
+The build bundles the page's scripts into one minified, content-hashed file,
+hashes the favicon, rewrites index.html to point at them and writes gzip (and,
+when the brotli package is installed, brotli) variants of everything into
+static/dist/:
+
+    python -m app.core.assets [--static-dir static]
+
+PrecompressedStaticFiles serves those variants by Accept-Encoding and marks
+content-hashed files immutable; everything else must be revalidated.
+"""
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from pathlib import Path
+import anyio
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import re
+import shutil
+import stat
+
+logger = logging.getLogger(__name__)
+
+DIST_DIR = "dist"
+HASH_LENGTH = 12
+# Hashed names never change content, so browsers may keep them for a year without asking
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+# Preferred first
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE_SUFFIXES = ('.html', '.js', '.css', '.json', '.svg', '.ico', '.txt')
+
+_HASHED_NAME = re.compile(rf"\.[0-9a-f]{{{HASH_LENGTH}}}\.\w+$")
+_LOCAL_SCRIPT = re.compile(r'[ \t]*<script src="/static/(js/[^"]+\.js)"></script>\n?')
+
+def minify_js(source: str) -> str:
+    """Drop comments, indentation and blank lines.
+
+    Conservative on purpose: newlines are kept (so automatic semicolon insertion
+    behaves exactly as before) and the contents of strings, template literals and
+    regex literals are copied verbatim.
+    """
+    out = []
+    line = []
+    templates = []  # brace depth inside each open template literal's ${...}
+    i, n = 0, len(source)
+    last_significant = ''
+
+    def end_line():
+        text = ''.join(line).strip()
+        if text:
+            out.append(text)
+        line.clear()
+
+    while i < n:
+        c = source[i]
+        if c == '`' or (templates and templates[-1] == 0 and c == '}'):
+            # Template literal text, copied verbatim up to its end or the next ${
+            if c == '}':
+                templates.pop()
+            j = i + 1
+            while j < n and source[j] != '`' and not source.startswith('${', j):
+                j += 2 if source[j] == '\\' else 1
+            if source.startswith('${', j):
+                templates.append(0)
+                j += 2
+            else:
+                j += 1
+            line.append(source[i:j])
+            i, last_significant = j, '`'
+        elif c in '\'"':
+            j = i + 1
+            while j < n and source[j] != c and source[j] != '\n':
+                j += 2 if source[j] == '\\' else 1
+            line.append(source[i:j + 1])
+            i, last_significant = j + 1, c
+        elif source.startswith('//', i):
+            while i < n and source[i] != '\n':
+                i += 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif c == '/' and (last_significant in '(,=:[!&|?{};+-*%<>~^' or
+                           re.search(r'\b(return|typeof|case|do|else|in|of)\s*$', ''.join(line))):
+            # Regex literal; a / inside a character class doesn't end it
+            j, in_class = i + 1, False
+            while j < n and source[j] != '\n' and (in_class or source[j] != '/'):
+                if source[j] == '\\':
+                    j += 1
+                elif source[j] == '[':
+                    in_class = True
+                elif source[j] == ']':
+                    in_class = False
+                j += 1
+            j += 1
+            while j < n and source[j].isalpha():
+                j += 1
+            line.append(source[i:j])
+            i, last_significant = j, 'a'
+        elif c == '\n':
+            end_line()
+            i += 1
+        else:
+            if templates:
+                if c == '{':
+                    templates[-1] += 1
+                elif c == '}':
+                    templates[-1] -= 1
+            line.append(c)
+            if not c.isspace():
+                last_significant = c
+            i += 1
+    end_line()
+    return '\n'.join(out) + '\n'
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+def _hashed_name(name: str, data: bytes) -> str:
+    stem, suffix = name.rsplit('.', 1)
+    return f"{stem}.{content_hash(data)}.{suffix}"
+
+def _compress(path: Path) -> list:
+    """Write .gz (and .br if brotli is installed) next to path, keeping only variants that are smaller."""
+    data = path.read_bytes()
+    variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    try:
+        import brotli
+        variants['.br'] = brotli.compress(data, quality=11)
+    except ImportError:
+        pass
+    written = []
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            path.with_name(path.name + suffix).write_bytes(compressed)
+            written.append(suffix)
+    return written
+
+def build(static_dir: Path) -> dict:
+    """Rebuild static_dir/dist from index.html and the scripts it loads; returns the manifest."""
+    dist = static_dir / DIST_DIR
+    shutil.rmtree(dist, ignore_errors=True)
+    dist.mkdir()
+
+    html = (static_dir / "index.html").read_text()
+    scripts = _LOCAL_SCRIPT.findall(html)
+    # Classic scripts share one global scope, so concatenating them in page order is equivalent
+    bundle = ';\n'.join(minify_js((static_dir / script).read_text()) for script in scripts).encode()
+    bundle_name = _hashed_name("app.js", bundle)
+    (dist / bundle_name).write_bytes(bundle)
+
+    favicon = (static_dir / "images" / "favicon.ico").read_bytes()
+    favicon_name = _hashed_name("favicon.ico", favicon)
+    (dist / favicon_name).write_bytes(favicon)
+
+    bundle_tag = f'    <script src="/static/{DIST_DIR}/{bundle_name}"></script>\n'
+    html = _LOCAL_SCRIPT.sub(lambda match: bundle_tag if match.group(1) == scripts[0] else '', html)
+    html = html.replace('</head>', f'    <link rel="icon" href="/static/{DIST_DIR}/{favicon_name}">\n</head>', 1)
+    (dist / "index.html").write_text(html)
+
+    manifest = {"js/bundle.js": bundle_name, "images/favicon.ico": favicon_name, "scripts": scripts}
+    (dist / "manifest.json").write_text(json.dumps(manifest, indent=2))
+
+    for path in sorted(dist.iterdir()):
+        if path.suffix in COMPRESSIBLE_SUFFIXES:
+            variants = _compress(path)
+            sizes = ', '.join(f"{suffix} {path.with_name(path.name + suffix).stat().st_size}" for suffix in variants)
+            logger.info(f"{path.name}: {path.stat().st_size} bytes{' (' + sizes + ')' if sizes else ''}")
+    source_bytes = sum((static_dir / script).stat().st_size for script in scripts)
+    logger.info(f"Bundled {len(scripts)} scripts ({source_bytes} bytes) into {bundle_name} ({len(bundle)} bytes)")
+    return manifest
+
+def index_path(static_dir: str) -> str:
+    """URL of the page: the built one when there is a build, else the source."""
+    if (Path(static_dir) / DIST_DIR / "index.html").is_file():
+        return f"/static/{DIST_DIR}/index.html"
+    return "/static/index.html"
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        if name and not re.fullmatch(r'\s*q=0(\.0*)?\s*', params):
+            accepted.add(name.strip().lower())
+    return accepted
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves prebuilt .br/.gz variants and sets Cache-Control."""
+
+    async def get_response(self, path: str, scope) -> Response:
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            hashed = _HASHED_NAME.search(path) is not None
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL if hashed else REVALIDATE_CACHE_CONTROL
+        return response
+
+    async def _precompressed_response(self, path: str, scope):
+        if scope["method"] not in ("GET", "HEAD") or not path.endswith(COMPRESSIBLE_SUFFIXES):
+            return None
+        request_headers = Headers(scope=scope)
+        accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+        has_variants = False
+        for encoding, suffix in ENCODINGS:
+            try:
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+            except (OSError, ValueError):
+                return None
+            if not (stat_result and stat.S_ISREG(stat_result.st_mode)):
+                continue
+            has_variants = True
+            if encoding in accepted:
+                response = FileResponse(
+                    full_path,
+                    stat_result=stat_result,
+                    media_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+                    headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"}
+                )
+                if self.is_not_modified(response.headers, request_headers):
+                    return NotModifiedResponse(response.headers)
+                return response
+        if has_variants:
+            # Identity body, but caches must still key it on Accept-Encoding
+            response = await super().get_response(path, scope)
+            response.headers["Vary"] = "Accept-Encoding"
+            return response
+        return None
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Bundle, hash and precompress the static assets into static/dist")
+    parser.add_argument("--static-dir", type=Path, default=Path(__file__).resolve().parents[2] / "static")
+    args = parser.parse_args()
+    build(args.static_dir)
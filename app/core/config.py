@@ -1,12 +1,25 @@
 #from ast import List
 import yaml
 from pydantic import BaseModel
+from pathlib import Path
 from typing import Dict, List, Any
+import os
+
+# The repo's config.yaml, wherever the process was started from; HEALTHCHECK_CONFIG points elsewhere
+CONFIG_PATH = os.getenv("HEALTHCHECK_CONFIG") or str(Path(__file__).resolve().parents[2] / "config.yaml")
 
 class Settings(BaseModel):
     models: Dict[str, Any]
     nutrition: List[str]
     database: Dict[str, Any]
+    cache: Dict[str, Any] = {}
+    image_search: Dict[str, Any] = {}
+    logging: Dict[str, Any] = {}
+    nutrition_index: Dict[str, Any] = {}
+    rda: Dict[str, Any] = {}
+    llm_routing: Dict[str, Any] = {}
+    users: Dict[str, Any] = {}
+    streaks: Dict[str, Any] = {}
 
     @classmethod
     def from_yaml(cls, yaml_file: str):
@@ -14,4 +27,4 @@ class Settings(BaseModel):
             config_data = yaml.safe_load(f)
         return cls(**config_data)
 
-settings = Settings.from_yaml("config.yaml")
\ No newline at end of file
+settings = Settings.from_yaml(CONFIG_PATH)
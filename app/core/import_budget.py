@@ -0,0 +1,72 @@
+"""Startup regression check: importing app.main must stay fast and side-effect free.
+
+Imports the app in fresh interpreters with -X importtime, from an empty
+directory, and fails if the best run is over budget, if a lazily imported
+provider SDK got pulled in, or if the import wrote any files:
+
+    python -m app.core.import_budget [--budget-ms 1000] [--runs 3]
+"""
+from pathlib import Path
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+IMPORT_BUDGET_MS = 1000
+# Only imported on first use; see llm_service and image_service
+LAZY_MODULES = ('openai', 'boto3', 'botocore', 'bs4')
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+def profile_import(module: str = "app.main") -> tuple:
+    """Import `module` in a fresh interpreter; return (cumulative ms, imported module names, files created)."""
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=scratch, env=env, capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"importing {module} failed:\n{result.stderr[-2000:]}")
+        created = sorted(str(path.relative_to(scratch)) for path in Path(scratch).rglob("*"))
+
+    total_us, modules = None, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        modules.add(name)
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1000, modules, created
+
+def check(budget_ms: float = IMPORT_BUDGET_MS, runs: int = 3) -> tuple:
+    """Return (fastest import in ms, a description of each startup regression); no regressions is an empty list."""
+    profiles = [profile_import() for _ in range(runs)]
+    best_ms = min(ms for ms, _, _ in profiles)
+    _, modules, created = profiles[0]
+
+    failures = []
+    if best_ms > budget_ms:
+        failures.append(f"import took {best_ms:.0f} ms, over the {budget_ms:.0f} ms budget")
+    eager = [name for name in LAZY_MODULES if name in modules]
+    if eager:
+        failures.append(f"imported eagerly: {', '.join(eager)}")
+    if created:
+        failures.append(f"import created files: {', '.join(created)}")
+    return best_ms, failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fail if importing the app gets slow or grows side effects")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="fresh interpreters to import in; the fastest counts")
+    args = parser.parse_args()
+
+    best_ms, failures = check(args.budget_ms, args.runs)
+    print(f"import app.main: best of {args.runs} runs {best_ms:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    for failure in failures:
+        print(f"startup regression - {failure}")
+    sys.exit(1 if failures else 0)
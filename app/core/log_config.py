@@ -0,0 +1,32 @@
+import json
+import logging
+import os
+from app.core.config import settings
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+def setup_logging():
+    """Configure the root logger from config.yaml, with LOG_LEVEL / LOG_FORMAT overrides."""
+    level = os.getenv("LOG_LEVEL", settings.logging.get('level', 'INFO')).upper()
+    log_format = os.getenv("LOG_FORMAT", settings.logging.get('format', 'text')).lower()
+
+    handler = logging.StreamHandler()
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
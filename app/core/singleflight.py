@@ -0,0 +1,33 @@
+"""Request coalescing: concurrent callers asking for the same key share one in-flight task."""
+from app.core.metrics import Counter
+import asyncio
+
+shared_calls = Counter(
+    "healthcheck_singleflight_shared_total",
+    "Callers that joined a call already in flight instead of starting their own",
+    ("name",)
+)
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks = {}  # key -> asyncio.Task
+
+    def _forget(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def do(self, key, func, *args):
+        """Await func(*args), or the identical call another caller already started.
+
+        Every caller gets the same result or exception. A caller being cancelled
+        does not cancel the shared call for the others.
+        """
+        task = self._tasks.get(key)
+        if task is not None and task.get_loop() is asyncio.get_running_loop():
+            shared_calls.inc(self.name)
+        else:
+            task = asyncio.create_task(func(*args))
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
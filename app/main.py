@@ -1,30 +1,63 @@
 import os
-import yaml
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse, FileResponse
-from app.api.routes import calorie_count, profile_rda
-import openai
-
-# Load configuration
-with open("config.yaml", "r") as f:
-    config = yaml.safe_load(f)
-
-# Initialize OpenAI
-openai.api_key = os.getenv("OPENAI_API_KEY", config["openai"]["api_key"])
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import RedirectResponse, FileResponse, PlainTextResponse
+from app.core import assets, metrics
+from app.core.log_config import setup_logging
+from app.api.routes import calorie_count, profile_rda, admin, transfer
+from app.services import db_utils, image_service, migrations
 
 # Get the absolute path to the static directory
 current_dir = os.path.dirname(os.path.abspath(__file__))
 static_dir = os.path.join(os.path.dirname(current_dir), 'static')
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Importing this module has no side effects; everything that touches the
+    # outside world happens here, once per worker
+    setup_logging()
+    migrations.migrate()
+    await db_utils.start_writer()
+    yield
+    # Commit queued writes before the engines go away
+    await db_utils.stop_writer()
+    await image_service.close_http_client()
+    await db_utils.dispose_engines()
+
+app = FastAPI(lifespan=lifespan)
 
-app.mount("/static", StaticFiles(directory=static_dir), name='static')
+# Serves the precompressed, content-hashed build from `python -m app.core.assets` under /static/dist
+app.mount("/static", assets.PrecompressedStaticFiles(directory=static_dir), name='static')
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template, not raw path, so /api/calorie_count/{query} stays one series
+        route = request.scope.get("route")
+        metrics.http_request_duration.observe(
+            time.perf_counter() - start,
+            request.method,
+            route.path if route else "unmatched",
+            str(status)
+        )
 
 @app.get("/")
 async def root():
-    return RedirectResponse(url="/static/index.html")
+    return RedirectResponse(url=assets.index_path(static_dir))
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(metrics.render_metrics(), media_type="text/plain; version=0.0.4")
 
 # Include the router with the /api prefix
 app.include_router(calorie_count.router, prefix="/api")
 app.include_router(profile_rda.router, prefix="/api", tags=["profile"])
+app.include_router(admin.router, prefix="/api", tags=["admin"])
+app.include_router(transfer.router, prefix="/api", tags=["transfer"])
@@ -1 +1,7 @@
 from .transaction import Transaction, Base
+from .meal_cache import MealAnalysisCache
+from .meal_image import MealImage
+from .daily_total import DailyTotal, NUTRIENT_FIELDS
+from .user_data_version import UserDataVersion
+from .user_settings import UserSettings
+from .user_streak import UserStreak
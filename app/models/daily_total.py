@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Float
+from .transaction import Base
+
+# Nutrient columns summed into the per-day rollup
+NUTRIENT_FIELDS = ['calories', 'total_fat', 'carbohydrates', 'protein', 'fiber', 'sugars', 'sodium']
+
+class DailyTotal(Base):
+    __tablename__ = 'daily_totals'
+
+    user_id = Column(String, primary_key=True)
+    day = Column(String, primary_key=True)  # local calendar date, YYYY-MM-DD
+    meal_count = Column(Integer, nullable=False, default=0)
+    calories = Column(Float, nullable=False, default=0)
+    total_fat = Column(Float, nullable=False, default=0)
+    carbohydrates = Column(Float, nullable=False, default=0)
+    protein = Column(Float, nullable=False, default=0)
+    fiber = Column(Float, nullable=False, default=0)
+    sugars = Column(Float, nullable=False, default=0)
+    sodium = Column(Float, nullable=False, default=0)
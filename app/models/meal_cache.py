@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, String, Text
+from .transaction import Base
+
+class MealAnalysisCache(Base):
+    __tablename__ = 'meal_analysis_cache'
+
+    model = Column(String, primary_key=True)
+    query = Column(String, primary_key=True)  # normalized query text
+    response = Column(Text, nullable=False)  # JSON encoded meal analysis
+    created_at = Column(Integer, nullable=False)  # Unix timestamp
+    accessed_at = Column(Integer, nullable=False, index=True)  # Unix timestamp, used for LRU eviction
+    hits = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,9 @@
+from sqlalchemy import Column, Integer, String
+from .transaction import Base
+
+class MealImage(Base):
+    __tablename__ = 'meal_images'
+
+    name = Column(String, primary_key=True)  # normalized meal name
+    image_url = Column(String)  # NULL when the search found nothing
+    created_at = Column(Integer, nullable=False)  # Unix timestamp
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Index, Integer, String, Float
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -9,6 +9,7 @@ class Transaction(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(String, nullable=False)
     timestamp = Column(Integer, nullable=False)  # Unix timestamp
+    local_date = Column(String)  # YYYY-MM-DD in the user's time zone when the meal was logged
     name = Column(String, nullable=False)
     calories = Column(Float)
     total_fat = Column(Float)
@@ -18,3 +19,11 @@ class Transaction(Base):
     sugars = Column(Float)
     serving_size = Column(String)
     sodium = Column(Float)
+
+    __table_args__ = (
+        # Every per-user day/range query filters on user_id and ranges over timestamp
+        Index('ix_transactions_user_id_timestamp', 'user_id', 'timestamp'),
+        # Day, range and dashboard reads are equality/range lookups on the stored local date
+        Index('ix_transactions_user_id_local_date', 'user_id', 'local_date'),
+    )
+
@@ -0,0 +1,8 @@
+from sqlalchemy import Column, Integer, String
+from .transaction import Base
+
+class UserDataVersion(Base):
+    __tablename__ = 'user_data_versions'
+
+    user_id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # bumped by every write to the user's meals
@@ -0,0 +1,8 @@
+from sqlalchemy import Column, String
+from .transaction import Base
+
+class UserSettings(Base):
+    __tablename__ = 'user_settings'
+
+    user_id = Column(String, primary_key=True)
+    time_zone = Column(String, nullable=False)  # IANA name, e.g. America/Chicago
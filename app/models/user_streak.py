@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Float, Integer, String
+from .transaction import Base
+
+class UserStreak(Base):
+    __tablename__ = 'user_streaks'
+
+    user_id = Column(String, primary_key=True)
+    kind = Column(String, primary_key=True)  # "logging", or a nutrient with a streaks threshold
+    threshold = Column(Float)  # the limit the counters were computed against; None for logging
+    current = Column(Integer, nullable=False, default=0)  # consecutive qualifying days ending on last_met
+    longest = Column(Integer, nullable=False, default=0)
+    prior_longest = Column(Integer, nullable=False, default=0)  # longest run before the current one
+    # The run before the current one, which becomes current again if today's run is trimmed away
+    previous_current = Column(Integer, nullable=False, default=0)
+    previous_met = Column(String)
+    last_met = Column(String)  # last qualifying local day, YYYY-MM-DD
+    last_day = Column(String)  # latest local day counted; a write to an earlier day means a recompute
@@ -1,246 +1,593 @@
 from app.core.config import settings
-from sqlalchemy import create_engine, func
+from app.core.metrics import timed
+from sqlalchemy import bindparam, create_engine, delete, event, func, select, tuple_
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.models import Transaction, Base
-from datetime import datetime, timezone, date, time, timedelta
-from pathlib import Path
+from app.models import Transaction, DailyTotal, UserDataVersion, UserSettings, UserStreak, NUTRIENT_FIELDS
+from app.services import streak_service, write_queue
+from datetime import datetime, timezone, date, timedelta
+from time import monotonic
+from typing import Optional
+import argparse
 import json
+import logging
 import zoneinfo
 
-# Use Central Time zone
-CT_TIMEZONE = zoneinfo.ZoneInfo("America/Chicago")
+logger = logging.getLogger(__name__)
+
+# Time zone of users who haven't set one, and of every meal logged before time zones were per user
+DEFAULT_TIME_ZONE = zoneinfo.ZoneInfo(settings.users.get('default_time_zone', 'America/Chicago'))
+# How long a worker trusts its copy of a user's time zone; writes always read it fresh
+TIME_ZONE_CACHE_SECONDS = settings.users.get('time_zone_cache_seconds', 60)
+TIME_ZONE_CACHE_SIZE = 10000
 
 DATABASE = f"db/{settings.database['name']}.sqlite3"
+# Read totals from the daily_totals rollup; set false to aggregate raw transactions instead
+USE_DAILY_ROLLUP = settings.database.get('use_daily_rollup', True)
+# Connections kept open for request handlers, and how many more may be opened under burst load
+POOL_SIZE = settings.database.get('pool_size', 10)
+MAX_OVERFLOW = settings.database.get('max_overflow', 10)
+# Applied to every new connection; WAL lets readers proceed while a write is in progress
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'foreign_keys': 'ON',
+    'busy_timeout': 5000,
+    'cache_size': -20000,  # negative means KiB, so ~20 MB
+    'temp_store': 'MEMORY',
+    'mmap_size': 268435456,
+    **settings.database.get('pragmas', {}),
+}
+# The writer acknowledges a write only after its commit; FULL makes that commit durable.
+# Group commit means the extra fsync is paid once per batch, not once per write.
+WRITER_SYNCHRONOUS = settings.database.get('writer_synchronous', 'FULL')
+
+# Request handlers use the async engine; the sync engine is for migrations and maintenance commands
+async_engine = create_async_engine(
+    f'sqlite+aiosqlite:///{DATABASE}',
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW
+)
+AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+
+# One connection for the group-commit writer (see app.services.write_queue)
+writer_engine = create_async_engine(f'sqlite+aiosqlite:///{DATABASE}', pool_size=1, max_overflow=0)
+WriterSession = async_sessionmaker(writer_engine, expire_on_commit=False)
+
 engine = create_engine(f'sqlite:///{DATABASE}')
 Session = sessionmaker(bind=engine)
 
-def create_tables():
-    """Create database tables."""
-    Path("db").mkdir(exist_ok=True)
-    Base.metadata.create_all(engine)
+# Columns returned for a meal in list and history responses
+MEAL_COLUMNS = [
+    Transaction.id,
+    Transaction.name,
+    Transaction.timestamp,
+    Transaction.calories,
+    Transaction.total_fat,
+    Transaction.carbohydrates,
+    Transaction.protein,
+    Transaction.fiber,
+    Transaction.sugars,
+    Transaction.serving_size,
+    Transaction.sodium,
+    Transaction.local_date,
+]
+
+def local_date(timestamp: int, tz: zoneinfo.ZoneInfo = DEFAULT_TIME_ZONE) -> str:
+    """Calendar date (YYYY-MM-DD) of a UTC timestamp in tz."""
+    return datetime.fromtimestamp(timestamp, tz).date().isoformat()
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+@event.listens_for(writer_engine.sync_engine, "connect")
+def register_sql_functions(dbapi_connection, connection_record):
+    # Default-time-zone local day in SQL, for backfilling rows written before local_date was stored
+    dbapi_connection.create_function("local_date", 1, local_date, deterministic=True)
+
+@event.listens_for(engine, "connect")
+@event.listens_for(async_engine.sync_engine, "connect")
+@event.listens_for(writer_engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+@event.listens_for(writer_engine.sync_engine, "connect")
+def set_writer_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA synchronous = {WRITER_SYNCHRONOUS}")
+    cursor.close()
 
 def get_session():
+    """Synchronous session, for migrations and maintenance commands."""
     return Session()
 
-async def add_transaction(user_uuid: str, food_data: dict):
-    """Add a transaction to the database."""
-    session = get_session()
+def get_async_session():
+    """Session for request handlers; use as `async with get_async_session() as session`."""
+    return AsyncSession()
+
+async def start_writer():
+    """Route writes through the group-commit writer on the running event loop."""
+    await write_queue.start(WriterSession)
+
+async def stop_writer():
+    await write_queue.stop()
+
+def _log_write_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Background write failed: %s", future.exception())
+
+async def write(op, *args, wait: bool = True):
+    """Apply `op(session, *args)` through the group-commit writer, or in its own
+    transaction when no writer is running (scripts and maintenance commands).
+
+    With wait=False the write is only queued, for best-effort bookkeeping that
+    the caller does not need to see committed.
+    """
+    if write_queue.running():
+        if not wait:
+            write_queue.enqueue(op, *args).add_done_callback(_log_write_failure)
+            return None
+        return await write_queue.submit(op, *args)
+    async with WriterSession() as session:
+        try:
+            result = await op(session, *args)
+            await session.commit()
+            return result
+        except Exception:
+            await session.rollback()
+            raise
+
+async def dispose_engines():
+    await async_engine.dispose()
+    await writer_engine.dispose()
+    engine.dispose()
+
+_time_zones = {}  # user_id -> (ZoneInfo, monotonic expiry)
+
+def _zone(name: Optional[str]) -> zoneinfo.ZoneInfo:
+    return zoneinfo.ZoneInfo(name) if name else DEFAULT_TIME_ZONE
+
+async def _read_time_zone(session, user_uuid: str) -> zoneinfo.ZoneInfo:
+    return _zone(await session.scalar(select(UserSettings.time_zone).where(UserSettings.user_id == user_uuid)))
+
+async def get_time_zone(user_uuid: str) -> zoneinfo.ZoneInfo:
+    """A user's time zone, or DEFAULT_TIME_ZONE if they haven't set one."""
+    cached = _time_zones.get(user_uuid)
+    if cached and cached[1] > monotonic():
+        return cached[0]
+    async with get_async_session() as session:
+        tz = await _read_time_zone(session, user_uuid)
+    if len(_time_zones) >= TIME_ZONE_CACHE_SIZE:
+        _time_zones.clear()
+    _time_zones[user_uuid] = (tz, monotonic() + TIME_ZONE_CACHE_SECONDS)
+    return tz
+
+async def user_today(user_uuid: str) -> date:
+    """The current date where the user is."""
+    return datetime.now(await get_time_zone(user_uuid)).date()
+
+async def _upsert_time_zone(session, user_uuid: str, name: str):
+    await session.execute(insert(UserSettings).values(user_id=user_uuid, time_zone=name).on_conflict_do_update(
+        index_elements=[UserSettings.user_id],
+        set_={'time_zone': name}
+    ))
+
+async def set_time_zone(user_uuid: str, name: str) -> str:
+    """Set a user's IANA time zone (e.g. "Europe/Berlin"); raises ValueError if it isn't one.
+
+    Only meals logged afterwards use it: a meal's local_date is fixed when it is written.
+    """
     try:
-        # Store timestamp as UTC but get current time from CT
-        ct_now = datetime.now(CT_TIMEZONE)
-        utc_timestamp = int(ct_now.astimezone(timezone.utc).timestamp())
-        print(f"Adding transaction at CT time: {ct_now}, UTC timestamp: {utc_timestamp}")
-        
-        transaction = Transaction(
-            user_id=user_uuid,
-            timestamp=utc_timestamp,
-            name=food_data['name'],
-            calories=food_data['calories'],
-            total_fat=food_data['total_fat'],  # Use normalized field name
-            carbohydrates=food_data['carbohydrates'],
-            protein=food_data['protein'],
-            fiber=food_data['fiber'],
-            sugars=food_data['sugars'],
-            serving_size=food_data['serving_size'],  # Use normalized field name
-            sodium=food_data['sodium']
+        tz = zoneinfo.ZoneInfo(name)
+    except (zoneinfo.ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown time zone: {name}")
+    await write(_upsert_time_zone, user_uuid, name)
+    _time_zones[user_uuid] = (tz, monotonic() + TIME_ZONE_CACHE_SECONDS)
+    return name
+
+# Built once with bind parameters: the writer runs it for every logged meal, and
+# constructing the upsert per call cost more than executing it
+_DAILY_TOTAL_UPSERT = insert(DailyTotal).values(
+    user_id=bindparam('user_id'),
+    day=bindparam('day'),
+    meal_count=bindparam('meal_count'),
+    **{field: bindparam(field) for field in NUTRIENT_FIELDS}
+).on_conflict_do_update(
+    index_elements=[DailyTotal.user_id, DailyTotal.day],
+    set_={
+        'meal_count': DailyTotal.meal_count + bindparam('meal_count'),
+        **{field: getattr(DailyTotal, field) + bindparam(field) for field in NUTRIENT_FIELDS}
+    }
+)
+
+# Hands the updated row back, so the streak update after it needn't read it again
+_DAILY_TOTAL_UPSERT_RETURNING = _DAILY_TOTAL_UPSERT.returning(*DailyTotal.__table__.columns)
+
+async def _apply_to_daily_total(session, user_id: str, day: str, values: dict, sign: int, meals: int = 1):
+    """Add (sign=1) or subtract (sign=-1) meals' summed nutrients from their day's rollup row.
+
+    Returns the updated row when adding.
+    """
+    deltas = {field: sign * (values.get(field) or 0) for field in NUTRIENT_FIELDS}
+    params = {'user_id': user_id, 'day': day, 'meal_count': sign * meals, **deltas}
+    if sign > 0:
+        return (await session.execute(_DAILY_TOTAL_UPSERT_RETURNING, params)).one()
+    await session.execute(_DAILY_TOTAL_UPSERT, params)
+    if sign < 0:
+        await session.execute(delete(DailyTotal).where(
+            DailyTotal.user_id == user_id,
+            DailyTotal.day == day,
+            DailyTotal.meal_count <= 0
+        ))
+
+# Every write to a user's meals bumps their version in the same transaction; cached responses are keyed on it
+_DATA_VERSION_BUMP = insert(UserDataVersion).values(
+    user_id=bindparam('user_id'),
+    version=1
+).on_conflict_do_update(
+    index_elements=[UserDataVersion.user_id],
+    set_={'version': UserDataVersion.version + 1}
+)
+
+async def _bump_data_version(session, user_uuid: str):
+    await session.execute(_DATA_VERSION_BUMP, {'user_id': user_uuid})
+
+async def get_data_version(user_uuid: str) -> int:
+    """Version of a user's meal data; it changes whenever a meal is added or deleted."""
+    async with get_async_session() as session:
+        version = await session.scalar(
+            select(UserDataVersion.version).where(UserDataVersion.user_id == user_uuid)
         )
-        
-        session.add(transaction)
+    return version or 0
+
+async def _aggregate_transactions(session, user_uuid: str, start_date: date, end_date: date) -> dict:
+    """Single GROUP BY over raw transactions, keyed by local day."""
+    result = await session.execute(select(
+        Transaction.local_date.label('day'),
+        func.count().label('meal_count'),
+        *[func.sum(getattr(Transaction, field)).label(field) for field in NUTRIENT_FIELDS]
+    ).where(
+        Transaction.user_id == user_uuid,
+        Transaction.local_date.between(start_date.isoformat(), end_date.isoformat())
+    ).group_by(Transaction.local_date))
+    return {row.day: row for row in result}
+
+async def _read_daily_totals(session, user_uuid: str, start_date: date, end_date: date) -> dict:
+    """Per-day totals for a date range, keyed by YYYY-MM-DD."""
+    if not USE_DAILY_ROLLUP:
+        return await _aggregate_transactions(session, user_uuid, start_date, end_date)
+    result = await session.execute(select(DailyTotal).where(
+        DailyTotal.user_id == user_uuid,
+        DailyTotal.day.between(start_date.isoformat(), end_date.isoformat())
+    ))
+    return {row.day: row for row in result.scalars()}
+
+def _totals_dict(row) -> dict:
+    return {field: (getattr(row, field) or 0) if row else 0 for field in NUTRIENT_FIELDS}
+
+def rebuild_daily_totals(user_uuid: str = None, session=None, day=Transaction.local_date) -> int:
+    """Recompute the daily_totals rollup from raw transactions. Returns the number of day rows written."""
+    owns_session = session is None
+    session = session or get_session()
+    try:
+        query = session.query(
+            Transaction.user_id,
+            day.label('day'),
+            func.count(Transaction.id).label('meal_count'),
+            *[func.coalesce(func.sum(getattr(Transaction, field)), 0).label(field) for field in NUTRIENT_FIELDS]
+        )
+        deleted = session.query(DailyTotal)
+        if user_uuid is not None:
+            query = query.filter(Transaction.user_id == user_uuid)
+            deleted = deleted.filter(DailyTotal.user_id == user_uuid)
+        rows = query.group_by(Transaction.user_id, day).all()
+
+        deleted.delete(synchronize_session=False)
+        if rows:
+            session.execute(insert(DailyTotal), [row._asdict() for row in rows])
         session.commit()
-        print(f"Successfully added transaction for {food_data['name']}")
+        logger.info("Rebuilt %d daily total rows", len(rows))
+        return len(rows)
     except Exception as e:
-        print(f"Error adding transaction: {e}")
+        logger.error("Error rebuilding daily totals: %s", e)
         session.rollback()
         raise
     finally:
-        session.close()
+        if owns_session:
+            session.close()
 
-def get_daily_totals(user_uuid: str, target_date: date = None):
-    session = get_session()
+def rebuild_streaks(user_uuid: str = None, session=None) -> int:
+    """Recompute streak counters from the daily_totals rollup. Returns the number of users written."""
+    owns_session = session is None
+    session = session or get_session()
     try:
-        if target_date is None:
-            # Get current date in Central Time
-            target_date = datetime.now(CT_TIMEZONE).date()
-        
-        # Convert date to datetime range for the full day in Central Time
-        start_ct = datetime.combine(target_date, time.min).replace(tzinfo=CT_TIMEZONE)
-        end_ct = datetime.combine(target_date, time.max).replace(tzinfo=CT_TIMEZONE)
-        
-        # Convert to UTC timestamps for database query
-        start_utc = int(start_ct.astimezone(timezone.utc).timestamp())
-        end_utc = int(end_ct.astimezone(timezone.utc).timestamp())
-        
-        print(f"Fetching totals for user {user_uuid}")
-        print(f"CT Date range: {start_ct} to {end_ct}")
-        print(f"UTC timestamps: {start_utc} to {end_utc}")
-        
-        # First, check if we have any transactions for this user
-        total_count = session.query(func.count(Transaction.id)).filter(
-            Transaction.user_id == user_uuid
-        ).scalar()
-        print(f"Total transactions for user: {total_count}")
-        
-        # Query for daily totals
-        totals = session.query(
-            func.sum(Transaction.calories).label('calories'),
-            func.sum(Transaction.total_fat).label('total_fat'),
-            func.sum(Transaction.carbohydrates).label('carbohydrates'),
-            func.sum(Transaction.fiber).label('fiber'),
-            func.sum(Transaction.sugars).label('sugars'),
-            func.sum(Transaction.protein).label('protein'),
-            func.sum(Transaction.sodium).label('sodium')
-        ).filter(
-            Transaction.user_id == user_uuid,
-            Transaction.timestamp.between(start_utc, end_utc)
-        ).first()
-        
-        print(f"Query results: {totals}")
-        
-        # Convert SQLAlchemy Row to dict
-        result = {
-            'calories': totals.calories or 0 if totals else 0,
-            'total_fat': totals.total_fat or 0 if totals else 0,
-            'carbohydrates': totals.carbohydrates or 0 if totals else 0,
-            'protein': totals.protein or 0 if totals else 0,
-            'fiber': totals.fiber or 0 if totals else 0,
-            'sugars': totals.sugars or 0 if totals else 0,
-            'sodium': totals.sodium or 0 if totals else 0
-        }
-        
-        print(f"Returning daily totals: {result}")
-        return result
+        users = streak_service.rebuild(session, user_uuid)
+        session.commit()
+        logger.info("Rebuilt streaks for %d users", users)
+        return users
     except Exception as e:
-        print(f"Error getting daily totals: {e}")
+        logger.error("Error rebuilding streaks: %s", e)
+        session.rollback()
         raise
     finally:
-        session.close()
+        if owns_session:
+            session.close()
+
+async def add_transaction(user_uuid: str, food_data: dict):
+    """Add a transaction to the database."""
+    await add_transactions(user_uuid, [food_data])
+
+async def _insert_transactions(session, user_uuid: str, foods: list, utc_now: datetime):
+    # Read in the write itself, so a time zone just set by another worker is never missed
+    day = utc_now.astimezone(await _read_time_zone(session, user_uuid)).date().isoformat()
+    utc_timestamp = int(utc_now.timestamp())
+    rows = [{
+        'user_id': user_uuid,
+        'timestamp': utc_timestamp,
+        'local_date': day,
+        'name': food_data['name'],
+        'calories': food_data['calories'],
+        'total_fat': food_data['total_fat'],  # Use normalized field name
+        'carbohydrates': food_data['carbohydrates'],
+        'protein': food_data['protein'],
+        'fiber': food_data['fiber'],
+        'sugars': food_data['sugars'],
+        'serving_size': food_data['serving_size'],  # Use normalized field name
+        'sodium': food_data['sodium']
+    } for food_data in foods]
+    # Core insert: the ORM bulk path adds per-call overhead the writer doesn't need
+    await session.execute(Transaction.__table__.insert(), rows)
+
+    day_totals = {field: sum(food_data.get(field) or 0 for food_data in foods) for field in NUTRIENT_FIELDS}
+    totals = await _apply_to_daily_total(session, user_uuid, day, day_totals, 1, meals=len(foods))
+    if streak_service.affected(totals, day_totals, len(foods)):
+        await streak_service.update(session, user_uuid, [day], {day: totals})
+    await _bump_data_version(session, user_uuid)
 
-def get_historical_totals(user_uuid: str, days: int = 14):
-    """Get daily totals for the last N days."""
-    session = get_session()
+@timed("db.add_transactions")
+async def add_transactions(user_uuid: str, foods: list):
+    """Add several transactions for a user in one bulk insert, committed with the writer's next batch."""
+    utc_now = datetime.now(timezone.utc)
+    logger.debug("Adding %d transaction(s) at %s", len(foods), utc_now)
     try:
-        # Get current date in Central Time
-        end_date = datetime.now(CT_TIMEZONE).date()
+        await write(_insert_transactions, user_uuid, foods, utc_now)
+        logger.debug("Added %d transaction(s) for user %s", len(foods), user_uuid)
+    except Exception as e:
+        logger.error("Error adding transaction: %s", e)
+        raise
+
+# Transaction columns carried by exports and imports; id and user_id belong to the database the rows live in
+TRANSFER_COLUMNS = [column for column in Transaction.__table__.columns if column.name not in ('id', 'user_id')]
+
+async def iter_transactions(user_uuid: str, chunk_size: int = 1000):
+    """Yield a user's transactions oldest first, as lists of at most chunk_size row tuples of TRANSFER_COLUMNS.
+
+    Keyset pagination on (timestamp, id) with a fresh short read per chunk, so memory
+    stays constant and no read transaction is held open while the caller is busy.
+    """
+    after = None
+    while True:
+        query = select(Transaction.id, *TRANSFER_COLUMNS).where(Transaction.user_id == user_uuid)
+        if after:
+            query = query.where(tuple_(Transaction.timestamp, Transaction.id) > after)
+        query = query.order_by(Transaction.timestamp, Transaction.id).limit(chunk_size)
+        async with get_async_session() as session:
+            rows = (await session.execute(query)).all()
+        if not rows:
+            return
+        yield [tuple(row)[1:] for row in rows]
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1].timestamp, rows[-1].id)
+
+async def _import_transactions(session, user_uuid: str, rows: list):
+    # Rows without a local_date (e.g. older exports) get one in the user's current time zone
+    tz = await _read_time_zone(session, user_uuid)
+    rows = [{'user_id': user_uuid, **row, 'local_date': row.get('local_date') or local_date(row['timestamp'], tz)}
+            for row in rows]
+    # executemany of plain dicts; the rollup gets one upsert per day touched, not per row
+    await session.execute(Transaction.__table__.insert(), rows)
+    days = {}
+    for row in rows:
+        totals = days.setdefault(row['local_date'], {'meal_count': 0, **dict.fromkeys(NUTRIENT_FIELDS, 0)})
+        totals['meal_count'] += 1
+        for field in NUTRIENT_FIELDS:
+            totals[field] += row.get(field) or 0
+    await session.execute(_DAILY_TOTAL_UPSERT, [
+        {'user_id': user_uuid, 'day': day, **totals} for day, totals in days.items()
+    ])
+    await streak_service.update(session, user_uuid, days)
+    await _bump_data_version(session, user_uuid)
+
+@timed("db.import_transactions")
+async def import_transactions(user_uuid: str, rows: list) -> int:
+    """Insert already validated transaction rows (dicts keyed by TRANSFER_COLUMNS names) in one write."""
+    if rows:
+        await write(_import_transactions, user_uuid, rows)
+    return len(rows)
+
+@timed("db.get_daily_totals")
+async def get_daily_totals(user_uuid: str, target_date: date = None):
+    async with get_async_session() as session:
+        try:
+            if target_date is None:
+                target_date = await user_today(user_uuid)
+
+            logger.debug("Fetching totals for user %s on %s", user_uuid, target_date)
+
+            totals_by_day = await _read_daily_totals(session, user_uuid, target_date, target_date)
+            result = _totals_dict(totals_by_day.get(target_date.isoformat()))
+
+            return result
+        except Exception as e:
+            logger.error("Error getting daily totals: %s", e)
+            raise
+
+@timed("db.get_historical_totals")
+async def get_historical_totals(user_uuid: str, days: int = 14, end_date: date = None):
+    """Get daily totals for the N days ending on end_date (default the user's today)."""
+    end_date = end_date or await user_today(user_uuid)
+    async with get_async_session() as session:
         start_date = end_date - timedelta(days=days-1)  # -1 because we want to include today
-        
+
+        totals_by_day = await _read_daily_totals(session, user_uuid, start_date, end_date)
+
         daily_totals = []
-        
         for single_date in (start_date + timedelta(n) for n in range(days)):
-            # Get start and end of the day in Central Time
-            start_ct = datetime.combine(single_date, time.min).replace(tzinfo=CT_TIMEZONE)
-            end_ct = datetime.combine(single_date, time.max).replace(tzinfo=CT_TIMEZONE)
-            
-            # Convert to UTC timestamps for database query
-            start_utc = int(start_ct.astimezone(timezone.utc).timestamp())
-            end_utc = int(end_ct.astimezone(timezone.utc).timestamp())
-            
-            # Query for daily totals
-            totals = session.query(
-                func.sum(Transaction.calories).label('calories'),
-                func.sum(Transaction.total_fat).label('total_fat'),
-                func.sum(Transaction.carbohydrates).label('carbohydrates'),
-                func.sum(Transaction.fiber).label('fiber'),
-                func.sum(Transaction.sugars).label('sugars'),
-                func.sum(Transaction.protein).label('protein'),
-                func.sum(Transaction.sodium).label('sodium')
-            ).filter(
-                Transaction.user_id == user_uuid,
-                Transaction.timestamp.between(start_utc, end_utc)
-            ).first()
-            
-            # Convert SQLAlchemy Row to dict
-            day_total = {
-                'date': single_date.isoformat(),
-                'calories': totals.calories or 0 if totals else 0,
-                'total_fat': totals.total_fat or 0 if totals else 0,
-                'carbohydrates': totals.carbohydrates or 0 if totals else 0,
-                'protein': totals.protein or 0 if totals else 0,
-                'fiber': totals.fiber or 0 if totals else 0,
-                'sugars': totals.sugars or 0 if totals else 0,
-                'sodium': totals.sodium or 0 if totals else 0
-            }
-            daily_totals.append(day_total)
-        
+            day = single_date.isoformat()
+            daily_totals.append({'date': day, **_totals_dict(totals_by_day.get(day))})
+
         return daily_totals
-    finally:
-        session.close()
 
-async def get_daily_meals(user_id: str, start_timestamp: int, end_timestamp: int) -> list:
-    """Get all meals for a specific day."""
-    session = get_session()
+@timed("db.get_daily_columns")
+async def get_daily_columns(user_uuid: str, start_date: date, end_date: date) -> dict:
+    """Per-day totals for a date range as zero-filled columns: {'date': [...], 'meal_count': [...], field: [...]}.
+
+    One range read of the rollup (at most a row per day), however long the range.
+    """
+    async with get_async_session() as session:
+        totals_by_day = await _read_daily_totals(session, user_uuid, start_date, end_date)
+
+    days = [(start_date + timedelta(n)).isoformat() for n in range((end_date - start_date).days + 1)]
+    rows = [totals_by_day.get(day) for day in days]
+    columns = {'date': days, 'meal_count': [(row.meal_count or 0) if row else 0 for row in rows]}
+    for field in NUTRIENT_FIELDS:
+        columns[field] = [(getattr(row, field) or 0) if row else 0 for row in rows]
+    return columns
+
+@timed("db.get_dashboard")
+async def get_dashboard(user_uuid: str, target_date: date = None, days: int = 7) -> dict:
+    """Totals and meals for target_date plus per-day totals for the `days` days ending on it.
+
+    Reads the window's meals once (an index range on user_id, local_date) and sums
+    them per day in Python, instead of separate totals, meals and history queries.
+    """
+    if target_date is None:
+        target_date = await user_today(user_uuid)
+    start_date = target_date - timedelta(days=days-1)
+    meals, _ = await get_meal_history(user_uuid, limit=None, start_date=start_date, end_date=target_date)
+
+    meals_by_day = {}
+    for meal in meals:
+        meals_by_day.setdefault(meal.local_date, []).append(meal)
+
+    history = []
+    for single_date in (start_date + timedelta(n) for n in range(days)):
+        day = single_date.isoformat()
+        day_meals = meals_by_day.get(day, [])
+        history.append({'date': day, **{field: sum(getattr(meal, field) or 0 for meal in day_meals)
+                                         for field in NUTRIENT_FIELDS}})
+
+    return {
+        'date': target_date.isoformat(),
+        'totals': {field: history[-1][field] for field in NUTRIENT_FIELDS},
+        'meals': meals_by_day.get(target_date.isoformat(), []),
+        'history': history,
+    }
+
+@timed("db.get_streaks")
+async def get_streaks(user_uuid: str, today: date = None) -> dict:
+    """Current and longest streaks from the user's counters; never reads transactions or daily totals."""
+    today = today or await user_today(user_uuid)
+    async with get_async_session() as session:
+        rows = (await session.execute(select(UserStreak).where(UserStreak.user_id == user_uuid))).scalars().all()
+    return streak_service.summarize(rows, today)
+
+def encode_meal_cursor(timestamp: int, meal_id: int) -> str:
+    return f"{timestamp}_{meal_id}"
+
+def decode_meal_cursor(cursor: str):
+    """Parse a cursor from encode_meal_cursor; raises ValueError if it is malformed."""
+    timestamp, meal_id = cursor.split("_")
+    return int(timestamp), int(meal_id)
+
+@timed("db.get_meal_history")
+async def get_meal_history(user_id: str, limit: Optional[int] = 50, cursor: Optional[str] = None,
+                           start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """Page through a user's meals, newest first.
+
+    Uses keyset pagination on (timestamp, id) so each page is an index range
+    read, and selects plain columns instead of hydrating Transaction objects.
+    start_date/end_date limit it to those local days. Returns (meals,
+    next_cursor): meals are MEAL_COLUMNS rows, which the API's Meal model reads
+    by attribute, and next_cursor is None on the last page.
+    """
+    query = select(*MEAL_COLUMNS).where(Transaction.user_id == user_id)
+    if start_date is not None:
+        query = query.where(Transaction.local_date >= start_date.isoformat())
+    if end_date is not None:
+        query = query.where(Transaction.local_date <= end_date.isoformat())
+    if cursor:
+        query = query.where(tuple_(Transaction.timestamp, Transaction.id) < decode_meal_cursor(cursor))
+    query = query.order_by(Transaction.timestamp.desc(), Transaction.id.desc())
+    if limit is not None:
+        # Fetch one extra row to learn whether another page exists
+        query = query.limit(limit + 1)
+
+    async with get_async_session() as session:
+        rows = (await session.execute(query)).all()
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_meal_cursor(rows[-1].timestamp, rows[-1].id)
+    return rows, next_cursor
+
+async def get_daily_meals(user_id: str, day: date) -> list:
+    """Get all meals for a specific local day."""
     try:
-        # Add debug prints
-        print(f"Fetching meals for user {user_id} between {start_timestamp} and {end_timestamp}")
-        ct_start = datetime.fromtimestamp(start_timestamp, CT_TIMEZONE)
-        ct_end = datetime.fromtimestamp(end_timestamp, CT_TIMEZONE)
-        print(f"Central Time range: {ct_start} to {ct_end}")
-        
-        # First, check if the user exists and show all their meals
-        count_row = session.query(func.count(Transaction.id)).filter(Transaction.user_id == user_id).scalar()
-        total_meals = count_row
-        print(f"Total meals in DB for user: {total_meals}")
-        
-        # Get all meals for debugging
-        all_meals = session.query(Transaction).filter(Transaction.user_id == user_id).order_by(Transaction.timestamp.desc()).all()
-        print(f"Found {len(all_meals)} total meals")
-        
-        # Now get meals for the specific time range
-        meals = session.query(Transaction).filter(
-            Transaction.user_id == user_id,
-            Transaction.timestamp.between(start_timestamp, end_timestamp)
-        ).order_by(Transaction.timestamp.desc()).all()
-        
-        result = []
-        for meal in meals:
-            # Convert UTC timestamp to Central Time for display
-            ct_time = datetime.fromtimestamp(meal.timestamp, timezone.utc).astimezone(CT_TIMEZONE)
-            meal_data = {
-                'id': meal.id,  # Make sure ID is included
-                'name': meal.name,
-                'timestamp': int(ct_time.timestamp()),
-                'calories': meal.calories,
-                'total_fat': meal.total_fat,
-                'carbohydrates': meal.carbohydrates,
-                'protein': meal.protein,
-                'fiber': meal.fiber,
-                'sugars': meal.sugars,
-                'serving_size': meal.serving_size,
-                'sodium': meal.sodium
-            }
-            result.append(meal_data)
-            print(f"Found meal in range: {meal_data}")
-        
-        print(f"Returning {len(result)} meals in the specified time range")
-        return result
+        logger.debug("Fetching meals for user %s on %s", user_id, day)
+        meals, _ = await get_meal_history(user_id, limit=None, start_date=day, end_date=day)
+        logger.debug("Returning %d meals for %s", len(meals), day)
+        return meals
     except Exception as e:
-        print(f"Error in get_daily_meals: {e}")
+        logger.error("Error in get_daily_meals: %s", e)
         raise e
-    finally:
-        session.close()
 
+async def _delete_transaction(session, meal_id: int, user_id: str) -> bool:
+    # Find the transaction and verify it belongs to the user
+    transaction = await session.scalar(select(Transaction).where(
+        Transaction.id == meal_id,
+        Transaction.user_id == user_id
+    ))
+
+    if not transaction:
+        return False
+
+    await _apply_to_daily_total(session, user_id, transaction.local_date,
+                                {field: getattr(transaction, field) for field in NUTRIENT_FIELDS}, -1)
+    await session.delete(transaction)
+    await streak_service.update(session, user_id, [transaction.local_date])
+    await _bump_data_version(session, user_id)
+    return True
+
+@timed("db.delete_meal")
 async def delete_meal(meal_id: int, user_id: str) -> bool:
     """Delete a meal from the database and return True if successful."""
-    session = get_session()
     try:
-        # Find the transaction and verify it belongs to the user
-        transaction = session.query(Transaction).filter(
-            Transaction.id == meal_id,
-            Transaction.user_id == user_id
-        ).first()
-        
-        if not transaction:
-            return False
-            
-        session.delete(transaction)
-        session.commit()
-        print(f"Successfully deleted meal {meal_id} for user {user_id}")
-        return True
+        deleted = await write(_delete_transaction, meal_id, user_id)
+        if deleted:
+            logger.debug("Deleted meal %d for user %s", meal_id, user_id)
+        return deleted
     except Exception as e:
-        print(f"Error deleting meal: {str(e)}")
-        session.rollback()
+        logger.error("Error deleting meal: %s", e)
         return False
-    finally:
-        session.close()
 
-# Create tables on module import
-create_tables()
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database maintenance")
+    parser.add_argument("--rebuild-daily-totals", action="store_true", help="recompute the daily_totals rollup")
+    parser.add_argument("--rebuild-streaks", action="store_true",
+                        help="recompute streak counters from daily_totals (implied by --rebuild-daily-totals)")
+    parser.add_argument("--user-id", help="limit the rebuild to one user")
+    args = parser.parse_args()
+    if args.rebuild_daily_totals or args.rebuild_streaks:
+        from app.services import migrations
+        migrations.migrate()
+        if args.rebuild_daily_totals:
+            rebuild_daily_totals(args.user_id)
+        rebuild_streaks(args.user_id)
+    else:
+        parser.print_help()
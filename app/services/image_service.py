@@ -1,53 +1,132 @@
 from typing import Optional
-import requests
-from bs4 import BeautifulSoup
-import urllib.parse
+from app.core.config import settings
+from app.core.metrics import timed
+from app.core.singleflight import SingleFlight
+from app.models import MealImage
+from app.services.db_utils import get_async_session, write
+from app.services.meal_cache import normalize_query
+import asyncio
+import httpx
+import logging
 import random
 import re
-from fastapi import HTTPException
+import time
 
-def search_meal_image(meal_name: str) -> Optional[str]:
+logger = logging.getLogger(__name__)
+
+SEARCH_URL = settings.image_search.get('url', 'https://www.google.com/search')
+TIMEOUT_SECONDS = settings.image_search.get('timeout_seconds', 3)
+MAX_CONNECTIONS = settings.image_search.get('max_connections', 20)
+CACHE_TTL_SECONDS = settings.image_search.get('cache_ttl_seconds', 30 * 24 * 3600)
+NEGATIVE_TTL_SECONDS = settings.image_search.get('negative_ttl_seconds', 24 * 3600)
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+_http_client = None
+_http_client_loop = None
+_searches = SingleFlight("image.search")  # keyed on normalized meal name
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the pooled HTTP client, creating it for the running event loop."""
+    global _http_client, _http_client_loop
+    loop = asyncio.get_running_loop()
+    if _http_client is None or _http_client_loop is not loop:
+        _http_client = httpx.AsyncClient(
+            headers=HEADERS,
+            timeout=httpx.Timeout(TIMEOUT_SECONDS),
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+            follow_redirects=True
+        )
+        _http_client_loop = loop
+    return _http_client
+
+async def close_http_client():
+    global _http_client, _http_client_loop
+    if _http_client is not None:
+        await _http_client.aclose()
+    _http_client = None
+    _http_client_loop = None
+
+def extract_image_urls(html: str) -> list:
+    """Pull candidate image URLs out of a search results page."""
+    # Imported here, off the startup path; this runs in a worker thread
+    from bs4 import BeautifulSoup, SoupStrainer
+    images = []
+    # Only build a tree for <img> tags instead of the whole page
+    for img in BeautifulSoup(html, 'html.parser', parse_only=SoupStrainer('img')).find_all('img'):
+        src = img.get('src')
+        if src and src.startswith('http') and not src.startswith('https://www.google.com'):
+            images.append(src)
+
+    # Also try to find encoded image URLs in the page source
+    images.extend(re.findall(r'https://[^"\']*?\.(?:jpg|jpeg|png|gif)', html))
+
+    # Remove duplicates (keeping page order) and filter out icons
+    images = list(dict.fromkeys(images))
+    return [img for img in images if not img.endswith(('.ico', 'favicon.ico'))]
+
+@timed("db.image_cache.get")
+async def get_cached_image(meal_name: str):
+    """Return (hit, image_url) from the persistent cache. A hit may carry a None url."""
+    async with get_async_session() as session:
+        row = await session.get(MealImage, normalize_query(meal_name))
+        if row is None:
+            return False, None
+        ttl = CACHE_TTL_SECONDS if row.image_url else NEGATIVE_TTL_SECONDS
+        if time.time() - row.created_at >= ttl:
+            return False, None
+        return True, row.image_url
+
+async def _merge_image(session, row: MealImage):
+    await session.merge(row)
+
+async def store_image(meal_name: str, image_url: Optional[str]):
+    try:
+        await write(_merge_image, MealImage(
+            name=normalize_query(meal_name),
+            image_url=image_url,
+            created_at=int(time.time())
+        ))
+    except Exception as e:
+        logger.error(f"Error caching meal image: {e}")
+
+@timed("image.search")
+async def fetch_meal_image(meal_name: str) -> Optional[str]:
     """
     Search for a meal image by scraping Google Images.
     Returns the URL of a random image from the first few results, or None if no results found.
     """
+    response = await get_http_client().get(SEARCH_URL, params={'q': f"{meal_name} food", 'tbm': 'isch'})
+    response.raise_for_status()
+
+    # Parsing is CPU bound, keep it off the event loop
+    images = await asyncio.to_thread(extract_image_urls, response.text)
+
+    # Return a random image from the first few results
+    if images:
+        return random.choice(images[:5])
+    return None
+
+async def _resolve_and_store(meal_name: str) -> Optional[str]:
     try:
-        # Construct the search URL
-        query = urllib.parse.quote(f"{meal_name} food")
-        url = f"https://www.google.com/search?q={query}&tbm=isch"
-        
-        # Send request with headers to mimic a browser
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        
-        # Parse the response
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find image URLs using common Google Images patterns
-        images = []
-        for img in soup.find_all('img'):
-            if 'src' in img.attrs:
-                src = img['src']
-                if src.startswith('http') and not src.startswith('https://www.google.com'):
-                    images.append(src)
-        
-        # Also try to find encoded image URLs in the page source
-        encoded_images = re.findall(r'https://[^"\']*?\.(?:jpg|jpeg|png|gif)', response.text)
-        images.extend(encoded_images)
-        
-        # Remove duplicates and filter out very small images (likely icons)
-        images = list(set(images))
-        images = [img for img in images if not img.endswith(('.ico', 'favicon.ico'))]
-        
-        # Return a random image from the first few results
-        if images:
-            return random.choice(images[:5])
-        
-        return None
-        
+        image_url = await fetch_meal_image(meal_name)
     except Exception as e:
-        print(f"Error searching for image: {str(e)}")
-        raise HTTPException(status_code=500, detail="Error searching for image")
+        # Images are decorative; a failed search is not cached so it is retried next time
+        logger.warning(f"Error searching for image: {str(e)}")
+        return None
+    await store_image(meal_name, image_url)
+    return image_url
+
+async def search_meal_image(meal_name: str) -> Optional[str]:
+    """Return an image URL for a meal, from the cache or a (shared) live search."""
+    hit, image_url = await get_cached_image(meal_name)
+    if hit:
+        return image_url
+
+    return await _searches.do(normalize_query(meal_name), _resolve_and_store, meal_name)
+
+async def resolve_meal_image_in_background(meal_name: str):
+    """Warm the image cache for a meal; meant to run as a response background task."""
+    await search_meal_image(meal_name)
@@ -0,0 +1,139 @@
+"""Rolling latency and error tracking per LLM backend, used by llm_service to pick, hedge and fail over.
+
+Backends are ranked by their recent median latency; ones that keep failing are
+taken out of rotation for a cooldown. A request is hedged to the next backend
+once the first has been running longer than its usual (percentile) latency.
+"""
+from app.core.config import settings
+from app.core.metrics import Counter
+from collections import deque
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_routing_config = settings.llm_routing
+ENABLED = _routing_config.get('enabled', True)
+# Backends eligible for routing, in order of preference while there is no latency data
+MODELS = _routing_config.get('models') or [settings.models['llm']['default']]
+WINDOW = _routing_config.get('window', 100)
+MIN_SAMPLES = _routing_config.get('min_samples', 5)
+HEDGE_PERCENTILE = _routing_config.get('hedge_percentile', 0.95)
+MIN_HEDGE_DELAY_SECONDS = _routing_config.get('min_hedge_delay_ms', 500) / 1000
+DEFAULT_HEDGE_DELAY_SECONDS = _routing_config.get('default_hedge_delay_ms', 5000) / 1000
+MAX_HEDGES = _routing_config.get('max_hedges', 1)
+MAX_ATTEMPTS = _routing_config.get('max_attempts', 3)
+MAX_ERROR_RATE = _routing_config.get('max_error_rate', 0.5)
+MAX_CONSECUTIVE_FAILURES = _routing_config.get('max_consecutive_failures', 3)
+COOLDOWN_SECONDS = _routing_config.get('cooldown_seconds', 30)
+
+llm_requests = Counter(
+    "healthcheck_llm_requests_total",
+    "LLM calls by backend and outcome (ok, error, cancelled)",
+    ("model", "outcome")
+)
+llm_hedges = Counter(
+    "healthcheck_llm_hedged_requests_total",
+    "Duplicate LLM calls started because the first backend was slow",
+    ("model",)
+)
+
+class ModelHealth:
+    def __init__(self, model: str):
+        self.model = model
+        self.latencies = deque(maxlen=WINDOW)  # seconds, successful calls only
+        self.outcomes = deque(maxlen=WINDOW)   # True for success
+        self.consecutive_failures = 0
+        self.unavailable_until = 0.0
+
+    def percentile(self, fraction: float):
+        if len(self.latencies) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def available(self, now: float) -> bool:
+        return now >= self.unavailable_until
+
+_lock = threading.Lock()
+_health = {model: ModelHealth(model) for model in MODELS}
+
+def ranked_models() -> list:
+    """Routable backends, fastest healthy first; backends in cooldown go last, still usable as a last resort."""
+    if not ENABLED:
+        return [settings.models['llm']['default']]
+    now = time.monotonic()
+    with _lock:
+        def key(model):
+            health = _health[model]
+            median = health.percentile(0.5)
+            return (not health.available(now), median if median is not None else float('inf'), MODELS.index(model))
+        return sorted(MODELS, key=key)
+
+def hedge_delay(model: str) -> float:
+    """Seconds to wait on a backend before starting a hedged duplicate elsewhere."""
+    health = _health.get(model)
+    with _lock:
+        slow = health.percentile(HEDGE_PERCENTILE) if health else None
+    if slow is None:
+        return DEFAULT_HEDGE_DELAY_SECONDS
+    return max(slow, MIN_HEDGE_DELAY_SECONDS)
+
+def record_success(model: str, seconds: float):
+    llm_requests.inc(model, "ok")
+    health = _health.get(model)
+    if health is None:
+        return
+    with _lock:
+        health.latencies.append(seconds)
+        health.outcomes.append(True)
+        health.consecutive_failures = 0
+
+def record_failure(model: str, error: Exception):
+    llm_requests.inc(model, "error")
+    health = _health.get(model)
+    if health is None:
+        return
+    with _lock:
+        health.outcomes.append(False)
+        health.consecutive_failures += 1
+        if (health.consecutive_failures >= MAX_CONSECUTIVE_FAILURES
+                or (len(health.outcomes) >= MIN_SAMPLES and health.error_rate() > MAX_ERROR_RATE)):
+            health.unavailable_until = time.monotonic() + COOLDOWN_SECONDS
+            # Start afresh after the cooldown rather than being ejected again by old failures
+            health.outcomes.clear()
+            health.consecutive_failures = 0
+            logger.warning(f"LLM backend {model} taken out of rotation for {COOLDOWN_SECONDS}s: {error}")
+
+def record_cancelled(model: str, seconds: float):
+    """A call abandoned after `seconds`, usually a hedge loser; its time still counts as a (lower bound) latency."""
+    llm_requests.inc(model, "cancelled")
+    health = _health.get(model)
+    if health is None:
+        return
+    with _lock:
+        health.latencies.append(seconds)
+
+def record_hedge(model: str):
+    llm_hedges.inc(model)
+
+def get_stats() -> dict:
+    def ms(seconds):
+        return round(seconds * 1000, 1) if seconds is not None else None
+
+    now = time.monotonic()
+    with _lock:
+        return {
+            model: {
+                'available': health.available(now),
+                'samples': len(health.latencies),
+                'p50_ms': ms(health.percentile(0.5)),
+                'hedge_after_ms': ms(health.percentile(HEDGE_PERCENTILE)),
+                'error_rate': round(health.error_rate(), 4),
+            }
+            for model, health in _health.items()
+        }
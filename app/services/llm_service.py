@@ -1,30 +1,78 @@
-from app import api
-import boto3
+import asyncio
+import time
 import logging
 import json
 from fastapi import HTTPException
 from app.core.config import settings
-from openai import AzureOpenAI
+from app.core.metrics import timed
+from app.services import llm_router
+from pydantic_core import from_json
 
-## get parameter from ssm parameter store
-def get_ssm_parameter(ssm, parameter):
-    #result = ssm.get_parameter(Name=parameter)
-    result = ssm.get_parameters(Names=[parameter])
-    #return result['Parameter']['Value']
-    return result['Parameters'][0]['Value']
+# The provider SDKs (openai, boto3) take most of a second to import, so they are imported
+# on first use inside the client builders, which get_llm_client runs in a worker thread
+
+SSM_REGION = 'us-east-2'
+AZURE_API_VERSION = "2024-02-15-preview"
+# SSM-backed credentials are re-read after this many seconds so rotated keys get picked up
+SSM_CACHE_TTL_SECONDS = 15 * 60
+BEDROCK_MAX_POOL_CONNECTIONS = 50
+
+_ssm_client = None
+_ssm_cache = {}  # parameter name -> (value, fetched_at)
+_llm_clients = {}  # model name -> (client, credentials the client was built with)
+_client_lock = asyncio.Lock()
+
+def get_ssm_client():
+    global _ssm_client
+    if _ssm_client is None:
+        import boto3
+        _ssm_client = boto3.client('ssm', region_name=SSM_REGION)
+    return _ssm_client
+
+def ssm_parameters_cached(names) -> bool:
+    """True if every parameter is in the cache and still within its TTL."""
+    now = time.monotonic()
+    return all(
+        name in _ssm_cache and now - _ssm_cache[name][1] < SSM_CACHE_TTL_SECONDS
+        for name in names
+    )
+
+## get parameters from ssm parameter store
+def get_ssm_parameters(names) -> dict:
+    """Return SSM parameter values, fetching any missing or expired ones in a single call."""
+    now = time.monotonic()
+    stale = [name for name in names
+             if name not in _ssm_cache or now - _ssm_cache[name][1] >= SSM_CACHE_TTL_SECONDS]
+    if stale:
+        result = get_ssm_client().get_parameters(Names=stale)
+        for parameter in result['Parameters']:
+            _ssm_cache[parameter['Name']] = (parameter['Value'], now)
+        missing = [name for name in stale if name not in _ssm_cache]
+        if missing:
+            raise ValueError(f"SSM parameters not found: {missing}")
+    return {name: _ssm_cache[name][0] for name in names}
 
 # Azure OpenAI client setup
-def get_openai_client():
+def get_openai_client(model: str = None):
+    """Return the cached Azure OpenAI client for a model, rebuilding it only when its credentials change."""
     try:
-        ssm = boto3.client('ssm', region_name='us-east-2')
-        model = settings.models['llm']['default']
+        model = model or settings.models['llm']['default']
         endpoint = settings.models['llm'][model]['model_endpoint']
-        api_key = settings.models['llm'][model]['model_api_key']    
-        client = AzureOpenAI(
-            azure_endpoint = get_ssm_parameter(ssm, endpoint),
-            api_key = get_ssm_parameter(ssm, api_key),
-            api_version="2024-02-15-preview"
+        api_key = settings.models['llm'][model]['model_api_key']
+        params = get_ssm_parameters([endpoint, api_key])
+        credentials = (params[endpoint], params[api_key])
+
+        cached = _llm_clients.get(model)
+        if cached and cached[1] == credentials:
+            return cached[0]
+
+        from openai import AsyncAzureOpenAI
+        client = AsyncAzureOpenAI(
+            azure_endpoint = credentials[0],
+            api_key = credentials[1],
+            api_version=AZURE_API_VERSION
         )
+        _llm_clients[model] = (client, credentials)
         return client
     except Exception as e:
         logging.error(f"Error creating OpenAI client: {str(e)}")
@@ -32,13 +80,45 @@ def get_openai_client():
 
 # AWS Bedrock client setup
 def get_bedrock_client(model, model_region):
+    """Return the cached bedrock-runtime client for a model. boto3 clients are thread-safe, so one is shared."""
     try:
-        client = boto3.client('bedrock-runtime', region_name=model_region)
+        cached = _llm_clients.get(model)
+        if cached:
+            return cached[0]
+        import boto3
+        from botocore.config import Config
+        client = boto3.client(
+            'bedrock-runtime',
+            region_name=model_region,
+            config=Config(max_pool_connections=BEDROCK_MAX_POOL_CONNECTIONS)
+        )
+        _llm_clients[model] = (client, model_region)
         return client
     except Exception as e:
         logging.error(f"Error creating Bedrock client: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def get_llm_client(model: str):
+    """Return the long-lived client for a model.
+
+    The fast path is a dict lookup. Client construction and SSM refreshes do
+    blocking I/O, so they run in a worker thread under a lock so concurrent
+    requests don't all refresh at once.
+    """
+    model_config = settings.models['llm'][model]
+    if 'gpt' in model.lower():
+        if model in _llm_clients and ssm_parameters_cached(
+                [model_config['model_endpoint'], model_config['model_api_key']]):
+            return _llm_clients[model][0]
+        async with _client_lock:
+            return await asyncio.to_thread(get_openai_client, model)
+
+    if model in _llm_clients:
+        return _llm_clients[model][0]
+    async with _client_lock:
+        return await asyncio.to_thread(get_bedrock_client, model, model_config['model_region'])
+
+@timed("llm.format_response")
 async def format_response(llm_response: str) -> dict:
     try:
         cleaned_response = llm_response.strip()
@@ -48,9 +128,9 @@ async def format_response(llm_response: str) -> dict:
                 cleaned_response = cleaned_response[5:].strip()
         
         try:
-            response_json = json.loads(cleaned_response)
-            return response_json
-        except json.JSONDecodeError as e:
+            # pydantic-core's parser, which FastAPI already loads, is faster than the json module
+            return from_json(cleaned_response)
+        except ValueError as e:
             logging.error(f"Failed to parse JSON: {cleaned_response}")
             logging.error(f"JSON error: {str(e)}")
             raise HTTPException(status_code=500, detail=f"Invalid JSON response from LLM: {str(e)}")
@@ -59,32 +139,219 @@ async def format_response(llm_response: str) -> dict:
         logging.error(f"Error in format_response: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+class PartialJSONObject:
+    """Incrementally parse a streamed JSON object, reporting top-level fields as they complete.
+
+    Numbers and literals are only reported once a following character shows
+    they have stopped growing; nested objects once they are closed.
+    """
+    _decoder = json.JSONDecoder()
+
+    def __init__(self):
+        self.buffer = ''
+        self.fields = {}
+
+    def _skip(self, idx: int, chars: str = ' \t\r\n') -> int:
+        while idx < len(self.buffer) and self.buffer[idx] in chars:
+            idx += 1
+        return idx
+
+    def feed(self, text: str) -> list:
+        """Add streamed text and return the (key, value) pairs completed by it."""
+        self.buffer += text
+        start = self.buffer.find('{')
+        if start < 0:
+            return []
+
+        completed = []
+        idx = start + 1
+        while True:
+            idx = self._skip(idx, ' \t\r\n,')
+            if idx >= len(self.buffer) or self.buffer[idx] != '"':
+                break
+            try:
+                key, idx = self._decoder.raw_decode(self.buffer, idx)
+                idx = self._skip(idx)
+                if idx >= len(self.buffer) or self.buffer[idx] != ':':
+                    break
+                idx = self._skip(idx + 1)
+                value, end = self._decoder.raw_decode(self.buffer, idx)
+            except ValueError:
+                break
+            if end >= len(self.buffer) and not isinstance(value, (str, dict, list)):
+                break
+            if key not in self.fields:
+                self.fields[key] = value
+                completed.append((key, value))
+            idx = end
+        return completed
+
+async def call_model(model: str, processed_query: str) -> str:
+    """One completion from one backend."""
+    client = await get_llm_client(model)
+    if 'gpt' in model.lower():
+        response = await client.chat.completions.create(
+            model=settings.models['llm'][model]['model_deployment_name'],
+            messages=[{"role": "user", "content": processed_query}],
+            max_tokens=4096
+        )
+        return response.choices[0].message.content.strip()
+
+    # boto3 has no async API; run the call in a thread so the event loop keeps serving
+    response = await asyncio.to_thread(
+        client.converse,
+        modelId = settings.models['llm'][model]['model_id'],
+        messages=[
+                {
+                "role": "user",
+                "content": [{'text':processed_query}]
+                }
+        ]
+    )
+    response_body = response['output']['message']
+    return response_body['content'][0]['text']
+
+async def _routed_call(model: str, processed_query: str) -> str:
+    """call_model, reporting the outcome to the router."""
+    start = time.perf_counter()
+    try:
+        response_message = await call_model(model, processed_query)
+    except asyncio.CancelledError:
+        llm_router.record_cancelled(model, time.perf_counter() - start)
+        raise
+    except Exception as e:
+        llm_router.record_failure(model, e)
+        raise
+    llm_router.record_success(model, time.perf_counter() - start)
+    return response_message
+
+def _error_detail(error) -> str:
+    return getattr(error, 'detail', None) or str(error)
+
+@timed("llm.send_to_llm")
 async def send_to_llm(processed_query: str) -> str:
+    """Completion from the fastest healthy backend.
+
+    If it runs past its usual latency, the next backend gets a hedged duplicate
+    and whichever answers first wins. A failed backend is replaced by the next
+    one, up to llm_router.MAX_ATTEMPTS calls in total.
+    """
+    loop = asyncio.get_running_loop()
+    candidates = iter(llm_router.ranked_models()[:llm_router.MAX_ATTEMPTS])
+    running = {}  # task -> model
+    hedges = 0
+    hedge_at = None
+    last_error = None
+
+    def start_next():
+        nonlocal hedge_at
+        model = next(candidates, None)
+        if model is None:
+            hedge_at = None
+            return None
+        running[asyncio.create_task(_routed_call(model, processed_query))] = model
+        hedge_at = loop.time() + llm_router.hedge_delay(model)
+        return model
+
+    start_next()
     try:
-        model = settings.models['llm']['default']
-        model_region = settings.models['llm'][model]['model_region']
-        if 'gpt' in model.lower():
-            client = get_openai_client()
-            response = client.chat.completions.create(
-                model=settings.models['llm'][model]['model_deployment_name'],
-                messages=[{"role": "user", "content": processed_query}],
-                max_tokens=4096
-            )
-            response_message = json.loads(response.model_dump_json())["choices"][0]["message"]["content"].strip()
-        else:
-            client = get_bedrock_client(model, model_region)
-            response = client.converse(
+        while running:
+            timeout = None
+            if hedge_at is not None and hedges < llm_router.MAX_HEDGES:
+                timeout = max(hedge_at - loop.time(), 0)
+            done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+
+            if not done:
+                model = start_next()
+                if model is not None:
+                    hedges += 1
+                    llm_router.record_hedge(model)
+                    logging.info(f"Hedging slow LLM request to {model}")
+                continue
+
+            for task in done:
+                model = running.pop(task)
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+                logging.warning(f"LLM backend {model} failed: {_error_detail(last_error)}")
+            if not running:
+                start_next()
+    finally:
+        for task in running:
+            task.cancel()
+
+    logging.error(f"Error in send_to_llm: {_error_detail(last_error)}")
+    raise HTTPException(status_code=500, detail=_error_detail(last_error))
+
+async def _stream_model(model: str, processed_query: str):
+    client = await get_llm_client(model)
+    if 'gpt' in model.lower():
+        stream = await client.chat.completions.create(
+            model=settings.models['llm'][model]['model_deployment_name'],
+            messages=[{"role": "user", "content": processed_query}],
+            max_tokens=4096,
+            stream=True
+        )
+        async for chunk in stream:
+            # Azure sends content-filter chunks with no choices
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    else:
+        async for text in _bedrock_stream(client, model, processed_query):
+            yield text
+
+async def stream_llm(processed_query: str):
+    """Yield the LLM's response text in chunks as the model produces them.
+
+    Uses the fastest healthy backend; fails over to the next one only if
+    nothing has been yielded yet.
+    """
+    last_error = None
+    for model in llm_router.ranked_models()[:llm_router.MAX_ATTEMPTS]:
+        started = False
+        start = time.perf_counter()
+        try:
+            async for text in _stream_model(model, processed_query):
+                started = True
+                yield text
+        except Exception as e:
+            llm_router.record_failure(model, e)
+            logging.error(f"Error in stream_llm from {model}: {_error_detail(e)}")
+            if started:
+                raise HTTPException(status_code=500, detail=_error_detail(e))
+            last_error = e
+            continue
+        llm_router.record_success(model, time.perf_counter() - start)
+        return
+    raise HTTPException(status_code=500, detail=_error_detail(last_error))
+
+async def _bedrock_stream(client, model: str, processed_query: str):
+    """Bridge boto3's blocking converse_stream iterator onto the event loop via a queue."""
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    done = object()
+
+    def produce():
+        try:
+            response = client.converse_stream(
                 modelId = settings.models['llm'][model]['model_id'],
-                messages=[
-                        {
-                        "role": "user",
-                        "content": [{'text':processed_query}]
-                        }
-                ]
+                messages=[{"role": "user", "content": [{'text': processed_query}]}]
             )
-            response_body = response['output']['message']
-            response_message = response_body['content'][0]['text']
-        return response_message
-    except Exception as e:
-        logging.error(f"Error in send_to_llm: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+            for event in response['stream']:
+                text = event.get('contentBlockDelta', {}).get('delta', {}).get('text')
+                if text:
+                    loop.call_soon_threadsafe(queue.put_nowait, text)
+            loop.call_soon_threadsafe(queue.put_nowait, done)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+
+    producer = loop.run_in_executor(None, produce)
+    while True:
+        item = await queue.get()
+        if item is done:
+            break
+        if isinstance(item, Exception):
+            raise item
+        yield item
+    await producer
@@ -0,0 +1,183 @@
+"""Two-tier (in-process LRU + SQLite) cache for LLM meal analyses, keyed on normalized query and model.
+
+SQLite is the shared tier every worker sees. A worker's memory tier only serves an
+entry for MEMORY_TTL_SECONDS before reading it back from SQLite, so an
+invalidation made through another worker takes effect within that time.
+"""
+from app.core.config import settings
+from app.core.metrics import timed
+from app.models import MealAnalysisCache
+from app.services.db_utils import get_async_session, write
+from sqlalchemy import delete, func, select, update
+from collections import OrderedDict
+from typing import Optional
+import copy
+import json
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_cache_config = settings.cache.get('meal_analysis', {})
+MEMORY_ENTRIES = _cache_config.get('memory_entries', 1000)
+MAX_ROWS = _cache_config.get('max_rows', 50000)
+TTL_SECONDS = _cache_config.get('ttl_seconds', 30 * 24 * 3600)
+MEMORY_TTL_SECONDS = _cache_config.get('memory_ttl_seconds', 60)
+# Trimming the SQLite tier needs a COUNT, so only do it every N stores
+PRUNE_EVERY = 100
+
+_memory = OrderedDict()  # (model, query) -> (meal_data, created_at, remembered_at)
+_lock = threading.Lock()
+_stats = {
+    'memory_hits': 0,
+    'db_hits': 0,
+    'misses': 0,
+    'stores': 0,
+    'evictions': 0,
+}
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and strip surrounding punctuation."""
+    query = re.sub(r'\s+', ' ', query.lower()).strip()
+    return query.strip(' .,;:!?')
+
+def _remember(key, meal_data: dict, created_at: int, now: int):
+    with _lock:
+        _memory[key] = (meal_data, created_at, now)
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+            _stats['evictions'] += 1
+
+@timed("db.meal_cache.get")
+async def get_cached_analysis(query: str, model: str) -> Optional[dict]:
+    """Return a copy of the cached analysis for a query, or None on a miss."""
+    key = (model, normalize_query(query))
+    now = int(time.time())
+
+    with _lock:
+        entry = _memory.get(key)
+        if entry and now - entry[1] < TTL_SECONDS and now - entry[2] < MEMORY_TTL_SECONDS:
+            _memory.move_to_end(key)
+            _stats['memory_hits'] += 1
+            return copy.deepcopy(entry[0])
+        if entry:
+            # Expired, or due to be read back from the shared tier
+            del _memory[key]
+            if now - entry[1] >= TTL_SECONDS:
+                _stats['evictions'] += 1
+
+    async with get_async_session() as session:
+        try:
+            row = await session.get(MealAnalysisCache, key)
+            if row is None:
+                _stats['misses'] += 1
+                return None
+            if now - row.created_at >= TTL_SECONDS:
+                await write(_delete_row, key, wait=False)
+                _stats['evictions'] += 1
+                _stats['misses'] += 1
+                return None
+            meal_data = json.loads(row.response)
+            created_at = row.created_at
+        except Exception as e:
+            # A broken cache must never break meal logging
+            logger.error(f"Error reading meal analysis cache: {e}")
+            _stats['misses'] += 1
+            return None
+
+    # LRU bookkeeping doesn't need to be committed before we answer
+    await write(_touch_row, key, now, wait=False)
+
+    _stats['db_hits'] += 1
+    _remember(key, meal_data, created_at, now)
+    return copy.deepcopy(meal_data)
+
+async def _touch_row(session, key: tuple, now: int):
+    await session.execute(update(MealAnalysisCache).where(
+        MealAnalysisCache.model == key[0],
+        MealAnalysisCache.query == key[1]
+    ).values(accessed_at=now, hits=MealAnalysisCache.hits + 1))
+
+async def _delete_row(session, key: tuple):
+    await session.execute(delete(MealAnalysisCache).where(
+        MealAnalysisCache.model == key[0],
+        MealAnalysisCache.query == key[1]
+    ))
+
+async def _merge_row(session, row: MealAnalysisCache):
+    await session.merge(row)
+
+@timed("db.meal_cache.store")
+async def store_analysis(query: str, model: str, meal_data: dict):
+    """Store an analysis in both tiers."""
+    key = (model, normalize_query(query))
+    now = int(time.time())
+    _remember(key, copy.deepcopy(meal_data), now, now)
+
+    try:
+        await write(_merge_row, MealAnalysisCache(
+            model=key[0],
+            query=key[1],
+            response=json.dumps(meal_data),
+            created_at=now,
+            accessed_at=now,
+            hits=0
+        ))
+        _stats['stores'] += 1
+        if _stats['stores'] % PRUNE_EVERY == 0:
+            await write(_prune, now)
+    except Exception as e:
+        logger.error(f"Error writing meal analysis cache: {e}")
+
+async def _prune(session, now: int):
+    """Drop expired rows, then the least recently used rows past MAX_ROWS."""
+    expired = (await session.execute(delete(MealAnalysisCache).where(
+        MealAnalysisCache.created_at <= now - TTL_SECONDS
+    ))).rowcount
+
+    overflow = await session.scalar(select(func.count()).select_from(MealAnalysisCache)) - MAX_ROWS
+    if overflow > 0:
+        oldest = await session.scalar(select(MealAnalysisCache.accessed_at).order_by(
+            MealAnalysisCache.accessed_at
+        ).offset(overflow - 1).limit(1))
+        overflow = (await session.execute(delete(MealAnalysisCache).where(
+            MealAnalysisCache.accessed_at <= oldest
+        ))).rowcount
+    _stats['evictions'] += expired + max(overflow, 0)
+
+async def invalidate(query: Optional[str] = None, model: Optional[str] = None) -> int:
+    """Remove cached analyses. With no arguments everything is cleared.
+
+    Other workers stop serving them once their memory entries expire (MEMORY_TTL_SECONDS).
+    Returns the number of SQLite rows removed.
+    """
+    normalized = normalize_query(query) if query is not None else None
+    with _lock:
+        for key in list(_memory):
+            if (model is None or key[0] == model) and (normalized is None or key[1] == normalized):
+                del _memory[key]
+
+    stmt = delete(MealAnalysisCache)
+    if model is not None:
+        stmt = stmt.where(MealAnalysisCache.model == model)
+    if normalized is not None:
+        stmt = stmt.where(MealAnalysisCache.query == normalized)
+
+    async def remove(session):
+        return (await session.execute(stmt)).rowcount
+
+    removed = await write(remove)
+    logger.info(f"Invalidated {removed} meal analysis cache entries")
+    return removed
+
+def get_stats() -> dict:
+    hits = _stats['memory_hits'] + _stats['db_hits']
+    lookups = hits + _stats['misses']
+    return {
+        **_stats,
+        'memory_entries': len(_memory),
+        'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+    }
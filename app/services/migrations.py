@@ -0,0 +1,212 @@
+"""Versioned schema migrations, tracked in SQLite's PRAGMA user_version.
+
+Run once at startup (see app.main) or by hand:
+    python -m app.services.migrations [--status] [--check-plans]
+"""
+from app.models import Transaction
+from app.services import db_utils
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from pathlib import Path
+import argparse
+import logging
+import sys
+
+logger = logging.getLogger(__name__)
+
+# DDL is written out rather than generated from app.models, so each migration builds the
+# schema it was written against however the models have changed since
+
+# The tables create_tables() used to make on import, as they were when migrations began
+BASELINE_TABLES = [
+    """CREATE TABLE IF NOT EXISTS transactions (
+        id INTEGER NOT NULL,
+        user_id VARCHAR NOT NULL,
+        timestamp INTEGER NOT NULL,
+        name VARCHAR NOT NULL,
+        calories FLOAT,
+        total_fat FLOAT,
+        carbohydrates FLOAT,
+        protein FLOAT,
+        fiber FLOAT,
+        sugars FLOAT,
+        serving_size VARCHAR,
+        sodium FLOAT,
+        PRIMARY KEY (id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS meal_analysis_cache (
+        model VARCHAR NOT NULL,
+        "query" VARCHAR NOT NULL,
+        response TEXT NOT NULL,
+        created_at INTEGER NOT NULL,
+        accessed_at INTEGER NOT NULL,
+        hits INTEGER NOT NULL,
+        PRIMARY KEY (model, "query")
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_meal_analysis_cache_accessed_at ON meal_analysis_cache (accessed_at)",
+    """CREATE TABLE IF NOT EXISTS meal_images (
+        name VARCHAR NOT NULL,
+        image_url VARCHAR,
+        created_at INTEGER NOT NULL,
+        PRIMARY KEY (name)
+    )""",
+    """CREATE TABLE IF NOT EXISTS daily_totals (
+        user_id VARCHAR NOT NULL,
+        day VARCHAR NOT NULL,
+        meal_count INTEGER NOT NULL,
+        calories FLOAT NOT NULL,
+        total_fat FLOAT NOT NULL,
+        carbohydrates FLOAT NOT NULL,
+        protein FLOAT NOT NULL,
+        fiber FLOAT NOT NULL,
+        sugars FLOAT NOT NULL,
+        sodium FLOAT NOT NULL,
+        PRIMARY KEY (user_id, day)
+    )""",
+]
+
+def _baseline(connection):
+    """Tables that used to be created by create_tables() on import."""
+    for ddl in BASELINE_TABLES:
+        connection.exec_driver_sql(ddl)
+
+def _transactions_user_timestamp_index(connection):
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_transactions_user_id_timestamp "
+        "ON transactions (user_id, timestamp)"
+    )
+
+def _backfill_daily_totals(connection):
+    # Transactions had no local_date column yet at this version
+    db_utils.rebuild_daily_totals(session=Session(bind=connection), day=func.local_date(Transaction.timestamp))
+
+def _user_data_versions(connection):
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS user_data_versions ("
+        "user_id VARCHAR NOT NULL, version INTEGER NOT NULL, PRIMARY KEY (user_id))"
+    )
+
+def _local_dates(connection):
+    """Per-user time zones, and each meal's local date stored rather than recomputed per query."""
+    connection.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS user_settings ("
+        "user_id VARCHAR NOT NULL, time_zone VARCHAR NOT NULL, PRIMARY KEY (user_id))"
+    )
+    columns = [row[1] for row in connection.exec_driver_sql("PRAGMA table_info(transactions)")]
+    if 'local_date' not in columns:
+        connection.exec_driver_sql("ALTER TABLE transactions ADD COLUMN local_date VARCHAR")
+    # Every meal so far was logged under the default time zone (see db_utils.local_date)
+    connection.exec_driver_sql("UPDATE transactions SET local_date = local_date(timestamp) WHERE local_date IS NULL")
+    connection.exec_driver_sql(
+        "CREATE INDEX IF NOT EXISTS ix_transactions_user_id_local_date "
+        "ON transactions (user_id, local_date)"
+    )
+
+def _user_streaks(connection):
+    connection.exec_driver_sql("""CREATE TABLE IF NOT EXISTS user_streaks (
+        user_id VARCHAR NOT NULL,
+        kind VARCHAR NOT NULL,
+        threshold FLOAT,
+        current INTEGER NOT NULL,
+        longest INTEGER NOT NULL,
+        prior_longest INTEGER NOT NULL,
+        previous_current INTEGER NOT NULL,
+        previous_met VARCHAR,
+        last_met VARCHAR,
+        last_day VARCHAR,
+        PRIMARY KEY (user_id, kind)
+    )""")
+    db_utils.rebuild_streaks(session=Session(bind=connection))
+
+# (version, description, function) in the order they must be applied; never renumber
+MIGRATIONS = [
+    (1, "baseline tables", _baseline),
+    (2, "composite (user_id, timestamp) index on transactions", _transactions_user_timestamp_index),
+    (3, "backfill daily_totals rollup", _backfill_daily_totals),
+    (4, "per-user data versions for response caching", _user_data_versions),
+    (5, "per-user time zones and an indexed local_date on transactions", _local_dates),
+    (6, "incrementally maintained streak counters", _user_streaks),
+]
+
+# Hot queries and the index each one must use; see check_query_plans()
+HOT_QUERIES = [
+    (
+        "daily meals",
+        "SELECT * FROM transactions WHERE user_id = ? AND local_date BETWEEN ? AND ? ORDER BY timestamp DESC",
+        ("user", "2000-01-01", "2000-01-07"),
+        "ix_transactions_user_id_local_date",
+    ),
+    (
+        "meal history page",
+        "SELECT id, timestamp FROM transactions WHERE user_id = ? AND (timestamp, id) < (?, ?) "
+        "ORDER BY timestamp DESC, id DESC LIMIT 51",
+        ("user", 1, 1),
+        "ix_transactions_user_id_timestamp",
+    ),
+    (
+        "meal delete lookup",
+        "SELECT * FROM transactions WHERE id = ? AND user_id = ?",
+        (1, "user"),
+        "INTEGER PRIMARY KEY",
+    ),
+    (
+        "daily totals range",
+        "SELECT * FROM daily_totals WHERE user_id = ? AND day BETWEEN ? AND ?",
+        ("user", "2000-01-01", "2000-01-31"),
+        "sqlite_autoindex_daily_totals_1",
+    ),
+]
+
+def get_version(connection) -> int:
+    return connection.exec_driver_sql("PRAGMA user_version").scalar()
+
+def migrate(engine=None) -> int:
+    """Apply any pending migrations in order and return the resulting schema version."""
+    engine = engine or db_utils.engine
+    Path(db_utils.DATABASE).parent.mkdir(exist_ok=True)
+    with engine.connect() as connection:
+        version = get_version(connection)
+
+    for target, description, apply in MIGRATIONS:
+        if target <= version:
+            continue
+        logger.info(f"Applying migration {target}: {description}")
+        with engine.begin() as connection:
+            apply(connection)
+            connection.exec_driver_sql(f"PRAGMA user_version = {target}")
+        version = target
+    return version
+
+def check_query_plans(engine=None) -> list:
+    """Return a description of every hot query whose plan no longer searches its index.
+
+    A full scan fails too, even one that walks the expected index ("SCAN ... USING INDEX").
+    """
+    engine = engine or db_utils.engine
+    failures = []
+    with engine.connect() as connection:
+        for name, sql, params, expected_index in HOT_QUERIES:
+            plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+            if not any(step.startswith("SEARCH") and expected_index in step for step in plan) \
+                    or any(step.startswith("SCAN") for step in plan):
+                failures.append(f"{name}: expected a search of {expected_index}, got {plan}")
+    return failures
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Database schema migrations")
+    parser.add_argument("--status", action="store_true", help="print the current and latest schema version")
+    parser.add_argument("--check-plans", action="store_true", help="fail if a hot query stops using its index")
+    args = parser.parse_args()
+
+    if args.status:
+        with db_utils.engine.connect() as connection:
+            print(f"schema version {get_version(connection)} of {MIGRATIONS[-1][0]}")
+        sys.exit(0)
+
+    print(f"schema at version {migrate()}")
+    if args.check_plans:
+        failures = check_query_plans()
+        for failure in failures:
+            print(f"query plan regression - {failure}")
+        sys.exit(1 if failures else 0)
@@ -0,0 +1,225 @@
+"""Bundled nutrition table for common single foods, so they can be answered without the LLM.
+
+The table (app/data/nutrition_table.csv) holds one row per food with the fields
+in settings.nutrition per standard serving. Queries are matched on whole tokens
+and character trigrams, with word order counting for multi-word names; only
+confident matches on a single food are answered, everything else (unknown or
+compound meals) returns None and goes to the LLM.
+"""
+from app.core.config import settings
+from app.services.meal_cache import normalize_query
+from pathlib import Path
+from typing import Optional
+import csv
+import logging
+import re
+import threading
+import zlib
+
+logger = logging.getLogger(__name__)
+
+TABLE_PATH = Path(__file__).resolve().parent.parent / 'data' / 'nutrition_table.csv'
+ENABLED = settings.nutrition_index.get('enabled', True)
+MIN_CONFIDENCE = settings.nutrition_index.get('min_confidence', 0.8)
+# Scales a fuzzy match whose shared words are in a different order ("chocolate milk" vs "milk chocolate")
+REORDER_PENALTY = 0.7
+
+# Contract fields of an analysis (see MEAL_JSON_FORMAT in the calorie_count routes)
+NUMERIC_FIELDS = ['calories', 'total_fat', 'carbohydrates', 'protein', 'fiber', 'sugars', 'sodium']
+
+NUMBER_WORDS = {
+    'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+    'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'half': 0.5, 'half a': 0.5, 'half an': 0.5, 'a couple of': 2,
+}
+# Weight units, in grams
+GRAM_UNITS = {
+    'g': 1, 'gram': 1, 'grams': 1, 'kg': 1000, 'oz': 28.35, 'ounce': 28.35, 'ounces': 28.35,
+    'lb': 453.6, 'lbs': 453.6, 'pound': 453.6, 'pounds': 453.6,
+}
+# Units that mean "this many of the table's serving"
+SERVING_UNITS = {'serving', 'servings', 'portion', 'portions', 'cup', 'cups', 'glass', 'glasses', 'bowl', 'bowls'}
+
+_QUANTITY_RE = re.compile(
+    r'^(?P<amount>\d+/\d+|\d+(?:\.\d+)?|' + '|'.join(sorted(map(re.escape, NUMBER_WORDS), key=len, reverse=True)) + r')'
+    r'\s*(?P<unit>' + '|'.join(sorted(map(re.escape, list(GRAM_UNITS) + list(SERVING_UNITS)), key=len, reverse=True)) + r')?\b'
+    r'\s*(?:of\s+)?(?P<food>.*)$'
+)
+# Anything that joins several foods is left to the LLM, unless the whole phrase is in the table
+_COMPOUND_RE = re.compile(r',|&|\+|\bw/|\b(?:and|with|plus|on|in|topped)\b')
+_STOPWORDS = {'of', 'the', 'some', 'fresh', 'plain', 'large', 'medium', 'small', 'piece', 'pieces', 'slice', 'slices'}
+
+HEALTHY_MESSAGES = [
+    "Great pick! {name} is a nutritious choice that fits well into a balanced day.",
+    "Nice choice - {name} brings good nutrition without much baggage.",
+    "Well done! {name} is the kind of everyday food that adds up to better health.",
+]
+UNHEALTHY_MESSAGES = [
+    "{name} is fine as a treat - balance it with vegetables or lean protein later today.",
+    "Enjoy your {name}! Keeping portions moderate makes it easy to stay on track.",
+    "{name} is on the indulgent side, but every logged meal builds awareness. Keep it up!",
+]
+
+_lock = threading.Lock()
+_index = None
+
+def _singular(token: str) -> str:
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 4 and token.endswith(('oes', 'ches', 'shes')):
+        return token[:-2]
+    if len(token) > 3 and token.endswith('s') and not token.endswith(('ss', 'us')):
+        return token[:-1]
+    return token
+
+def _tokens(text: str) -> tuple:
+    words = re.findall(r"[a-z0-9%]+", text)
+    return tuple(_singular(word) for word in words if word not in _STOPWORDS)
+
+def _trigrams(tokens: tuple) -> frozenset:
+    text = f" {' '.join(tokens)} "
+    return frozenset(text[i:i + 3] for i in range(len(text) - 2))
+
+class NutritionIndex:
+    """Foods from the table, with a token and trigram inverted index over their names and aliases."""
+
+    def __init__(self, rows: list):
+        self.foods = []
+        self.exact = {}       # alias tokens -> food id
+        self.aliases = []     # (food id, tokens, trigrams)
+        self.by_token = {}    # token -> alias ids
+        self.by_trigram = {}  # trigram -> alias ids
+        for row in rows:
+            food_id = len(self.foods)
+            self.foods.append(self._parse_row(row))
+            names = [row['name']] + [alias for alias in row['aliases'].split('|') if alias]
+            for name in names:
+                tokens = _tokens(normalize_query(name))
+                grams = _trigrams(tokens)
+                alias_id = len(self.aliases)
+                self.aliases.append((food_id, tokens, grams))
+                self.exact.setdefault(tokens, food_id)
+                for token in tokens:
+                    self.by_token.setdefault(token, []).append(alias_id)
+                for gram in grams:
+                    self.by_trigram.setdefault(gram, []).append(alias_id)
+
+    @staticmethod
+    def _parse_row(row: dict) -> dict:
+        food = {
+            'name': row['name'],
+            'food_group': row['food group'],
+            'serving_size': row['serving size'],
+            'serving_grams': float(row['serving grams']),
+            'unit_grams': float(row['unit grams']) if row['unit grams'] else None,
+            'healthy': row['healthy'] == 'true',
+        }
+        for field in settings.nutrition:
+            if field not in ('name', 'food group', 'serving size'):
+                food[field.replace(' ', '_')] = float(row[field])
+        return food
+
+    def match(self, food_text: str):
+        """Return (food, confidence) for the closest entry, or (None, 0.0)."""
+        tokens = _tokens(food_text)
+        if not tokens:
+            return None, 0.0
+        if tokens in self.exact:
+            return self.foods[self.exact[tokens]], 1.0
+
+        grams = _trigrams(tokens)
+        candidates = set()
+        for token in tokens:
+            candidates.update(self.by_token.get(token, ()))
+        for gram in grams:
+            candidates.update(self.by_trigram.get(gram, ()))
+
+        best, best_score = None, 0.0
+        query_tokens = set(tokens)
+        for alias_id in candidates:
+            food_id, alias_tokens, alias_grams = self.aliases[alias_id]
+            alias_set = set(alias_tokens)
+            token_score = len(query_tokens & alias_set) / len(query_tokens | alias_set)
+            gram_score = 2 * len(grams & alias_grams) / (len(grams) + len(alias_grams))
+            score = 0.4 * token_score + 0.6 * gram_score
+            shared = [token for token in tokens if token in alias_set]
+            if len(shared) > 1 and shared != [token for token in alias_tokens if token in query_tokens]:
+                score *= REORDER_PENALTY
+            if score > best_score:
+                best, best_score = food_id, score
+        return (self.foods[best], best_score) if best is not None else (None, 0.0)
+
+def get_index() -> NutritionIndex:
+    """Load the table on first use."""
+    global _index
+    if _index is None:
+        with _lock:
+            if _index is None:
+                with open(TABLE_PATH, newline='') as f:
+                    _index = NutritionIndex(list(csv.DictReader(f)))
+                logger.info(f"Loaded {len(_index.foods)} foods into the nutrition index")
+    return _index
+
+def parse_quantity(text: str):
+    """Split "2 eggs" / "150g rice" / "a cup of milk" into (amount, unit, food text)."""
+    match = _QUANTITY_RE.match(text)
+    if not match or not match.group('food'):
+        return 1, None, text
+    amount = match.group('amount')
+    if amount in NUMBER_WORDS:
+        amount = NUMBER_WORDS[amount]
+    elif '/' in amount:
+        numerator, denominator = amount.split('/')
+        amount = float(numerator) / float(denominator) if float(denominator) else 1
+    else:
+        amount = float(amount)
+    return amount, match.group('unit'), match.group('food')
+
+def _serving_factor(food: dict, amount: float, unit: Optional[str]):
+    """How many table servings the quantity is, and how to describe it; None if the table can't tell."""
+    if unit in GRAM_UNITS:
+        grams = amount * GRAM_UNITS[unit]
+        return grams / food['serving_grams'], f"{grams:g}g"
+    if unit is None and food['unit_grams']:
+        # A count of whole items ("2 eggs")
+        factor = amount * food['unit_grams'] / food['serving_grams']
+    elif unit is None and amount != 1:
+        # A count of something the table only knows by the serving ("20 grapes" is not 20 cups)
+        return None
+    else:
+        factor = amount
+    if factor == 1:
+        return factor, food['serving_size']
+    return factor, f"{amount:g} x {food['serving_size']}"
+
+def _health_analysis(food: dict) -> dict:
+    messages = HEALTHY_MESSAGES if food['healthy'] else UNHEALTHY_MESSAGES
+    # Stable choice per food so repeated lookups read the same
+    message = messages[zlib.crc32(food['name'].encode()) % len(messages)]
+    return {'is_healthy': food['healthy'], 'message': message.format(name=food['name'].capitalize())}
+
+def lookup(query: str) -> Optional[dict]:
+    """Analysis for a single common food, in the same shape as the LLM's, or None if not confident."""
+    if not ENABLED:
+        return None
+    index = get_index()
+    text = normalize_query(query)
+    amount, unit, food_text = parse_quantity(text)
+
+    food, confidence = index.match(food_text)
+    if confidence < 1.0 and _COMPOUND_RE.search(food_text):
+        return None
+    if food is None or confidence < MIN_CONFIDENCE or amount <= 0:
+        logger.debug("No local nutrition match for %r (best %.2f)", query, confidence)
+        return None
+
+    serving = _serving_factor(food, amount, unit)
+    if serving is None:
+        logger.debug("No serving size for %r in the nutrition table", query)
+        return None
+    factor, serving_size = serving
+    meal_data = {'name': food['name']}
+    for field in NUMERIC_FIELDS:
+        meal_data[field] = round(food[field] * factor, 1)
+    meal_data['serving_size'] = serving_size
+    meal_data['health_analysis'] = _health_analysis(food)
+    return meal_data
@@ -0,0 +1,73 @@
+"""Closed-form daily targets (RDA) from a user's profile: Mifflin-St Jeor BMR, an activity
+multiplier for TDEE, and a calorie deficit or surplus that reaches the target weight by the
+target date. Macronutrients are split from the calorie target.
+"""
+from datetime import date
+from functools import lru_cache
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# TDEE = BMR x multiplier, keyed on the profile form's activity levels
+ACTIVITY_MULTIPLIERS = {
+    'sedentary': 1.2,
+    'light': 1.375,
+    'moderate': 1.55,
+    'very': 1.725,
+    'extra': 1.9,
+}
+# Mifflin-St Jeor sex constant; unknown uses the midpoint
+SEX_OFFSETS = {'male': 5, 'female': -161}
+UNKNOWN_SEX_OFFSET = -78
+
+KCAL_PER_KG = 7700
+MAX_DAILY_DEFICIT = 1000   # about 1 kg a week
+MAX_DAILY_SURPLUS = 500
+MIN_CALORIES = 1200
+
+FAT_SHARE = 0.30            # of calories
+FIBER_PER_1000_KCAL = 14    # grams
+PROTEIN_PER_KG = 1.2        # grams per kg of body weight
+PROTEIN_PER_KG_DEFICIT = 1.6
+
+def bmr(age: int, height_cm: float, weight_kg: float, gender: Optional[str]) -> float:
+    """Basal metabolic rate in kcal/day (Mifflin-St Jeor)."""
+    offset = SEX_OFFSETS.get((gender or '').lower(), UNKNOWN_SEX_OFFSET)
+    return 10 * weight_kg + 6.25 * height_cm - 5 * age + offset
+
+def daily_adjustment(weight_kg: float, target_weight_kg: float, days: int) -> float:
+    """kcal/day to add (negative for a deficit) to reach the target weight in `days`."""
+    if days <= 0:
+        return 0.0
+    adjustment = (target_weight_kg - weight_kg) * KCAL_PER_KG / days
+    return max(-MAX_DAILY_DEFICIT, min(MAX_DAILY_SURPLUS, adjustment))
+
+@lru_cache(maxsize=4096)
+def calculate_rda(age: int, height_cm: float, weight_kg: float, target_weight_kg: float,
+                  target_date: str, activity_level: str, gender: Optional[str], today: date) -> dict:
+    """Daily calories and macronutrient targets, in the /calculate-rda response format.
+
+    Raises ValueError for an unknown activity level or a malformed target date.
+    Memoized; `today` is part of the key because the deficit depends on the days left.
+    """
+    multiplier = ACTIVITY_MULTIPLIERS.get(activity_level.lower())
+    if multiplier is None:
+        raise ValueError(f"Unknown activity level: {activity_level}")
+    days = (date.fromisoformat(target_date) - today).days
+
+    tdee = bmr(age, height_cm, weight_kg, gender) * multiplier
+    adjustment = daily_adjustment(weight_kg, target_weight_kg, days)
+    calories = max(MIN_CALORIES, tdee + adjustment)
+
+    protein = weight_kg * (PROTEIN_PER_KG_DEFICIT if adjustment < 0 else PROTEIN_PER_KG)
+    fat = calories * FAT_SHARE / 9
+    carbohydrates = max(0.0, (calories - protein * 4 - fat * 9) / 4)
+    logger.debug("RDA: tdee=%.0f adjustment=%.0f over %d days", tdee, adjustment, days)
+    return {
+        'calories': round(calories),
+        'protein': round(protein),
+        'fat': round(fat),
+        'fiber': round(calories / 1000 * FIBER_PER_1000_KCAL),
+        'carbohydrates': round(carbohydrates),
+    }
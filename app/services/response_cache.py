@@ -0,0 +1,58 @@
+"""In-process cache of per-user read responses (totals, meals, history), keyed by ETag.
+
+An ETag is derived from the user, the endpoint and its resolved parameters, and
+the user's data version (see db_utils.get_data_version), which every meal insert
+or delete bumps in the same transaction. A write therefore changes the ETag of
+every affected response, so stale bodies are never looked up again and simply
+age out of the LRU. Because the version lives in SQLite, this stays correct
+across uvicorn workers.
+"""
+from app.core.config import settings
+from app.core.metrics import Counter
+from collections import OrderedDict
+from typing import Optional
+import hashlib
+import threading
+
+_cache_config = settings.cache.get('responses', {})
+ENABLED = _cache_config.get('enabled', True)
+MAX_ENTRIES = _cache_config.get('max_entries', 5000)
+
+responses = Counter(
+    "healthcheck_response_cache_total",
+    "Cacheable read responses by outcome (not_modified, hit, miss)",
+    ("outcome",)
+)
+
+_entries = OrderedDict()  # etag -> JSON body
+_lock = threading.Lock()
+
+def make_etag(user_id: str, key: tuple, version: int) -> str:
+    digest = hashlib.blake2b(repr((user_id, key)).encode(), digest_size=8).hexdigest()
+    return f'"{version}-{digest}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """True if an If-None-Match header names this ETag (weak comparison, as RFC 9110 requires)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+def get(etag: str) -> Optional[bytes]:
+    if not ENABLED:
+        return None
+    with _lock:
+        body = _entries.get(etag)
+        if body is not None:
+            _entries.move_to_end(etag)
+    return body
+
+def put(etag: str, body: bytes):
+    if not ENABLED:
+        return
+    with _lock:
+        _entries[etag] = body
+        _entries.move_to_end(etag)
+        while len(_entries) > MAX_ENTRIES:
+            _entries.popitem(last=False)
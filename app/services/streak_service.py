@@ -0,0 +1,182 @@
+"""Logging and under-threshold streaks, kept as per-user counters in user_streaks.
+
+Meal writes update the counters in the same transaction (see db_utils) from the
+touched day's daily_totals row, in O(1): extending, restarting or trimming the
+run that ends at the latest day. Adds that can't change a streak (a later meal
+that crosses no threshold) skip even that. An edit to an earlier day or a
+changed threshold falls back to a recompute, which reads the user's
+daily_totals rows (one per logged day, never the raw transactions); rebuild()
+does the same for every user, and is the way to apply new thresholds at once.
+
+A day counts for "logging" when it has meals, and for a nutrient when it has
+meals and the day's total is at or under that nutrient's threshold.
+"""
+from app.core.config import settings
+from app.models import DailyTotal, UserStreak
+from datetime import date, timedelta
+from itertools import groupby
+from sqlalchemy import bindparam, delete, select
+from sqlalchemy.dialects.sqlite import insert
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOGGING = 'logging'
+THRESHOLDS = {kind: float(limit) for kind, limit in
+              settings.streaks.get('thresholds', {'calories': 2000, 'sodium': 2300, 'sugars': 50}).items()}
+KINDS = [LOGGING, *THRESHOLDS]
+STATE_FIELDS = ['threshold', 'current', 'longest', 'prior_longest', 'previous_current', 'previous_met',
+                'last_met', 'last_day']
+
+_upsert = insert(UserStreak)
+_STREAK_UPSERT = _upsert.values(
+    user_id=bindparam('user_id'),
+    kind=bindparam('kind'),
+    **{field: bindparam(field) for field in STATE_FIELDS}
+).on_conflict_do_update(
+    index_elements=[UserStreak.user_id, UserStreak.kind],
+    set_={field: _upsert.excluded[field] for field in STATE_FIELDS}
+)
+
+def _previous(day: str) -> str:
+    return (date.fromisoformat(day) - timedelta(days=1)).isoformat()
+
+def initial(kind: str) -> dict:
+    return {'threshold': THRESHOLDS.get(kind), 'current': 0, 'longest': 0, 'prior_longest': 0,
+            'previous_current': 0, 'previous_met': None, 'last_met': None, 'last_day': None}
+
+def qualifies(kind: str, totals) -> bool:
+    """Whether a day's daily_totals row (None if nothing was logged) keeps `kind`'s streak going."""
+    if totals is None or not totals.meal_count or totals.meal_count <= 0:
+        return False
+    return kind == LOGGING or (getattr(totals, kind) or 0) <= THRESHOLDS[kind]
+
+def affected(totals, added: dict, meals: int) -> bool:
+    """Whether adding `meals` meals with nutrient sums `added` to a day, giving its daily_totals row
+    `totals`, can change any streak: only a day's first meals or crossing a threshold can."""
+    if totals.meal_count <= meals:
+        return True
+    # Compared with a little slack, so float rounding can only cause a harmless extra update
+    return any(getattr(totals, kind) > limit and getattr(totals, kind) - (added.get(kind) or 0) <= limit + 1e-6
+               for kind, limit in THRESHOLDS.items())
+
+def advance(kind: str, state: dict, day: str, met: bool):
+    """State after `day` (re)evaluated to `met`, or None if only a recompute can tell."""
+    if state['threshold'] != THRESHOLDS.get(kind) or (state['last_day'] and day < state['last_day']):
+        return None
+    state = dict(state)
+    if met:
+        if state['last_met'] != day:
+            if state['last_met'] == _previous(day):
+                state['current'] += 1
+            else:
+                state['prior_longest'] = state['longest']
+                state['previous_current'], state['previous_met'] = state['current'], state['last_met']
+                state['current'] = 1
+            state['last_met'] = day
+    elif state['last_met'] == day:
+        if state['current'] > 1:
+            state['current'] -= 1
+            state['last_met'] = _previous(day)
+        else:
+            # The run was only this day, so the one before it (already counted in prior_longest) is current again
+            state['current'], state['last_met'] = state['previous_current'], state['previous_met']
+    state['longest'] = max(state['prior_longest'], state['current'])
+    state['last_day'] = day
+    return state
+
+def compute(rows) -> dict:
+    """{kind: state} from a user's daily_totals rows in day order."""
+    states = {kind: initial(kind) for kind in KINDS}
+    for row in rows:
+        for kind in KINDS:
+            states[kind] = advance(kind, states[kind], row.day, qualifies(kind, row))
+    return states
+
+def _state(row) -> dict:
+    return {field: getattr(row, field) for field in STATE_FIELDS}
+
+def _replace_rows(user_uuid: str, states: dict) -> list:
+    return [{'user_id': user_uuid, 'kind': kind, **state} for kind, state in states.items()]
+
+# Core rows, not ORM objects: the writer's session is shared by a batch of ops, and
+# identity-mapped objects would not see the other ops' Core upserts
+_daily_totals = DailyTotal.__table__
+_user_streaks = UserStreak.__table__
+
+async def _recompute(session, user_uuid: str):
+    rows = await session.execute(
+        select(_daily_totals).where(_daily_totals.c.user_id == user_uuid).order_by(_daily_totals.c.day)
+    )
+    await session.execute(delete(UserStreak).where(UserStreak.user_id == user_uuid))
+    await session.execute(_STREAK_UPSERT, _replace_rows(user_uuid, compute(rows)))
+
+async def update(session, user_uuid: str, days, totals: dict = None):
+    """Bring a user's streaks up to date after writes to `days`; call after their daily_totals rows are.
+
+    totals maps those days to their daily_totals rows when the caller already has them.
+    """
+    days = sorted(set(days))
+    states = {row.kind: _state(row) for row in await session.execute(
+        select(_user_streaks).where(_user_streaks.c.user_id == user_uuid)
+    )}
+    if totals is None:
+        totals = {row.day: row for row in await session.execute(
+            select(_daily_totals).where(_daily_totals.c.user_id == user_uuid, _daily_totals.c.day.in_(days))
+        )}
+
+    changed = {}
+    for kind in KINDS:
+        state = states.get(kind) or initial(kind)
+        for day in days:
+            state = advance(kind, state, day, qualifies(kind, totals.get(day)))
+            if state is None:
+                return await _recompute(session, user_uuid)
+        if state != states.get(kind):
+            changed[kind] = state
+    if changed:
+        await session.execute(_STREAK_UPSERT, _replace_rows(user_uuid, changed))
+
+def rebuild(session, user_uuid: str = None) -> int:
+    """Recompute streaks from daily_totals with a synchronous session (not committed). Returns users written."""
+    rows = select(_daily_totals).order_by(_daily_totals.c.user_id, _daily_totals.c.day)
+    deleted = delete(UserStreak)
+    if user_uuid is not None:
+        rows = rows.where(_daily_totals.c.user_id == user_uuid)
+        deleted = deleted.where(UserStreak.user_id == user_uuid)
+    # Read everything before writing: the session may be on a single connection
+    rows = session.execute(rows).all()
+    session.execute(deleted)
+
+    users, batch = 0, []
+    for user, user_rows in groupby(rows, key=lambda row: row.user_id):
+        batch.extend(_replace_rows(user, compute(user_rows)))
+        users += 1
+        if len(batch) >= 10000:
+            session.execute(_STREAK_UPSERT, batch)
+            batch = []
+    if batch:
+        session.execute(_STREAK_UPSERT, batch)
+    return users
+
+def summarize(rows, today: date) -> dict:
+    """The streaks response from a user's user_streaks rows.
+
+    A streak is current while its last qualifying day is today or yesterday.
+    """
+    states = {row.kind: _state(row) for row in rows}
+    states = {kind: states.get(kind) or initial(kind) for kind in KINDS}
+    yesterday = (today - timedelta(days=1)).isoformat()
+    last_logged = states[LOGGING]['last_met']
+    return {
+        'date': today.isoformat(),
+        'last_logged_day': last_logged,
+        # Thresholds met on the latest logged day
+        'thresholds_met': [kind for kind in THRESHOLDS if last_logged and states[kind]['last_met'] == last_logged],
+        'streaks': {kind: {
+            'current': state['current'] if state['last_met'] and state['last_met'] >= yesterday else 0,
+            'longest': state['longest'],
+            'last_met': state['last_met'],
+            'threshold': state['threshold'],
+        } for kind, state in states.items()},
+    }
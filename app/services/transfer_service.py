@@ -0,0 +1,175 @@
+"""Bulk export and import of a user's transactions as NDJSON or CSV.
+
+Both directions stream: exports walk the table in keyset-paginated chunks and
+imports parse the request body incrementally, validating each row against the
+Transaction columns and inserting in large batches through the writer. Nothing
+goes near the LLM, and memory stays flat however long the history is.
+"""
+from app.core.config import settings
+from app.models import NUTRIENT_FIELDS
+from app.services import db_utils
+from datetime import date, datetime, timezone
+from typing import AsyncIterator
+import codecs
+import csv
+import io
+import json
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+COLUMNS = [column.name for column in db_utils.TRANSFER_COLUMNS]
+EXPORT_CHUNK_ROWS = settings.database.get('export_chunk_rows', 1000)
+IMPORT_BATCH_ROWS = settings.database.get('import_batch_rows', 5000)
+# Columns an export of another database may carry that an import ignores
+IGNORED_COLUMNS = {'id', 'user_id'}
+MAX_REPORTED_ERRORS = 20
+MAX_TEXT_LENGTH = 500
+# Latest timestamp a local date can be computed for in any time zone (datetime stops at year 9999)
+MAX_TIMESTAMP = int(datetime(9999, 12, 30, tzinfo=timezone.utc).timestamp())
+
+def validate_row(raw: dict) -> dict:
+    """A transaction row from untrusted input, or ValueError saying what is wrong with it."""
+    if not isinstance(raw, dict):
+        raise ValueError("expected an object")
+    unknown = set(raw) - set(COLUMNS) - IGNORED_COLUMNS
+    if unknown:
+        raise ValueError(f"unknown column(s): {', '.join(sorted(unknown))}")
+
+    row = {}
+    timestamp = raw.get('timestamp')
+    try:
+        if isinstance(timestamp, bool):
+            raise TypeError
+        row['timestamp'] = int(float(timestamp)) if isinstance(timestamp, str) else int(timestamp)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("timestamp must be a Unix timestamp")
+    if not 0 < row['timestamp'] <= MAX_TIMESTAMP:
+        raise ValueError(f"timestamp must be between 1 and {MAX_TIMESTAMP}")
+
+    for field in ('name', 'serving_size'):
+        value = raw.get(field)
+        value = None if value is None or value == '' else str(value).strip()
+        if value and len(value) > MAX_TEXT_LENGTH:
+            raise ValueError(f"{field} is longer than {MAX_TEXT_LENGTH} characters")
+        row[field] = value
+    if not row['name']:
+        raise ValueError("name is required")
+
+    # Optional: the day the meal was logged on where its user was; filled from the time zone if absent
+    day = raw.get('local_date')
+    if day is None or day == '':
+        row['local_date'] = None
+    else:
+        try:
+            row['local_date'] = date.fromisoformat(str(day)).isoformat()
+        except ValueError:
+            row['local_date'] = None
+        # fromisoformat also takes "20200101" and week dates; only the form exports write is accepted
+        if row['local_date'] != str(day):
+            raise ValueError("local_date must be a YYYY-MM-DD date")
+
+    for field in NUTRIENT_FIELDS:
+        value = raw.get(field)
+        if value is None or value == '':
+            row[field] = None
+            continue
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{field} must be a number")
+        if not math.isfinite(value) or value < 0:
+            raise ValueError(f"{field} must be a non-negative number")
+        row[field] = value
+    return row
+
+async def export_transactions(user_uuid: str, fmt: str) -> AsyncIterator[str]:
+    """Text chunks of a user's history in `fmt`, one chunk per database read."""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(COLUMNS)
+        yield buffer.getvalue()
+    async for rows in db_utils.iter_transactions(user_uuid, EXPORT_CHUNK_ROWS):
+        if fmt == 'csv':
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue()
+        else:
+            yield ''.join(json.dumps(dict(zip(COLUMNS, row))) + '\n' for row in rows)
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Decode a byte stream as UTF-8 and split it into lines without holding more than one chunk."""
+    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    pending = ''
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+async def _records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[tuple]:
+    """(line number, raw row or the ValueError it failed with) for each record in the body."""
+    if fmt == 'ndjson':
+        number = 0
+        async for line in lines:
+            number += 1
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield number, ValueError(f"invalid JSON: {e.msg}")
+        return
+
+    header, record, start, number = None, '', 0, 0
+    async for line in lines:
+        number += 1
+        record = f"{record}\n{line}" if record else line
+        start = start or number
+        # A quoted field may contain newlines; the record is complete once its quotes balance
+        if record.count('"') % 2:
+            continue
+        text, first, record, start = record.rstrip('\r'), start, '', 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+        elif len(values) != len(header):
+            yield first, ValueError(f"expected {len(header)} fields, got {len(values)}")
+        else:
+            yield first, dict(zip(header, values))
+    if record:
+        yield start, ValueError("unterminated quoted field")
+
+async def import_transactions(user_uuid: str, chunks: AsyncIterator[bytes], fmt: str, dry_run: bool = False) -> dict:
+    """Validate and insert every row of an NDJSON or CSV body; invalid rows are skipped and reported.
+
+    Rows are committed IMPORT_BATCH_ROWS at a time, so an interrupted import keeps
+    the batches before the interruption.
+    """
+    batch, imported, rejected, errors = [], 0, 0, []
+    async for number, raw in _records(_lines(chunks), fmt):
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+            batch.append(validate_row(raw))
+        except ValueError as e:
+            rejected += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({'line': number, 'error': str(e)})
+            continue
+        if len(batch) >= IMPORT_BATCH_ROWS:
+            imported += len(batch) if dry_run else await db_utils.import_transactions(user_uuid, batch)
+            batch = []
+    if batch:
+        imported += len(batch) if dry_run else await db_utils.import_transactions(user_uuid, batch)
+
+    logger.info(f"Imported {imported} transactions for user {user_uuid} ({rejected} rejected, dry run: {dry_run})")
+    return {'imported': imported, 'rejected': rejected, 'errors': errors, 'dry_run': dry_run}
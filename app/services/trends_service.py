@@ -0,0 +1,153 @@
+"""Trend analytics over a user's per-day totals: rolling averages, weekly and monthly
+rollups, percent of RDA and macro energy ratios, returned as compact column arrays.
+
+Everything comes from one range read of the daily_totals rollup (see
+db_utils.get_daily_columns) and is computed column-wise with prefix sums, so
+each statistic is a single linear pass and a year costs about what a week does.
+Averages are per logged day: days with no meals are untracked, not zero-calorie.
+"""
+from app.models import NUTRIENT_FIELDS
+from app.services import db_utils
+from datetime import date, timedelta
+from itertools import accumulate
+from typing import Optional
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+# Used when the client doesn't send its own targets; same reference values as static/js/trends.js
+DEFAULT_RDA = {
+    'calories': 2000,
+    'protein': 50,
+    'carbohydrates': 130,
+    'total_fat': 65,
+    'sodium': 2300,
+    'fiber': 25,
+}
+ROLLING_WINDOWS = (7, 30)
+KCAL_PER_GRAM = {'protein': 4, 'carbohydrates': 4, 'total_fat': 9}
+MAX_DAYS = 3660
+DEFAULT_MAX_POINTS = 120
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+def _prefix_sums(values: list) -> list:
+    return list(accumulate(values, initial=0))
+
+def rolling_mean(sums: list, counts: list, window: int) -> list:
+    """Trailing `window`-day mean over logged days, from prefix sums of values and of logged days.
+
+    None where the window has no logged days.
+    """
+    means = []
+    for i in range(1, len(sums)):
+        lo = max(0, i - window)
+        logged = counts[i] - counts[lo]
+        means.append((sums[i] - sums[lo]) / logged if logged else None)
+    return means
+
+def macro_ratios(protein: float, carbohydrates: float, total_fat: float) -> dict:
+    """Percent of macronutrient energy from protein, carbohydrates and fat."""
+    kcal = {
+        'protein': protein * KCAL_PER_GRAM['protein'],
+        'carbohydrates': carbohydrates * KCAL_PER_GRAM['carbohydrates'],
+        'total_fat': total_fat * KCAL_PER_GRAM['total_fat'],
+    }
+    total = sum(kcal.values())
+    return {name: round(100 * value / total, 1) if total else None for name, value in kcal.items()}
+
+def _periods(dates: list, key) -> list:
+    """(label, first index, end index) of each run of consecutive days with the same key."""
+    periods = []
+    for i, day in enumerate(dates):
+        label = key(day)
+        if periods and periods[-1][0] == label:
+            periods[-1][2] = i + 1
+        else:
+            periods.append([label, i, i + 1])
+    return periods
+
+def _week_start(day: date) -> str:
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+def _rollup(periods: list, sums: dict, logged_counts: list, rda: dict) -> dict:
+    """Average per logged day, percent of RDA and macro ratios for each period, as columns."""
+    columns = {'period': [], 'logged_days': [], **{field: [] for field in NUTRIENT_FIELDS},
+               'pct_rda': {field: [] for field in rda}, 'macros': {name: [] for name in KCAL_PER_GRAM}}
+    for label, lo, hi in periods:
+        logged = logged_counts[hi] - logged_counts[lo]
+        averages = {field: (sums[field][hi] - sums[field][lo]) / logged if logged else None
+                    for field in NUTRIENT_FIELDS}
+        columns['period'].append(label)
+        columns['logged_days'].append(logged)
+        for field in NUTRIENT_FIELDS:
+            columns[field].append(_round(averages[field]))
+        for field, target in rda.items():
+            columns['pct_rda'][field].append(_round(100 * averages[field] / target) if logged else None)
+        ratios = macro_ratios(*(averages[name] or 0 for name in KCAL_PER_GRAM))
+        for name, ratio in ratios.items():
+            columns['macros'][name].append(ratio)
+    return columns
+
+def downsample(columns: dict, max_points: int) -> tuple:
+    """Average each column over consecutive buckets of days so no series is longer than max_points.
+
+    Returns (columns, days per point); each point is labelled with its bucket's first date.
+    """
+    size = len(columns['date'])
+    step = max(1, math.ceil(size / max_points))
+    if step == 1:
+        return columns, 1
+
+    def bucket_mean(values):
+        present = [value for value in values if value is not None]
+        return sum(present) / len(present) if present else None
+
+    sampled = {'date': columns['date'][::step]}
+    for name, values in columns.items():
+        if name != 'date':
+            sampled[name] = [bucket_mean(values[i:i + step]) for i in range(0, size, step)]
+    return sampled, step
+
+async def get_trends(user_uuid: str, start_date: date, end_date: date, rda: Optional[dict] = None,
+                     max_points: int = DEFAULT_MAX_POINTS) -> dict:
+    """Daily series with rolling averages, plus weekly, monthly and whole-range rollups."""
+    rda = {field: target for field, target in {**DEFAULT_RDA, **(rda or {})}.items() if target}
+    # Read far enough back that the first day's rolling averages cover full windows
+    warmup = max(ROLLING_WINDOWS) - 1
+    data = await db_utils.get_daily_columns(user_uuid, start_date - timedelta(days=warmup), end_date)
+
+    logged = [1 if count else 0 for count in data['meal_count']]
+    logged_counts = _prefix_sums(logged)
+    sums = {field: _prefix_sums(data[field]) for field in NUTRIENT_FIELDS}
+
+    daily = {'date': data['date'][warmup:], 'meal_count': data['meal_count'][warmup:]}
+    for field in NUTRIENT_FIELDS:
+        # Unlogged days are None, not 0, so downsampled points average logged days only
+        daily[field] = [value if count else None
+                        for value, count in zip(data[field][warmup:], data['meal_count'][warmup:])]
+        for window in ROLLING_WINDOWS:
+            daily[f'{field}_avg{window}'] = rolling_mean(sums[field], logged_counts, window)[warmup:]
+    for field, target in rda.items():
+        daily[f'{field}_pct_rda'] = [100 * value / target if count else None
+                                     for value, count in zip(data[field][warmup:], data['meal_count'][warmup:])]
+    daily, resolution = downsample(daily, max_points)
+    daily = {name: values if name == 'date' else [_round(value) for value in values] for name, values in daily.items()}
+
+    # Rollups cover only the requested range, so drop the warm-up days from the prefix sums
+    range_sums = {field: [value - sums[field][warmup] for value in sums[field][warmup:]] for field in NUTRIENT_FIELDS}
+    range_logged = [value - logged_counts[warmup] for value in logged_counts[warmup:]]
+    dates = [start_date + timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+
+    return {
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'resolution_days': resolution,
+        'rda': rda,
+        'daily': daily,
+        'weekly': _rollup(_periods(dates, _week_start), range_sums, range_logged, rda),
+        'monthly': _rollup(_periods(dates, lambda day: day.strftime('%Y-%m')), range_sums, range_logged, rda),
+        'summary': _rollup([['all', 0, len(dates)]], range_sums, range_logged, rda),
+    }
@@ -0,0 +1,122 @@
+"""Single-writer group commit for SQLite.
+
+Writes are queued as `async def op(session, *args)` callables and applied by
+one writer task per process, many to a transaction: the writer takes whatever
+is queued (up to MAX_BATCH ops, waiting at most BATCH_WINDOW for more), runs
+the ops in one session and commits once. Each caller is answered after that
+commit. If the batch fails, the ops are retried one per transaction so one bad
+write can't fail its neighbours.
+"""
+from app.core.config import settings
+from app.core.metrics import Histogram, span
+from typing import Optional
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = settings.database.get('write_batch_size', 200)
+BATCH_WINDOW_SECONDS = settings.database.get('write_batch_window_ms', 2) / 1000
+
+batch_sizes = Histogram(
+    "healthcheck_db_write_batch_size",
+    "Writes committed together by the group-commit writer",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500)
+)
+
+_queue: Optional[asyncio.Queue] = None
+_writer: Optional[asyncio.Task] = None
+_session_factory = None
+
+def running() -> bool:
+    """True if a writer is running on the current event loop."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return _writer is not None and not _writer.done() and _writer.get_loop() is loop
+
+def enqueue(op, *args) -> asyncio.Future:
+    """Queue a write; the returned future resolves once it is committed."""
+    future = asyncio.get_running_loop().create_future()
+    _queue.put_nowait((op, args, future))
+    return future
+
+async def submit(op, *args):
+    """Queue a write and wait until it is committed; returns op's result or raises its exception."""
+    return await enqueue(op, *args)
+
+async def _apply(session, batch: list) -> list:
+    results = [await op(session, *args) for op, args, _ in batch]
+    await session.commit()
+    return results
+
+async def _write_batch(batch: list):
+    batch_sizes.observe(len(batch))
+    try:
+        with span("db.write_batch"):
+            async with _session_factory() as session:
+                results = await _apply(session, batch)
+        for (_, _, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+        return
+    except Exception as e:
+        if len(batch) == 1:
+            if not batch[0][2].done():
+                batch[0][2].set_exception(e)
+            return
+        logger.warning(f"Group commit of {len(batch)} writes failed ({e}), retrying them one at a time")
+
+    for item in batch:
+        await _write_batch([item])
+
+async def _collect(first) -> list:
+    """The first queued write plus whatever else arrives within the batch window."""
+    batch = [first]
+    deadline = asyncio.get_running_loop().time() + BATCH_WINDOW_SECONDS
+    while len(batch) < MAX_BATCH:
+        if not _queue.empty():
+            item = _queue.get_nowait()
+        else:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(_queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+        batch.append(item)
+        if item is None:  # stop() was called; nothing after it belongs to this writer
+            break
+    return batch
+
+async def _run():
+    while True:
+        first = await _queue.get()
+        if first is None:
+            return
+        batch = await _collect(first)
+        stop = batch[-1] is None
+        if stop:
+            batch.pop()
+        await _write_batch(batch)
+        if stop:
+            return
+
+async def start(session_factory):
+    """Start the writer on the running event loop; writes go through it until stop()."""
+    global _queue, _writer, _session_factory
+    _session_factory = session_factory
+    _queue = asyncio.Queue()
+    _writer = asyncio.create_task(_run())
+
+async def stop():
+    """Commit everything already queued, then stop the writer."""
+    global _writer
+    if _writer is None:
+        return
+    if not _writer.done():
+        await _queue.put(None)
+        await _writer
+    _writer = None
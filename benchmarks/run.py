@@ -0,0 +1,432 @@
+"""Load test the app against local upstream stubs and a seeded database.
+
+Boots benchmarks.stubs and app.main:app (uvicorn) in a scratch directory,
+drives the calorie_count and profile_rda routes at a fixed concurrency, prints
+p50/p95/p99 latency and requests/sec per route, and saves the results under
+benchmarks/results/ so runs can be compared between commits:
+
+    python -m benchmarks.run --rows 2000000 --concurrency 64 --duration 60
+    python -m benchmarks.run --latency llm=1500:0.5 --error-rate llm=0.02 --fail-on-regression
+"""
+from benchmarks import seed as seed_module
+from benchmarks.stubs import UPSTREAMS
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import asyncio
+import httpx
+import json
+import logging
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import time
+import yaml
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+WORK_DIR = REPO_ROOT / 'benchmarks' / '.work'
+RESULTS_DIR = REPO_ROOT / 'benchmarks' / 'results'
+DATABASE_NAME = 'bench'
+
+# Foods the local nutrition index answers; everything else is a generated meal that goes to the LLM stub
+LOCAL_MEALS = ["banana", "2 eggs", "150g rice", "a cup of milk", "apple", "3 slices of bacon"]
+ACTIVITY_LEVELS = ["sedentary", "light", "moderate", "very", "extra"]
+
+SCENARIOS = {}  # name -> (weight, coroutine function)
+
+def scenario(name: str, weight: int):
+    def register(func):
+        SCENARIOS[name] = (weight, func)
+        return func
+    return register
+
+class Workload:
+    """Random but reproducible request parameters shared by the scenarios."""
+
+    def __init__(self, users: int, rows: int, distinct_meals: int, local_share: float, seed_value: int):
+        self.users = users
+        self.rows = rows
+        self.distinct_meals = distinct_meals
+        self.local_share = local_share
+        self.rng = random.Random(seed_value)
+
+    def user_index(self) -> int:
+        return self.rng.randrange(self.users)
+
+    def user(self) -> str:
+        return seed_module.user_id(self.user_index())
+
+    def meal(self) -> str:
+        if self.rng.random() < self.local_share:
+            return self.rng.choice(LOCAL_MEALS)
+        return f"bench meal {self.rng.randrange(self.distinct_meals)}"
+
+    def seeded_meal(self):
+        """(user, id) of a seeded transaction; ids follow the row order in benchmarks.seed."""
+        index = self.user_index()
+        return seed_module.user_id(index), index + 1 + self.users * self.rng.randrange(max(self.rows // self.users, 1))
+
+    def day(self) -> str:
+        return (datetime.now() - timedelta(days=self.rng.randrange(30))).strftime("%Y-%m-%d")
+
+    def profile(self) -> dict:
+        weight = self.rng.uniform(55, 120)
+        return {
+            "age": self.rng.randrange(18, 75),
+            "heightCm": self.rng.uniform(150, 200),
+            "weightKg": round(weight, 1),
+            "targetWeightKg": round(weight - self.rng.uniform(-5, 15), 1),
+            "targetDate": (datetime.now() + timedelta(days=self.rng.randrange(30, 365))).strftime("%Y-%m-%d"),
+            "activityLevel": self.rng.choice(ACTIVITY_LEVELS),
+        }
+
+@scenario("calorie_count", 20)
+async def calorie_count(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get(f"/api/calorie_count/{work.meal()}", params={"user_id": work.user()})
+    return response.status_code == 200
+
+@scenario("calorie_count_stream", 5)
+async def calorie_count_stream(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get(f"/api/calorie_count_stream/{work.meal()}", params={"user_id": work.user()})
+    return response.status_code == 200 and "event: error" not in response.text
+
+@scenario("meals_batch", 3)
+async def meals_batch(client: httpx.AsyncClient, work: Workload) -> bool:
+    meals = [work.meal() for _ in range(5)]
+    response = await client.post("/api/meals/batch", json={"user_id": work.user(), "meals": meals})
+    return response.status_code == 200
+
+@scenario("meal_image", 5)
+async def meal_image(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get(f"/api/meal_image/{work.meal()}")
+    return response.status_code == 200
+
+@scenario("meal_info", 5)
+async def meal_info(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get(f"/api/meal/{work.meal()}", params={"user_id": work.user()})
+    return response.status_code == 200
+
+@scenario("daily_totals", 15)
+async def daily_totals(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get("/api/daily_totals/", params={"user_id": work.user(), "target_date": work.day()})
+    return response.status_code == 200
+
+@scenario("daily_meals", 15)
+async def daily_meals(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get("/api/daily_meals/", params={"user_id": work.user(), "date": work.day()})
+    return response.status_code == 200
+
+@scenario("meal_history", 10)
+async def meal_history(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get("/api/meal_history/", params={"user_id": work.user(), "limit": 50})
+    return response.status_code == 200
+
+@scenario("historical_totals", 10)
+async def historical_totals(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get("/api/historical_totals/", params={"user_id": work.user(), "days": 30})
+    return response.status_code == 200
+
+@scenario("dashboard", 10)
+async def dashboard(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get("/api/dashboard/", params={"user_id": work.user(), "target_date": work.day(), "days": 7})
+    return response.status_code == 200
+
+@scenario("trends", 5)
+async def trends(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get("/api/trends/", params={"user_id": work.user(), "days": 365})
+    return response.status_code == 200
+
+@scenario("streaks", 5)
+async def streaks(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get("/api/streaks/", params={"user_id": work.user()})
+    return response.status_code == 200
+
+@scenario("export", 1)
+async def export(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.get("/api/export/", params={"user_id": work.user(), "format": "csv"})
+    return response.status_code == 200
+
+@scenario("delete_meal", 2)
+async def delete_meal(client: httpx.AsyncClient, work: Workload) -> bool:
+    user, meal_id = work.seeded_meal()
+    response = await client.delete(f"/api/meal/{meal_id}", params={"user_id": user})
+    return response.status_code == 200
+
+@scenario("calculate_rda", 5)
+async def calculate_rda(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.post("/api/calculate-rda", json=work.profile())
+    return response.status_code == 200
+
+@scenario("calculate_rda_llm", 1)
+async def calculate_rda_llm(client: httpx.AsyncClient, work: Workload) -> bool:
+    response = await client.post("/api/calculate-rda", params={"mode": "llm"}, json=work.profile())
+    return response.status_code == 200
+
+def percentile(ordered: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+def summarize(latencies: list, errors: int, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / seconds, 2),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+    }
+
+async def drive(base_url: str, names: list, work: Workload, concurrency: int, duration: float, warmup: float) -> dict:
+    """Run `concurrency` workers picking weighted scenarios; only requests started after warmup count."""
+    weights = [SCENARIOS[name][0] for name in names]
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    start = time.perf_counter()
+    measure_from = start + warmup
+    deadline = measure_from + duration
+
+    async def worker(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            name = work.rng.choices(names, weights)[0]
+            began = time.perf_counter()
+            try:
+                ok = await SCENARIOS[name][1](client, work)
+            except httpx.HTTPError as e:
+                logger.debug(f"{name} failed: {e}")
+                ok = False
+            if began >= measure_from:
+                latencies[name].append(time.perf_counter() - began)
+                errors[name] += 0 if ok else 1
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        await asyncio.gather(*[worker(client) for _ in range(concurrency)])
+        stages = parse_stage_means((await client.get("/metrics")).text)
+
+    seconds = time.perf_counter() - measure_from
+    scenarios = {name: summarize(latencies[name], errors[name], seconds) for name in names}
+    everything = [latency for name in names for latency in latencies[name]]
+    return {
+        "scenarios": scenarios,
+        "total": summarize(everything, sum(errors.values()), seconds),
+        "server_stage_mean_ms": stages,
+    }
+
+def parse_stage_means(metrics_text: str) -> dict:
+    """Mean latency per internal stage from the app's /metrics output (includes warmup)."""
+    sums, counts = {}, {}
+    for line in metrics_text.splitlines():
+        for suffix, target in (("_sum", sums), ("_count", counts)):
+            prefix = f"healthcheck_stage_duration_seconds{suffix}{{stage=\""
+            if line.startswith(prefix):
+                stage, _, value = line[len(prefix):].partition('"} ')
+                target[stage] = float(value)
+    return {stage: round(sums[stage] / counts[stage] * 1000, 2) for stage in sorted(sums) if counts.get(stage)}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def wait_until_ready(url: str, process: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with status {process.returncode}, see {WORK_DIR}")
+        try:
+            httpx.get(url, timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+def write_config(stub_url: str, model: str = None):
+    """The repo's config.yaml, pointed at the stubs and a throwaway database."""
+    with open(REPO_ROOT / "config.yaml") as f:
+        config = yaml.safe_load(f)
+    config["database"]["name"] = DATABASE_NAME
+    config["image_search"]["url"] = f"{stub_url}/search"
+    config["logging"]["level"] = "WARNING"
+    if model:
+        config["models"]["llm"]["default"] = model
+    with open(WORK_DIR / "config.yaml", "w") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+def subprocess_env(stub_url: str) -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    env.update({
+        "HEALTHCHECK_CONFIG": str(WORK_DIR / "config.yaml"),
+        "AWS_ENDPOINT_URL_SSM": stub_url,
+        "AWS_ENDPOINT_URL_BEDROCK_RUNTIME": stub_url,
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_EC2_METADATA_DISABLED": "true",
+    })
+    return env
+
+def prepare_database(args, env: dict):
+    """Seed once per (rows, users, days) and give every run a fresh copy of the seeded file."""
+    seed_dir = WORK_DIR / "seed"
+    seeded = seed_dir / f"{DATABASE_NAME}.sqlite3"
+    params = {"rows": args.rows, "users": args.users, "days": args.days}
+    params_file = seed_dir / "seed.json"
+    live = WORK_DIR / "db" / f"{DATABASE_NAME}.sqlite3"
+
+    if args.reseed or not seeded.exists() or json.loads(params_file.read_text()) != params:
+        logger.info(f"Seeding {args.rows} rows for {args.users} users, this can take a few minutes")
+        shutil.rmtree(WORK_DIR / "db", ignore_errors=True)
+        subprocess.run(
+            [sys.executable, "-m", "benchmarks.seed", "--rows", str(args.rows),
+             "--users", str(args.users), "--days", str(args.days)],
+            cwd=WORK_DIR, env=env, check=True
+        )
+        seed_dir.mkdir(exist_ok=True)
+        shutil.move(str(live), seeded)
+        params_file.write_text(json.dumps(params))
+
+    shutil.rmtree(WORK_DIR / "db", ignore_errors=True)
+    live.parent.mkdir()
+    shutil.copy(seeded, live)
+
+def git_commit() -> tuple:
+    def git(*command):
+        return subprocess.run(["git", *command], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    return git("rev-parse", "--short", "HEAD") or "unknown", bool(git("status", "--porcelain", "--untracked-files=no"))
+
+def compare(result: dict, threshold: float) -> list:
+    """Regressions against the newest saved run with the same parameters."""
+    previous = None
+    for path in sorted(RESULTS_DIR.glob("*.json"), reverse=True):
+        candidate = json.loads(path.read_text())
+        if candidate["params"] == result["params"]:
+            previous = candidate
+            break
+    if previous is None:
+        print("no previous run with the same parameters to compare against")
+        return []
+
+    print(f"\ncompared with {previous['commit']} ({previous['timestamp']}):")
+    regressions = []
+    for name, now in result["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if not before or not before["count"] or not now["count"]:
+            continue
+        p95_change = (now["p95_ms"] - before["p95_ms"]) / before["p95_ms"] if before["p95_ms"] else 0.0
+        rps_change = (now["rps"] - before["rps"]) / before["rps"] if before["rps"] else 0.0
+        flag = ""
+        if p95_change > threshold or rps_change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<22} p95 {p95_change:+7.1%}   rps {rps_change:+7.1%}{flag}")
+    return regressions
+
+def print_report(result: dict):
+    print(f"\n{'route':<22} {'count':>7} {'errors':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, row in [*result["scenarios"].items(), ("TOTAL", result["total"])]:
+        print(f"{name:<22} {row['count']:>7} {row['errors']:>6} {row['rps']:>8} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+    if result["server_stage_mean_ms"]:
+        print("\nserver stage means (ms): " + ", ".join(
+            f"{stage}={mean}" for stage, mean in result["server_stage_mean_ms"].items()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the app against local upstream stubs")
+    parser.add_argument("--rows", type=int, default=2000000, help="seeded transactions")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365, help="days of history to spread the rows over")
+    parser.add_argument("--reseed", action="store_true", help="rebuild the seeded database")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="unmeasured seconds before the measurement")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--distinct-meals", type=int, default=500, help="size of the LLM-bound meal vocabulary")
+    parser.add_argument("--local-share", type=float, default=0.3, help="fraction of meals the local index answers")
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=MEDIAN_MS[:SIGMA]",
+                        help=f"stub latency for one of {', '.join(UPSTREAMS)}; repeatable")
+    parser.add_argument("--error-rate", action="append", metavar="UPSTREAM=RATE", help="stub failure rate; repeatable")
+    parser.add_argument("--model", help="override models.llm.default")
+    parser.add_argument("--app-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the workload")
+    parser.add_argument("--no-save", action="store_true", help="do not write the result file")
+    parser.add_argument("--regression-threshold", type=float, default=0.10,
+                        help="relative p95 increase or rps drop that counts as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    WORK_DIR.mkdir(parents=True, exist_ok=True)
+    stub_port, app_port = free_port(), free_port()
+    stub_url, app_url = f"http://127.0.0.1:{stub_port}", f"http://127.0.0.1:{app_port}"
+    env = subprocess_env(stub_url)
+    write_config(stub_url, args.model)
+    prepare_database(args, env)
+
+    stub_command = [sys.executable, "-m", "benchmarks.stubs", "--port", str(stub_port)]
+    for spec in args.latency or []:
+        stub_command += ["--latency", spec]
+    for spec in args.error_rate or []:
+        stub_command += ["--error-rate", spec]
+    app_command = [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port),
+                   "--workers", str(args.app_workers), "--no-access-log", "--log-level", "warning"]
+
+    processes = []
+    try:
+        with open(WORK_DIR / "stubs.log", "w") as stub_log, open(WORK_DIR / "app.log", "w") as app_log:
+            processes.append(subprocess.Popen(stub_command, cwd=WORK_DIR, env=env, stdout=stub_log, stderr=stub_log))
+            wait_until_ready(f"{stub_url}/docs", processes[-1])
+            processes.append(subprocess.Popen(app_command, cwd=WORK_DIR, env=env, stdout=app_log, stderr=app_log))
+            wait_until_ready(f"{app_url}/metrics", processes[-1])
+
+            logger.info(f"Driving {len(names)} scenarios at concurrency {args.concurrency} "
+                        f"for {args.warmup:g}s warmup + {args.duration:g}s")
+            work = Workload(args.users, args.rows, args.distinct_meals, args.local_share, args.seed)
+            measured = asyncio.run(drive(app_url, names, work, args.concurrency, args.duration, args.warmup))
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait(timeout=30)
+
+    commit, dirty = git_commit()
+    params = {key: getattr(args, key) for key in (
+        "rows", "users", "days", "concurrency", "duration", "warmup", "distinct_meals", "local_share",
+        "latency", "error_rate", "model", "app_workers", "seed"
+    )}
+    params["scenarios"] = names
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "dirty": dirty,
+        "params": params,
+        **measured,
+    }
+    print_report(result)
+    regressions = compare(result, args.regression_threshold)
+
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        path = RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}-{commit}{'-dirty' if dirty else ''}.json"
+        path.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"\nsaved {path.relative_to(REPO_ROOT)}")
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Fill the configured SQLite database with synthetic meal history.
+
+Meant to run from a benchmark work directory whose config.yaml names a
+throwaway database (see benchmarks.run):
+
+    python -m benchmarks.seed --rows 2000000 --users 1000 --days 365
+"""
+from app.services import db_utils, migrations
+import argparse
+import logging
+import random
+import sqlite3
+import time
+
+logger = logging.getLogger(__name__)
+
+MEALS = [
+    ("oatmeal with berries", 320, 6, 58, 10, 8, 14, "1 bowl", 150),
+    ("turkey sandwich", 450, 14, 48, 30, 5, 6, "1 sandwich", 1100),
+    ("chicken caesar salad", 520, 32, 18, 38, 4, 4, "1 large bowl", 980),
+    ("spaghetti bolognese", 680, 22, 82, 34, 7, 12, "2 cups", 890),
+    ("greek yogurt", 100, 0.7, 6, 17, 0, 5.5, "1 container", 61),
+    ("banana", 105, 0.4, 27, 1.3, 3.1, 14.4, "1 medium", 1),
+    ("cheeseburger and fries", 950, 48, 96, 34, 6, 10, "1 meal", 1500),
+    ("salmon with rice", 610, 20, 62, 40, 2, 1, "1 plate", 420),
+    ("2 eggs", 144, 9.6, 0.8, 12.6, 0, 0.4, "2 large", 142),
+    ("latte", 190, 7, 18, 13, 0, 17, "16 fl oz", 170),
+]
+
+def user_id(i: int) -> str:
+    return f"bench-user-{i}"
+
+def seed(rows: int, users: int, days: int, chunk: int = 50000, seed_value: int = 42) -> int:
+    """Insert `rows` transactions spread over `users` and the last `days` days, then rebuild the rollup."""
+    migrations.migrate()
+    rng = random.Random(seed_value)
+    now = int(time.time())
+    span = days * 86400
+
+    connection = sqlite3.connect(db_utils.DATABASE)
+    connection.execute("PRAGMA synchronous = OFF")
+    start = time.perf_counter()
+    try:
+        for offset in range(0, rows, chunk):
+            batch = []
+            for i in range(offset, min(offset + chunk, rows)):
+                name, calories, fat, carbs, protein, fiber, sugars, serving, sodium = rng.choice(MEALS)
+                # Row i belongs to user i % users, so a run can derive some of a user's meal ids
+                timestamp = now - rng.randrange(span)
+                batch.append((user_id(i % users), timestamp, db_utils.local_date(timestamp), name, calories, fat,
+                              carbs, protein, fiber, sugars, serving, sodium))
+            connection.executemany(
+                "INSERT INTO transactions (user_id, timestamp, local_date, name, calories, total_fat, carbohydrates, "
+                "protein, fiber, sugars, serving_size, sodium) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                batch
+            )
+            connection.commit()
+            logger.info(f"Inserted {offset + len(batch)} of {rows} rows")
+    finally:
+        connection.close()
+    logger.info(f"Inserted {rows} rows in {time.perf_counter() - start:.1f}s, rebuilding daily totals")
+
+    db_utils.rebuild_daily_totals()
+    db_utils.rebuild_streaks()
+    with db_utils.engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    db_utils.engine.dispose()
+    return rows
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Seed the configured database with synthetic transactions")
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    args = parser.parse_args()
+    seed(args.rows, args.users, args.days)
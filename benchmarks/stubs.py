@@ -0,0 +1,173 @@
+"""Local stand-ins for the service's upstreams: Azure OpenAI, Bedrock, SSM and the image search page.
+
+Each upstream gets a latency distribution (lognormal around a median) and an
+error rate, so the app can be load tested without real credentials or cost.
+
+    python -m benchmarks.stubs --port 9100 --latency llm=800:0.4 --error-rate llm=0.01
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import zlib
+
+UPSTREAMS = ('llm', 'ssm', 'image')
+DEFAULT_LATENCY = {'llm': (800.0, 0.4), 'ssm': (20.0, 0.3), 'image': (250.0, 0.5)}  # median ms, sigma
+
+class Upstream:
+    def __init__(self, median_ms: float, sigma: float, error_rate: float = 0.0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.error_rate = error_rate
+
+    def latency(self) -> float:
+        """Seconds for one call."""
+        if self.median_ms <= 0:
+            return 0.0
+        return random.lognormvariate(math.log(self.median_ms), self.sigma) / 1000
+
+    def fails(self) -> bool:
+        return random.random() < self.error_rate
+
+def parse_profiles(latency: list, error_rate: list) -> dict:
+    """Build per-upstream profiles from "name=median_ms[:sigma]" and "name=rate" options."""
+    profiles = {name: Upstream(*DEFAULT_LATENCY[name]) for name in UPSTREAMS}
+    for spec in latency or []:
+        name, value = spec.split('=', 1)
+        median, _, sigma = value.partition(':')
+        profiles[name].median_ms = float(median)
+        if sigma:
+            profiles[name].sigma = float(sigma)
+    for spec in error_rate or []:
+        name, value = spec.split('=', 1)
+        profiles[name].error_rate = float(value)
+    return profiles
+
+def meal_analysis(name: str) -> dict:
+    """A plausible, deterministic analysis for a meal name."""
+    seed = zlib.crc32(name.encode())
+    calories = 150 + seed % 700
+    return {
+        "name": name,
+        "calories": calories,
+        "total_fat": round(calories * 0.035, 1),
+        "carbohydrates": round(calories * 0.11, 1),
+        "protein": round(calories * 0.05, 1),
+        "fiber": seed % 12,
+        "sugars": seed % 25,
+        "sodium": 100 + seed % 1200,
+        "serving_size": "1 serving",
+        "health_analysis": {
+            "is_healthy": calories < 600,
+            "message": "Benchmark response - keep tracking your meals!"
+        }
+    }
+
+def completion_text(prompt: str) -> str:
+    """Answer the app's three prompt shapes: single meal, meal batch and RDA."""
+    if prompt.startswith("Calculate RDA"):
+        return json.dumps({"calories": 2000, "protein": 90, "fat": 70, "fiber": 28, "carbohydrates": 240})
+    batch = re.match(r"Analyze each of the following \d+ meals separately:\n(.*?)\n\n", prompt, re.S)
+    if batch:
+        names = [line.split('. ', 1)[-1] for line in batch.group(1).splitlines()]
+        return json.dumps([meal_analysis(name) for name in names])
+    single = re.match(r"Analyze the following meal: (.*)", prompt)
+    return json.dumps(meal_analysis(single.group(1).strip() if single else "meal"))
+
+def create_app(profiles: dict, base_url: str) -> FastAPI:
+    app = FastAPI()
+    llm, ssm, image = profiles['llm'], profiles['ssm'], profiles['image']
+
+    def server_error(message: str):
+        return JSONResponse({"error": {"code": "InternalServerError", "message": message}}, status_code=500)
+
+    @app.post("/openai/deployments/{deployment}/chat/completions")
+    async def azure_chat(deployment: str, request: Request):
+        body = await request.json()
+        delay = llm.latency()
+        if llm.fails():
+            await asyncio.sleep(delay / 10)
+            return server_error("stub LLM failure")
+        text = completion_text(body["messages"][-1]["content"])
+
+        if not body.get("stream"):
+            await asyncio.sleep(delay)
+            return {
+                "id": "bench", "object": "chat.completion", "created": 0, "model": deployment,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }
+
+        async def chunks():
+            # First token after a third of the latency, the rest spread over the remainder
+            await asyncio.sleep(delay / 3)
+            pieces = [text[i:i + 16] for i in range(0, len(text), 16)]
+            for piece in pieces:
+                chunk = {
+                    "id": "bench", "object": "chat.completion.chunk", "created": 0, "model": deployment,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(delay * 2 / 3 / len(pieces))
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    @app.post("/model/{model_id:path}/converse")
+    async def bedrock_converse(model_id: str, request: Request):
+        body = await request.json()
+        await asyncio.sleep(llm.latency())
+        if llm.fails():
+            return JSONResponse({"message": "stub LLM failure"}, status_code=500)
+        text = completion_text(body["messages"][-1]["content"][0]["text"])
+        return {
+            "output": {"message": {"role": "assistant", "content": [{"text": text}]}},
+            "stopReason": "end_turn",
+            "usage": {"inputTokens": 0, "outputTokens": 0, "totalTokens": 0},
+            "metrics": {"latencyMs": 0},
+        }
+
+    @app.post("/")
+    async def ssm_get_parameters(request: Request):
+        body = json.loads(await request.body())
+        await asyncio.sleep(ssm.latency())
+        if ssm.fails():
+            return JSONResponse({"__type": "InternalServerError", "message": "stub SSM failure"}, status_code=500)
+        parameters = [
+            {"Name": name, "Type": "SecureString", "Version": 1,
+             "Value": base_url if "endpoint" in name else "bench-api-key"}
+            for name in body.get("Names", [])
+        ]
+        return JSONResponse({"Parameters": parameters, "InvalidParameters": []},
+                            media_type="application/x-amz-json-1.1")
+
+    @app.get("/search")
+    async def image_search(q: str = ""):
+        await asyncio.sleep(image.latency())
+        if image.fails():
+            return HTMLResponse("stub image search failure", status_code=503)
+        slug = re.sub(r'\W+', '-', q.lower()).strip('-')
+        images = "".join(f'<img src="{base_url}/img/{slug}-{i}.jpg">' for i in range(5))
+        return HTMLResponse(f"<html><body>{images}</body></html>")
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Stub upstream servers for benchmarking")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency", action="append", metavar="UPSTREAM=MEDIAN_MS[:SIGMA]",
+                        help=f"latency of one of {', '.join(UPSTREAMS)}; repeatable")
+    parser.add_argument("--error-rate", action="append", metavar="UPSTREAM=RATE",
+                        help="fraction of calls that fail; repeatable")
+    args = parser.parse_args()
+
+    base_url = f"http://{args.host}:{args.port}"
+    app = create_app(parse_profiles(args.latency, args.error_rate), base_url)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
@@ -16,6 +16,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     await initializeUserId();
     loadProfileAndUpdateDisplay();
     setupEventListeners();
+    await syncTimeZone();
     // Initial update of meal list and nutrition data
     await updateNutritionData();
 });
@@ -75,21 +76,32 @@ async function initializeUserId() {
         } else {
             console.log('Existing User ID retrieved from cookie:', window.userId);
         }
-        
-        // Now that we have a valid userId, load the initial data
-        try {
-            await Promise.all([
-                updateMealList(),
-                updateDailyTotals(window.userId)
-            ]);
-        } catch (error) {
-            console.error('Error loading initial data:', error);
-        }
     } catch (error) {
         console.error('Error in initializeUserId:', error);
     }
 }
 
+// The server dates meals and "today" in the user's time zone; tell it the browser's when that changes
+async function syncTimeZone() {
+    try {
+        const timeZone = Intl.DateTimeFormat().resolvedOptions().timeZone;
+        const key = `time_zone_${window.userId}`;
+        if (!timeZone || localStorage.getItem(key) === timeZone) {
+            return;
+        }
+        const response = await fetch(`/api/settings/?user_id=${encodeURIComponent(window.userId)}`, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ time_zone: timeZone })
+        });
+        if (response.ok) {
+            localStorage.setItem(key, timeZone);
+        }
+    } catch (error) {
+        console.error('Error syncing time zone:', error);
+    }
+}
+
 function loadProfileAndUpdateDisplay() {
     updateDisplayName();
 }
@@ -1,27 +1,4 @@
 // Daily totals functionality
-async function updateDailyTotals(userId) {
-    try {
-        const response = await fetch(
-            `${window.location.origin}/api/daily_totals/?user_id=${encodeURIComponent(userId)}`,
-            {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' },
-            }
-        );
-
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
-        console.log('Daily totals:', data);
-        displayDailyTotals(data, userId);
-    } catch (error) {
-        console.error('Error fetching daily totals:', error);
-        document.getElementById('daily-totals').textContent = 'Error fetching daily totals.';
-    }
-}
-
 function getNutritionTargets(userId) {
     // Try to get personalized RDA values from localStorage
     const rdaValues = localStorage.getItem(`rda_values_${userId}`);
@@ -1,31 +1,4 @@
 // Meal list functionality
-async function updateMealList() {
-    try {
-        const url = `${window.location.origin}/api/daily_meals/?user_id=${encodeURIComponent(userId)}`;
-        console.log('Fetching meals from:', url);
-        
-        const response = await fetch(url, {
-            method: 'GET',
-            headers: {
-                'Content-Type': 'application/json',
-            },
-        });
-        
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        
-        const meals = await response.json();
-        console.log(`Received ${meals.length} meals for today:`, meals);
-        displayMealList(meals);
-    } catch (error) {
-        console.error('Error fetching meal list:', error);
-        document.getElementById('meal-list').innerHTML = `
-            <div class="text-red-500 text-sm">Error loading meals</div>
-        `;
-    }
-}
-
 async function deleteMeal(mealId, event) {
     if (!event || !mealId) {
         console.error('Missing event or mealId in deleteMeal');
@@ -49,8 +22,7 @@ async function deleteMeal(mealId, event) {
         }
         
         // Refresh the meal list and daily totals
-        await updateMealList();
-        await updateDailyTotals(userId);
+        await updateNutritionData();
     } catch (error) {
         console.error('Error deleting meal:', error);
         alert('Failed to delete meal. Please try again.');
@@ -107,20 +79,3 @@ function createMealDetailRow(label, value, unit) {
         </div>
     `;
 }
-
-// Initialize the meal list when the script loads
-document.addEventListener('DOMContentLoaded', () => {
-    console.log('Meal list script loaded, initializing...');
-    if (window.userId) {
-        updateMealList();
-    } else {
-        console.log('Waiting for userId to be available...');
-        // Wait for userId to be available
-        const checkUserId = setInterval(() => {
-            if (window.userId) {
-                clearInterval(checkUserId);
-                updateMealList();
-            }
-        }, 100);
-    }
-});
@@ -19,22 +19,14 @@ async function handleMealSubmission() {
         isSubmitting = true;
         resultDiv.innerHTML = '<div class="text-center p-4"><i class="fas fa-spinner fa-spin"></i> Processing meal...</div>';
 
-        const response = await fetch(
-            `${window.location.origin}/api/calorie_count/${encodeURIComponent(mealText)}?user_id=${encodeURIComponent(window.userId)}`,
-            {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' },
-            }
-        );
-
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const data = await response.json();
+        const data = await streamMealAnalysis(mealText);
         console.log('Food data:', data);
-        displayMealResult(data);
         clearInputs();
+
+        // The server resolves uncached images after responding; fill it in when ready
+        if (data.image_pending) {
+            attachMealImage(data);
+        }
         
         // Update nutrition data after meal submission completes
         await updateNutritionData();
@@ -85,6 +77,57 @@ function displayMealResult(data) {
     `;
 }
 
+async function attachMealImage(data) {
+    try {
+        const response = await fetch(
+            `${window.location.origin}/api/meal_image/${encodeURIComponent(data.name)}`
+        );
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const image = await response.json();
+        if (image.image_url) {
+            displayMealResult({ ...data, image_url: image.image_url });
+        }
+    } catch (error) {
+        console.error('Error fetching meal image:', error);
+    }
+}
+
+// Stream the analysis over server-sent events, rendering fields as they arrive.
+// Resolves with the stored meal as soon as the server sends `meal`.
+function streamMealAnalysis(mealText) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(
+            `${window.location.origin}/api/calorie_count_stream/${encodeURIComponent(mealText)}?user_id=${encodeURIComponent(window.userId)}`
+        );
+        let data = { name: mealText };
+
+        source.addEventListener('field', (event) => {
+            const { field, value } = JSON.parse(event.data);
+            data[field] = value;
+            displayMealResult(data);
+        });
+        source.addEventListener('health_analysis', (event) => {
+            data.health_analysis = JSON.parse(event.data);
+            displayMealResult(data);
+        });
+        source.addEventListener('meal', (event) => {
+            data = JSON.parse(event.data);
+            displayMealResult(data);
+            resolve(data);
+        });
+        source.addEventListener('done', () => {
+            source.close();
+        });
+        // Fires both for server `error` events (with data) and for connection failures
+        source.addEventListener('error', (event) => {
+            source.close();
+            reject(new Error(event.data ? JSON.parse(event.data).detail : 'Connection to server lost'));
+        });
+    });
+}
+
 function createNutrientDisplay(label, value, unit) {
     return `
         <div class="bg-gray-50 rounded-lg p-3">
@@ -94,14 +137,38 @@ function createNutrientDisplay(label, value, unit) {
     `;
 }
 
+// Totals, meals and 7-day trends for today, in one request
+async function fetchDashboard() {
+    const response = await fetch(
+        `${window.location.origin}/api/dashboard/?user_id=${encodeURIComponent(window.userId)}&days=7`,
+        {
+            method: 'GET',
+            headers: { 'Content-Type': 'application/json' },
+        }
+    );
+
+    if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+    }
+
+    return response.json();
+}
+
 async function updateNutritionData() {
     try {
-        await Promise.all([
-            updateDailyTotals(window.userId),
-            updateMealList()
-        ]);
+        const dashboard = await fetchDashboard();
+        console.log('Dashboard:', dashboard);
+        displayDailyTotals(dashboard.totals, window.userId);
+        displayMealList(dashboard.meals);
+        if (!document.getElementById('trends-section').classList.contains('hidden')) {
+            loadTrendsData();
+        }
     } catch (error) {
         console.error('Error updating nutrition data:', error);
+        document.getElementById('daily-totals').textContent = 'Error fetching daily totals.';
+        document.getElementById('meal-list').innerHTML = `
+            <div class="text-red-500 text-sm">Error loading meals</div>
+        `;
     }
 }
 
@@ -111,84 +178,6 @@ function clearInputs() {
     transcriptDiv.textContent = '';
 }
 
-async function updateMealList() {
-    try {
-        console.log('Updating meal list...');
-        const response = await fetch(
-            `${window.location.origin}/api/daily_meals/?user_id=${encodeURIComponent(window.userId)}`,
-            {
-                method: 'GET',
-                headers: { 'Content-Type': 'application/json' },
-            }
-        );
-
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-
-        const meals = await response.json();
-        console.log('Meals:', meals);
-
-        // Update the meal list display
-        const mealListDiv = document.getElementById('meal-list');
-        if (!meals || meals.length === 0) {
-            mealListDiv.innerHTML = '<p class="text-gray-500 text-center p-4">No meals logged today</p>';
-            return;
-        }
-
-        mealListDiv.innerHTML = meals.map(meal => `
-            <div class="bg-white rounded-lg shadow-md p-4 mb-4">
-                <div class="flex items-start space-x-3">
-                    ${meal.image_url ? `
-                        <div class="w-16 h-16 flex-shrink-0">
-                            <img src="${meal.image_url}" alt="${meal.name}" class="w-full h-full object-cover rounded-lg">
-                        </div>
-                    ` : ''}
-                    <div class="flex-grow">
-                        <div class="font-medium text-gray-800">${meal.name}</div>
-                        <div class="text-sm text-gray-500">${meal.serving_size || 'No serving size'}</div>
-                        <div class="text-sm text-gray-600 mt-1">
-                            ${meal.calories}kcal • ${meal.protein}g protein • ${meal.total_fat}g fat
-                        </div>
-                    </div>
-                    <button onclick="deleteMeal(${meal.id})" class="text-red-500 hover:text-red-700 ml-2">
-                        <i class="fas fa-trash"></i>
-                    </button>
-                </div>
-            </div>
-        `).join('');
-    } catch (error) {
-        console.error('Error updating meal list:', error);
-    }
-}
-
-function deleteMeal(mealId) {
-    if (!confirm('Are you sure you want to delete this meal?')) {
-        return;
-    }
-    
-    console.log('Deleting meal:', mealId);
-    fetch(
-        `${window.location.origin}/api/meal/${mealId}?user_id=${encodeURIComponent(window.userId)}`,
-        {
-            method: 'DELETE',
-            headers: { 'Content-Type': 'application/json' },
-        }
-    )
-    .then(response => {
-        if (!response.ok) {
-            throw new Error(`HTTP error! status: ${response.status}`);
-        }
-        console.log('Meal deleted successfully');
-        // Update the UI after successful deletion
-        return updateNutritionData();
-    })
-    .catch(error => {
-        console.error('Error deleting meal:', error);
-        alert('Failed to delete meal. Please try again.');
-    });
-}
-
 // Voice recognition setup
 function setupVoiceRecognition() {
     const recognition = new webkitSpeechRecognition();
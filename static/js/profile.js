@@ -88,8 +88,8 @@ async function updateRDAValues(formData) {
         }
 
         // Update daily totals with new targets
-        if (typeof updateDailyTotals === 'function') {
-            updateDailyTotals(window.userId);
+        if (typeof updateNutritionData === 'function') {
+            updateNutritionData();
         }
 
         // Show a notification with the new values
@@ -11,10 +11,22 @@ const targets = {
     fiber: { rda: 25, unit: 'g' }           // General recommendation for adults
 };
 
+// RDA keys saved by profile.js that /api/trends/ accepts as rda_* overrides
+const TREND_RDA_KEYS = ['calories', 'protein', 'carbohydrates', 'fat', 'fiber', 'sodium'];
+
 async function loadTrendsData() {
     try {
+        const days = document.getElementById('trends-range')?.value || 7;
+        const params = new URLSearchParams({ user_id: window.userId, days });
+        const savedRDA = localStorage.getItem(`rda_values_${window.userId}`);
+        if (savedRDA) {
+            const rdaValues = JSON.parse(savedRDA);
+            TREND_RDA_KEYS.filter(key => rdaValues[key]).forEach(key => params.set(`rda_${key}`, rdaValues[key]));
+        }
+
+        // Rolling averages and long ranges are computed (and downsampled) server-side
         const response = await fetch(
-            `${window.location.origin}/api/historical_totals/?user_id=${encodeURIComponent(userId)}&days=7`,
+            `${window.location.origin}/api/trends/?${params}`,
             {
                 method: 'GET',
                 headers: { 'Content-Type': 'application/json' },
@@ -25,8 +37,8 @@ async function loadTrendsData() {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
 
-        const data = await response.json();
-        displayTrends(data);
+        const trends = await response.json();
+        displayTrends(trendRows(trends.daily));
     } catch (error) {
         console.error('Error loading trends data:', error);
         document.getElementById('trends-content').innerHTML = `
@@ -35,6 +47,15 @@ async function loadTrendsData() {
     }
 }
 
+// The API returns one array per series; the charts take one object per point
+function trendRows(daily) {
+    return daily.date.map((date, i) => {
+        const row = { date };
+        Object.entries(daily).forEach(([name, values]) => { row[name] = values[i]; });
+        return row;
+    });
+}
+
 function displayTrends(data) {
     const trendsContent = document.getElementById('trends-content');
     trendsContent.innerHTML = `
@@ -89,6 +110,15 @@ function createCaloriesChart(data) {
         }
     };
 
+    const trace3 = {
+        x: dates,
+        y: data.map(d => d.calories_avg7),
+        name: '7-day average',
+        type: 'scatter',
+        connectgaps: true,
+        line: { color: 'rgb(153, 102, 255)', width: 2 }
+    };
+
     const layout = {
         title: 'Daily Calories',
         yaxis: {
@@ -102,7 +132,7 @@ function createCaloriesChart(data) {
         }
     };
 
-    Plotly.newPlot('caloriesChart', [trace1, trace2], layout);
+    Plotly.newPlot('caloriesChart', [trace1, trace3, trace2], layout);
 }
 
 function createCarbsChart(data) {
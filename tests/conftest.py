@@ -0,0 +1,34 @@
+"""The app's SQLite database lives under db/ in the working directory, so the
+suite runs from a scratch directory and never touches a real database. The
+move happens before any test module imports the app: the engines resolve the
+path when they are created."""
+import httpx
+import os
+import pytest
+import shutil
+import tempfile
+
+_scratch = None
+_original_cwd = None
+
+def pytest_configure(config):
+    global _scratch, _original_cwd
+    _original_cwd = os.getcwd()
+    _scratch = tempfile.mkdtemp(prefix="healthcheck-tests-")
+    os.chdir(_scratch)
+
+def pytest_unconfigure(config):
+    os.chdir(_original_cwd)
+    shutil.rmtree(_scratch, ignore_errors=True)
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+@pytest.fixture
+async def client():
+    """An HTTP client for the app, with its startup (migrations, writer) run."""
+    from app.main import app
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
@@ -0,0 +1,41 @@
+"""Meal analysis routes: normalizing and combining what the LLM returns."""
+from app.api.routes import calorie_count
+from app.services import image_service, llm_router, llm_service
+import json
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+MULTI_ITEM = {
+    "name": "eggs and toast",
+    "calories": {"eggs": 140, "toast": 80},
+    "protein": {"eggs": 12, "toast": 3},
+    "serving_size": "2 eggs, 1 slice",
+    "health_analysis": {"is_healthy": True, "message": "Good start"},
+}
+
+def test_combined_meal_keeps_analysis_level_fields():
+    meal = calorie_count.combine_meal_items("eggs and toast", {
+        **MULTI_ITEM, "source": "llm", "image_pending": True, "image_url": None,
+    })
+    assert (meal["calories"], meal["protein"], meal["serving_size"]) == (220, 15, "combined serving")
+    assert meal["health_analysis"] == {"is_healthy": True, "message": "Good start"}
+    assert (meal["source"], meal["image_pending"], meal["image_url"]) == ("llm", True, None)
+
+async def test_batch_multi_item_meal_keeps_image_pending(client, monkeypatch):
+    async def call_model(model: str, processed_query: str) -> str:
+        return json.dumps(MULTI_ITEM)
+
+    async def search_meal_image(name: str):
+        return None
+
+    monkeypatch.setattr(llm_service, "call_model", call_model)
+    monkeypatch.setattr(llm_router, "MAX_ATTEMPTS", 1)
+    monkeypatch.setattr(image_service, "search_meal_image", search_meal_image)
+    response = await client.post("/api/meals/batch", json={"user_id": "batch-multi", "meals": ["eggs and toast"]})
+
+    assert response.status_code == 200
+    meal = response.json()["meals"][0]
+    assert (meal["name"], meal["calories"]) == ("eggs and toast", 220)
+    assert meal["image_pending"] is True
+    assert meal["health_analysis"]["message"] == "Good start"
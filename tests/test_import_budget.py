@@ -0,0 +1,8 @@
+"""Startup stays within app.core.import_budget: fast, no eager provider SDKs, no files written."""
+from app.core import import_budget
+
+def test_app_import_within_budget():
+    # check() imports app.main in fresh interpreters, so this process having imported it doesn't matter;
+    # the fastest of several runs counts, so a briefly busy machine doesn't fail it
+    _, failures = import_budget.check(runs=10)
+    assert failures == []
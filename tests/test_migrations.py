@@ -0,0 +1,55 @@
+"""Schema migrations, and the hot queries' use of their indexes (migrations.check_query_plans)."""
+from app.models import Base
+from app.services import db_utils, migrations
+from sqlalchemy import create_engine, event
+import pytest
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.sqlite3'}")
+    # The backfills call the SQL functions db_utils registers on its own engines
+    event.listen(engine, "connect", db_utils.register_sql_functions)
+    yield engine
+    engine.dispose()
+
+def test_fresh_database_migrates_to_latest(engine):
+    assert migrations.migrate(engine) == migrations.MIGRATIONS[-1][0]
+    # Already current: nothing to apply
+    assert migrations.migrate(engine) == migrations.MIGRATIONS[-1][0]
+
+def test_hot_queries_use_their_indexes(engine):
+    migrations.migrate(engine)
+    assert migrations.check_query_plans(engine) == []
+
+def test_migrated_schema_matches_the_models(engine):
+    """The frozen DDL plus every later migration adds up to what app.models declares."""
+    migrations.migrate(engine)
+    with engine.connect() as connection:
+        for table in Base.metadata.sorted_tables:
+            columns = {row[1]: row for row in connection.exec_driver_sql(f"PRAGMA table_info({table.name})")}
+            assert set(columns) == {column.name for column in table.columns}, table.name
+            for column in table.columns:
+                assert bool(columns[column.name][3]) == (not column.nullable), f"{table.name}.{column.name}"
+                assert bool(columns[column.name][5]) == column.primary_key, f"{table.name}.{column.name}"
+            indexes = {row[1] for row in connection.exec_driver_sql(f"PRAGMA index_list({table.name})")}
+            assert {index.name for index in table.indexes} <= indexes, table.name
+
+def test_database_from_before_migrations_is_upgraded(engine):
+    with engine.begin() as connection:
+        # As the app created it before there were migrations (user_version 0)
+        connection.exec_driver_sql(
+            "CREATE TABLE transactions (id INTEGER NOT NULL, user_id VARCHAR NOT NULL, timestamp INTEGER NOT NULL, "
+            "name VARCHAR NOT NULL, calories FLOAT NOT NULL, total_fat FLOAT NOT NULL, carbohydrates FLOAT NOT NULL, "
+            "protein FLOAT NOT NULL, fiber FLOAT NOT NULL, sugars FLOAT NOT NULL, sodium FLOAT NOT NULL, "
+            "serving_size VARCHAR NOT NULL, PRIMARY KEY (id))"
+        )
+        connection.exec_driver_sql(
+            "INSERT INTO transactions VALUES (1, 'old-user', 1700000000, 'toast', 80, 1, 15, 3, 1, 1, 150, '1 slice')"
+        )
+
+    assert migrations.migrate(engine) == migrations.MIGRATIONS[-1][0]
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT local_date FROM transactions").scalar() == "2023-11-14"
+        assert connection.exec_driver_sql("SELECT meal_count, calories FROM daily_totals").one() == (1, 80)
+        assert connection.exec_driver_sql("SELECT current FROM user_streaks WHERE kind = 'logging'").scalar() == 1
+    assert migrations.check_query_plans(engine) == []
@@ -0,0 +1,150 @@
+"""Concurrent identical meal analyses share one LLM call (calorie_count.get_meal_analysis)."""
+from app.api.routes import calorie_count
+from app.services import image_service, llm_router, llm_service
+import asyncio
+import json
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+CONCURRENCY = 10
+# A regression tends to hang waiters rather than fail them
+TIMEOUT = 5
+
+class StubModel:
+    """Stands in for llm_service.call_model: counts calls and blocks until released."""
+
+    def __init__(self, error: Exception = None):
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.error = error
+
+    async def __call__(self, model: str, processed_query: str) -> str:
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return json.dumps({"name": "zorblax stew", "calories": 420, "serving_size": "1 bowl",
+                           "health_analysis": {"is_healthy": True, "message": "Nice"}})
+
+def stub_model(monkeypatch, error: Exception = None) -> StubModel:
+    stub = StubModel(error)
+    monkeypatch.setattr(llm_service, "call_model", stub)
+    # One backend per request, so a failure isn't retried on the next one
+    monkeypatch.setattr(llm_router, "MAX_ATTEMPTS", 1)
+    return stub
+
+async def fire(client, query: str, count: int = CONCURRENCY) -> list:
+    return [asyncio.create_task(client.get(f"/api/meal/{query}")) for _ in range(count)]
+
+async def settle(*requests) -> list:
+    return await asyncio.wait_for(asyncio.gather(*requests), TIMEOUT)
+
+async def test_concurrent_requests_make_one_call(client, monkeypatch):
+    stub = stub_model(monkeypatch)
+    requests = await fire(client, "zorblax stew 1")
+    await asyncio.wait_for(stub.started.wait(), TIMEOUT)
+    await asyncio.sleep(0.05)
+    stub.release.set()
+
+    responses = await settle(*requests)
+    assert stub.calls == 1
+    assert [response.status_code for response in responses] == [200] * CONCURRENCY
+    assert {response.json()["calories"] for response in responses} == {420}
+
+async def test_error_reaches_every_waiter(client, monkeypatch):
+    stub = stub_model(monkeypatch, RuntimeError("backend down"))
+    requests = await fire(client, "zorblax stew 2")
+    await asyncio.wait_for(stub.started.wait(), TIMEOUT)
+    await asyncio.sleep(0.05)
+    stub.release.set()
+
+    responses = await settle(*requests)
+    assert stub.calls == 1
+    assert [response.status_code for response in responses] == [500] * CONCURRENCY
+    assert all("backend down" in response.json()["detail"] for response in responses)
+
+async def test_cancelled_waiter_does_not_cancel_the_others(client, monkeypatch):
+    stub = stub_model(monkeypatch)
+    requests = await fire(client, "zorblax stew 3")
+    await asyncio.wait_for(stub.started.wait(), TIMEOUT)
+    await asyncio.sleep(0.05)
+
+    requests[0].cancel()
+    await asyncio.sleep(0.05)
+    stub.release.set()
+
+    with pytest.raises(asyncio.CancelledError):
+        await requests[0]
+    responses = await settle(*requests[1:])
+    assert stub.calls == 1
+    assert [response.status_code for response in responses] == [200] * (CONCURRENCY - 1)
+
+def sse_events(body: str) -> list:
+    """(event, data) pairs of a server-sent event stream."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+async def test_concurrent_streams_make_one_call(client, monkeypatch):
+    stub = stub_model(monkeypatch)
+    streams = 0
+
+    async def stream_llm(processed_query: str):
+        nonlocal streams
+        streams += 1
+        text = await stub("model", processed_query)
+        for start in range(0, len(text), 8):
+            yield text[start:start + 8]
+
+    async def no_image(name: str):
+        return None
+
+    monkeypatch.setattr(llm_service, "stream_llm", stream_llm)
+    monkeypatch.setattr(image_service, "search_meal_image", no_image)
+    requests = [asyncio.create_task(client.get("/api/calorie_count_stream/zorblax stew 4",
+                                               params={"user_id": f"stream-{i}"})) for i in range(CONCURRENCY)]
+    await asyncio.wait_for(stub.started.wait(), TIMEOUT)
+    # A JSON request for the same meal joins the streaming call
+    requests.append(asyncio.create_task(client.get("/api/meal/zorblax stew 4")))
+    await asyncio.sleep(0.05)
+    stub.release.set()
+
+    responses = await settle(*requests)
+    assert (streams, stub.calls) == (1, 1)
+    assert responses[-1].json()["calories"] == 420
+    for response in responses[:-1]:
+        events = sse_events(response.text)
+        fields = {data["field"]: data["value"] for event, data in events if event == "field"}
+        assert (fields["calories"], fields["source"]) == (420, "llm")
+        assert [event for event, _ in events if event != "field"][-1] == "done"
+        assert dict(events)["meal"]["calories"] == 420
+
+async def test_stream_sends_the_meal_without_waiting_for_its_image(client, monkeypatch):
+    stub = stub_model(monkeypatch)
+    stub.release.set()
+    searches = []
+
+    async def stream_llm(processed_query: str):
+        yield await stub("model", processed_query)
+
+    async def search_meal_image(name: str):
+        searches.append(name)
+        return "http://images.test/stew.jpg"
+
+    monkeypatch.setattr(llm_service, "stream_llm", stream_llm)
+    monkeypatch.setattr(image_service, "search_meal_image", search_meal_image)
+    response = await calorie_count.calorie_count_stream("zorblax stew 5", "stream-image")
+    body = ''.join([chunk async for chunk in response.body_iterator])
+
+    events = sse_events(body)
+    assert [event for event, _ in events if event != "field"] == ["health_analysis", "meal", "done"]
+    assert dict(events)["meal"]["image_pending"] is True
+    # The search runs only after the response, as a background task
+    assert searches == []
+    await response.background()
+    assert searches == ["zorblax stew"]
@@ -0,0 +1,63 @@
+"""Bulk export and import of meal history (transfer_service), through the routes."""
+import json
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+MEALS = [
+    {"timestamp": 1700000000, "name": "oatmeal", "calories": 150, "protein": 5, "serving_size": "1 cup",
+     "local_date": "2023-11-14"},
+    {"timestamp": 1700040000, "name": "pasta, with \"pesto\"\nand peas", "calories": 600.5, "sodium": 800},
+]
+
+def ndjson(rows) -> str:
+    return ''.join(json.dumps(row) + '\n' for row in rows)
+
+async def export(client, user_id: str, fmt: str = "ndjson") -> str:
+    response = await client.get("/api/export/", params={"user_id": user_id, "format": fmt})
+    assert response.status_code == 200
+    return response.text
+
+async def import_body(client, user_id: str, body: str, fmt: str = "ndjson") -> dict:
+    response = await client.post("/api/import/", params={"user_id": user_id, "format": fmt}, content=body)
+    assert response.status_code == 200
+    return response.json()
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+async def test_round_trip(client, fmt):
+    source, copy = f"transfer-source-{fmt}", f"transfer-copy-{fmt}"
+    assert (await import_body(client, source, ndjson(MEALS)))["imported"] == len(MEALS)
+    exported = await export(client, source, fmt)
+
+    result = await import_body(client, copy, exported, fmt)
+    assert (result["imported"], result["rejected"]) == (len(MEALS), 0)
+    # Same rows, with the local_date filled in for the meal that had none
+    assert await export(client, copy, fmt) == exported
+    rows = [json.loads(line) for line in (await export(client, copy)).splitlines()]
+    assert [row["name"] for row in rows] == [meal["name"] for meal in MEALS]
+    assert rows[0]["local_date"] == "2023-11-14" and rows[1]["local_date"]
+
+@pytest.mark.parametrize("row, error", [
+    ({"timestamp": 100000000000000, "name": "far future"}, "timestamp must be between"),
+    ({"timestamp": 99999999999999999999, "name": "huge", "local_date": "2020-01-01"}, "timestamp must be between"),
+    ({"timestamp": 0, "name": "epoch"}, "timestamp must be between"),
+    ({"timestamp": 1700000000, "name": "compact date", "local_date": "20231114"}, "local_date"),
+    ({"timestamp": 1700000000, "name": "bad date", "local_date": "2023-02-30"}, "local_date"),
+    ({"timestamp": 1700000000, "name": "negative", "calories": -5}, "calories"),
+    ({"timestamp": 1700000000}, "name is required"),
+])
+async def test_bad_row_is_reported_and_the_rest_imported(client, row, error):
+    user_id = f"transfer-bad-{error}-{row.get('name')}"
+    result = await import_body(client, user_id, ndjson([MEALS[0], row, MEALS[1]]))
+
+    assert (result["imported"], result["rejected"]) == (2, 1)
+    assert result["errors"][0]["line"] == 2 and error in result["errors"][0]["error"]
+    assert len((await export(client, user_id)).splitlines()) == 2
+
+async def test_dry_run_writes_nothing(client):
+    result = await import_body(client, "transfer-dry-run", ndjson(MEALS) + "not json\n", "ndjson")
+    assert result["rejected"] == 1
+    response = await client.post("/api/import/", params={"user_id": "transfer-dry-run", "dry_run": True},
+                                 content=ndjson(MEALS))
+    assert response.json()["imported"] == len(MEALS) and response.json()["dry_run"]
+    assert len((await export(client, "transfer-dry-run")).splitlines()) == len(MEALS)